@@ -0,0 +1,17 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+# UTC datetimes render with a trailing "Z" to match Pydantic's JSON output for response models.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
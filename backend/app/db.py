@@ -1,26 +1,185 @@
-from collections.abc import AsyncGenerator
+import math
+import time
+from collections.abc import AsyncGenerator, Callable
 
+from fastapi import Depends, Request, Response
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.core.config import settings
+from app.core.security import token_payload_or_none
+
+
+# Bump whenever the models change (and the stamp at the end of sql/schema.sql); no worker
+# starts against a database stamped with another version.
+SCHEMA_VERSION = 7
+
+# Postgres SQLSTATE for a missing relation, raised when schema_version was never created.
+UNDEFINED_TABLE = "42P01"
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+engine = create_async_engine(
+    settings.database_url,
+    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Reporting reads go to the replica when one is configured; otherwise they share the primary.
+read_engine = (
+    create_async_engine(
+        settings.read_database_url,
+        pool_pre_ping=True,
+        pool_size=settings.read_db_pool_size,
+        max_overflow=settings.read_db_max_overflow,
+    )
+    if settings.read_database_url
+    else engine
+)
+ReadSessionLocal = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+MAX_TRACKED_WRITERS = 10_000
+# Carries the read-your-writes deadline (epoch seconds) so every worker honours it; the
+# in-process map below still covers clients that do not keep cookies, on the worker they hit.
+WRITE_COOKIE = "rw_until"
+
+_recent_writes: dict[str, float] = {}
+
+
+def _request_subject(request: Request) -> str | None:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = token_payload_or_none(token)
+    if not payload or payload.get("sub") is None:
+        return None
+    return str(payload["sub"])
+
+
+def record_write(request: Request, response: Response) -> None:
+    response.set_cookie(
+        WRITE_COOKIE,
+        f"{time.time() + settings.read_your_writes_seconds:.3f}",
+        max_age=math.ceil(settings.read_your_writes_seconds),
+        httponly=True,
+        samesite="lax",
+    )
+    subject = _request_subject(request)
+    if subject is None:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) >= MAX_TRACKED_WRITERS:
+        for key in [key for key, until in _recent_writes.items() if until <= now]:
+            del _recent_writes[key]
+    _recent_writes[subject] = now + settings.read_your_writes_seconds
+
+
+def _cookie_deadline(request: Request) -> float:
+    try:
+        return float(request.cookies.get(WRITE_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+
+def wrote_recently(request: Request) -> bool:
+    # A forged cookie can only keep its sender on the primary for one window at a time; the
+    # extra second absorbs clock skew between hosts.
+    now = time.time()
+    if now < _cookie_deadline(request) <= now + settings.read_your_writes_seconds + 1:
+        return True
+    subject = _request_subject(request)
+    return subject is not None and _recent_writes.get(subject, 0.0) > time.monotonic()
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
 
+def _read_session_factory(request: Request, primary: bool = False) -> async_sessionmaker:
+    # Users who just wrote read their own writes from the primary, and `since` deltas stay
+    # there too so the version they report never runs ahead of the rows they return.
+    if (
+        primary
+        or read_engine is engine
+        or wrote_recently(request)
+        or "since" in request.query_params
+    ):
+        return AsyncSessionLocal
+    return ReadSessionLocal
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with _read_session_factory(request)() as session:
+        yield session
+
+
+def get_versioned_read_db(
+    changed_recently: Callable[..., bool],
+) -> Callable[..., AsyncGenerator[AsyncSession, None]]:
+    # For responses tagged with an ETag or stored in the response cache: while the data changed
+    # within the replica lag window, read from the primary so a stale page is never stored
+    # under the new version. changed_recently is resolved as a dependency, so it can declare
+    # typed path or query parameters.
+    async def dependency(
+        request: Request, changed: bool = Depends(changed_recently)
+    ) -> AsyncGenerator[AsyncSession, None]:
+        async with _read_session_factory(request, changed)() as session:
+            yield session
+
+    return dependency
+
+
+def _require_schema_version(version: int | None) -> None:
+    if version is None:
+        raise RuntimeError(
+            "Database has no schema version; apply sql/schema.sql, or start with STARTUP_MODE=full "
+            "against an empty database to create the tables"
+        )
+    if version != SCHEMA_VERSION:
+        # create_all only adds missing tables, so a full start cannot upgrade existing ones.
+        raise RuntimeError(
+            f"Database schema version {version} does not match {SCHEMA_VERSION}; apply the "
+            "changes to existing tables from sql/schema.sql, which also records the new version"
+        )
+
+
 async def init_db() -> None:
-    from app import models  # noqa: F401
+    from app import models
 
     async with engine.begin() as conn:
+        existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+        if models.SchemaVersion.__tablename__ in existing:
+            version = await conn.scalar(
+                select(models.SchemaVersion.version).where(models.SchemaVersion.id == 1)
+            )
+            _require_schema_version(version)
+            await conn.run_sync(Base.metadata.create_all)
+            return
+        if existing & set(Base.metadata.tables):
+            _require_schema_version(None)
+
         await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(models.SchemaVersion).values(id=1, version=SCHEMA_VERSION))
+
+
+async def check_schema_version() -> None:
+    from app.models import SchemaVersion
+
+    async with engine.connect() as conn:
+        try:
+            version = await conn.scalar(select(SchemaVersion.version).where(SchemaVersion.id == 1))
+        except ProgrammingError as exc:
+            if getattr(exc.orig, "sqlstate", None) != UNDEFINED_TABLE:
+                raise
+            version = None
+    _require_schema_version(version)
@@ -1,38 +1,163 @@
+import asyncio
+import json
+import logging
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.core.security import token_payload_or_none
-from app.db import engine, init_db, AsyncSessionLocal
-from app.routers import auth, clients, limits, positions, pricing, rfq, trades
+from app.db import (
+    SAFE_METHODS,
+    AsyncSessionLocal,
+    check_schema_version,
+    engine,
+    init_db,
+    read_engine,
+    record_write,
+)
+from app.routers import audit, auth, clients, limits, positions, pricing, risk, rfq, system, trades
 from app.seed import ensure_seed_data
+from app.services.admission import admission
+from app.services.analytics import position_rows
+from app.services.audit import audit_writer
+from app.services.exposure import exposure_matrix
+from app.services.idempotency import REPLAY_HEADER, idempotency
 from app.services.market_data import market_data_service
-from app.services.ws import ALLOWED_CHANNELS, manager
+from app.services.mtm import mtm_engine
+from app.services.rfq_stream import rfq_stream_service
+from app.services.risk_engine import risk_engine
+from app.services.snapshots import prime_channel_snapshots
+from app.services.var import var_service
+from app.services.ws import ALLOWED_CHANNELS, ENCODINGS, manager, parse_filters
+from app.services.ws_outbox import ws_outbox
+
+
+# Uvicorn configures this logger, so startup timings show up without extra logging setup.
+logger = logging.getLogger("uvicorn.error")
+
+
+class StartupTimer:
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._last = self._started
+        self._phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        phases = " ".join(f"{phase}={elapsed * 1000:.1f}ms" for phase, elapsed in self._phases)
+        return f"{phases} total={(self._last - self._started) * 1000:.1f}ms"
+
+
+async def load_position_engines() -> None:
+    # mtm, exposure and the risk engine are all built from one positions scan; exposure reads
+    # the marked positions, so it follows mtm.
+    async with AsyncSessionLocal() as db:
+        rows = await position_rows(db)
+        await mtm_engine.load(db, rows)
+        await exposure_matrix.load(db)
+        await risk_engine.load(db, rows)
+
+
+async def prune_idempotency_keys() -> None:
+    async with AsyncSessionLocal() as db:
+        await idempotency.prune(db)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    await init_db()
+    timer = StartupTimer()
+    if settings.startup_mode == "fast":
+        await check_schema_version()
+        timer.mark("schema_check")
+    else:
+        await init_db()
+        timer.mark("create_all")
+        async with AsyncSessionLocal() as db:
+            await ensure_seed_data(db)
+        timer.mark("seed")
+
     async with AsyncSessionLocal() as db:
-        await ensure_seed_data(db)
+        # The outbox cursor is taken before the snapshots, so nothing falls between the two.
+        await ws_outbox.load(db)
+        # Snapshots mark streaming RFQs, so the streams are loaded first.
+        await rfq_stream_service.load(db)
+    await asyncio.gather(
+        prime_channel_snapshots(),
+        market_data_service.warm(),
+        load_position_engines(),
+        prune_idempotency_keys(),
+    )
+    timer.mark("warm_caches")
+
+    market_data_service.add_listener(rfq_stream_service.on_ticks)
+    market_data_service.add_listener(mtm_engine.on_ticks)
+    market_data_service.add_listener(var_service.on_ticks)
     await market_data_service.start()
+    timer.mark("market_data")
+    await audit_writer.start()
+    await ws_outbox.start()
+    await risk_engine.start()
+    logger.info("Startup (%s mode): %s", settings.startup_mode, timer.report())
     try:
         yield
     finally:
+        await ws_outbox.stop()
+        await risk_engine.stop()
         await market_data_service.stop()
+        await mtm_engine.stop()
+        await audit_writer.stop()
         await engine.dispose()
+        if read_engine is not engine:
+            await read_engine.dispose()
 
 
 app = FastAPI(title=settings.project_name, lifespan=lifespan)
 
+
+# Login stays open under load so traders can always get back in.
+UNSHED_PATHS = {"/api/auth/login"}
+
+
+@app.middleware("http")
+async def shed_writes(request: Request, call_next):
+    if request.method in SAFE_METHODS or request.url.path in UNSHED_PATHS:
+        return await call_next(request)
+    if not admission.try_acquire():
+        return FastJSONResponse(
+            {"detail": "Too many concurrent writes, retry shortly"},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.release()
+
+
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        record_write(request, response)
+    return response
+
+
+# Added last so it is outermost and shed 429s still carry CORS headers.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins_list(),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Resource-Version", "Retry-After", REPLAY_HEADER],
 )
 
 app.include_router(auth.router, prefix="/api")
@@ -42,11 +167,20 @@ app.include_router(pricing.router, prefix="/api")
 app.include_router(positions.router, prefix="/api")
 app.include_router(clients.router, prefix="/api")
 app.include_router(limits.router, prefix="/api")
+app.include_router(risk.router, prefix="/api")
+app.include_router(audit.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
 
 
 @app.get("/health")
 async def health() -> dict:
-    return {"status": "ok"}
+    if market_data_service.feed_error is not None:
+        return {
+            "status": "degraded",
+            "market_feed_error": market_data_service.feed_error,
+            "market_ingest_failures": market_data_service.ingest_failures,
+        }
+    return {"status": "ok", "market_ingest_failures": market_data_service.ingest_failures}
 
 
 @app.websocket("/ws/{channel}")
@@ -61,12 +195,39 @@ async def websocket_channel(websocket: WebSocket, channel: str) -> None:
         await websocket.close(code=1008)
         return
 
-    await manager.connect(channel, websocket)
+    encoding = websocket.query_params.get("encoding", "json").lower()
+    if encoding not in ENCODINGS:
+        await websocket.close(code=1008)
+        return
+
+    filters = parse_filters(dict(websocket.query_params))
+    if filters is None:
+        await websocket.close(code=1008)
+        return
+
+    since = websocket.query_params.get("since", "")
 
     try:
+        await manager.connect(
+            channel, websocket, encoding, int(since) if since.isdigit() else None, filters
+        )
         while True:
             message = await websocket.receive_text()
             if message.strip().lower() == "ping":
-                await websocket.send_json({"channel": channel, "type": "pong"})
+                manager.send(channel, websocket, encoding, {"channel": channel, "type": "pong"})
+                continue
+
+            try:
+                command = json.loads(message)
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            if command.get("type") == "replay" and isinstance(command.get("since"), int):
+                await manager.replay(channel, websocket, encoding, command["since"])
+            elif command.get("type") == "subscribe":
+                subscription = parse_filters(command)
+                if subscription is not None:
+                    await manager.subscribe(channel, websocket, encoding, subscription)
     except WebSocketDisconnect:
         await manager.disconnect(channel, websocket)
@@ -4,6 +4,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
@@ -15,6 +16,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    false,
     func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -109,6 +111,9 @@ class RFQRequest(Base):
     quoted_price: Mapped[float] = mapped_column(Numeric(24, 8), nullable=False)
     quote_expiry: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     status: Mapped[RFQStatus] = mapped_column(Enum(RFQStatus), default=RFQStatus.quoted, index=True)
+    streaming: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false(), nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
     )
@@ -188,21 +193,101 @@ class AuditLog(Base):
     __tablename__ = "audit_logs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    event_type: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
-    entity_type: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_type: Mapped[str] = mapped_column(String(64), nullable=False)
     entity_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     metadata_json: Mapped[dict] = mapped_column("metadata", JSON, nullable=False, default=dict)
     immutable_hash: Mapped[str] = mapped_column(String(128), nullable=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     user: Mapped[User | None] = relationship()
 
 
+class AuditOutbox(Base):
+    __tablename__ = "audit_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    metadata_json: Mapped[dict] = mapped_column("metadata", JSON, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class AuditArchiveCheckpoint(Base):
+    __tablename__ = "audit_archive_checkpoints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    first_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    previous_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    last_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    file_path: Mapped[str] = mapped_column(String(512), nullable=False)
+    file_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class WSOutboxEvent(Base):
+    __tablename__ = "ws_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    channel: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "endpoint", "key", name="uq_idempotency_user_endpoint_key"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    endpoint: Mapped[str] = mapped_column(String(64), nullable=False)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    response: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+
 Index("ix_market_prices_instrument_ts", MarketPrice.instrument_id, MarketPrice.ts.desc())
 Index("ix_trades_client_instrument_ts", Trade.client_id, Trade.instrument_id, Trade.timestamp.desc())
 Index("ix_rfq_status_expiry", RFQRequest.status, RFQRequest.quote_expiry)
 Index("ix_positions_client_asset", Position.client_id, Position.instrument_id)
-Index("ix_audit_entity_created", AuditLog.entity_type, AuditLog.entity_id, AuditLog.created_at.desc())
+# Audit filters are equality prefixes of one of these, and pages walk (created_at, id) backwards.
+Index(
+    "ix_audit_logs_entity_created_id",
+    AuditLog.entity_type,
+    AuditLog.entity_id,
+    AuditLog.created_at,
+    AuditLog.id,
+)
+Index("ix_audit_logs_type_created_id", AuditLog.entity_type, AuditLog.created_at, AuditLog.id)
+Index("ix_audit_logs_event_created_id", AuditLog.event_type, AuditLog.created_at, AuditLog.id)
+Index("ix_audit_logs_user_created_id", AuditLog.user_id, AuditLog.created_at, AuditLog.id)
+Index("ix_audit_logs_created_id", AuditLog.created_at, AuditLog.id)
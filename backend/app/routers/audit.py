@@ -0,0 +1,109 @@
+import base64
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.responses import FastJSONResponse
+from app.db import get_read_db
+from app.deps import require_roles
+from app.models import AuditLog, User, UserRole
+from app.schemas import AuditPage
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+def _encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+@router.get("", response_model=AuditPage)
+async def list_audit_logs(
+    entity_type: str | None = Query(default=None),
+    entity_id: str | None = Query(default=None),
+    event_type: str | None = Query(default=None),
+    user_id: int | None = Query(default=None),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000),
+    cursor: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
+    _: User = Depends(require_roles(UserRole.risk, UserRole.admin)),
+) -> Response:
+    if entity_id is not None and entity_type is None:
+        raise HTTPException(status_code=400, detail="entity_id requires entity_type")
+
+    # A single equality filter (entity, entity type, event type or user), or none with an optional
+    # time range, is a prefix of an index ending in (created_at, id), so each page is one
+    # backward index range scan. Combining several of them scans one index and filters the rest.
+    filters = []
+    if entity_type is not None:
+        filters.append(AuditLog.entity_type == entity_type)
+    if entity_id is not None:
+        filters.append(AuditLog.entity_id == entity_id)
+    if event_type is not None:
+        filters.append(AuditLog.event_type == event_type)
+    if user_id is not None:
+        filters.append(AuditLog.user_id == user_id)
+    if start is not None:
+        filters.append(AuditLog.created_at >= start)
+    if end is not None:
+        filters.append(AuditLog.created_at <= end)
+    if cursor is not None:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        filters.append(tuple_(AuditLog.created_at, AuditLog.id) < (cursor_created_at, cursor_id))
+
+    stmt = (
+        select(
+            AuditLog.id,
+            AuditLog.event_type,
+            AuditLog.entity_type,
+            AuditLog.entity_id,
+            AuditLog.user_id,
+            AuditLog.metadata_json,
+            AuditLog.immutable_hash,
+            AuditLog.created_at,
+        )
+        .order_by(desc(AuditLog.created_at), desc(AuditLog.id))
+        .limit(limit + 1)
+    )
+    if filters:
+        stmt = stmt.where(and_(*filters))
+
+    rows = (await db.execute(stmt)).all()
+    items = [
+        {
+            "id": row_id,
+            "event_type": row_event_type,
+            "entity_type": row_entity_type,
+            "entity_id": row_entity_id,
+            "user_id": row_user_id,
+            "metadata": metadata,
+            "immutable_hash": immutable_hash,
+            "created_at": created_at,
+        }
+        for (
+            row_id,
+            row_event_type,
+            row_entity_type,
+            row_entity_id,
+            row_user_id,
+            metadata,
+            immutable_hash,
+            created_at,
+        ) in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last["created_at"], last["id"])
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
@@ -1,22 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.core.responses import FastJSONResponse
+from app.core.config import settings
+from app.db import get_versioned_read_db
 from app.deps import require_roles
 from app.models import User, UserRole
 from app.schemas import ClientAnalyticsOut
 from app.services.analytics import calculate_client_analytics
+from app.services.cache import cached_response
+from app.services.versions import resource_versions
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
+def _client_changed_recently(client_id: int) -> bool:
+    return resource_versions.changed_within(
+        ("client", client_id), settings.read_replica_max_lag_seconds
+    )
+
+
+analytics_read_db = get_versioned_read_db(_client_changed_recently)
+
 
 @router.get("/{client_id}/analytics", response_model=ClientAnalyticsOut)
 async def get_client_analytics(
     client_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(analytics_read_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> ClientAnalyticsOut:
-    try:
-        return await calculate_client_analytics(db, client_id)
-    except ValueError as exc:
-        raise HTTPException(status_code=404, detail=str(exc))
+) -> Response:
+    tags = [f"analytics:{client_id}"]
+
+    async def build() -> Response:
+        instrument_ids: set[int] = set()
+        try:
+            result = await calculate_client_analytics(db, client_id, touched_instruments=instrument_ids)
+        except ValueError as exc:
+            raise HTTPException(status_code=404, detail=str(exc))
+        # Mark-to-market moves with every tick on the client's instruments.
+        tags.extend(f"instrument:{instrument_id}" for instrument_id in sorted(instrument_ids))
+        return FastJSONResponse(result.model_dump())
+
+    # Versions and invalidation events are per process: a trade booked on another worker does
+    # not evict this entry or bump its ETag, so clients can get a stale 304 until a local event
+    # (such as the next tick on one of the client's instruments) moves the version.
+    return await cached_response(request, tags, build)
@@ -1,52 +1,151 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.responses import FastJSONResponse
 from app.db import get_db
 from app.deps import require_roles
 from app.models import Client, Instrument, Position, RiskLimit, User, UserRole
-from app.schemas import RiskLimitOut, RiskOverrideRequest, RiskOverrideResponse
+from app.schemas import RiskLimitOut, RiskLimitUpdate, RiskOverrideRequest, RiskOverrideResponse
 from app.services.audit import log_event
+from app.services.cache import cached_response
 from app.services.risk import get_effective_limit
+from app.services.risk_engine import risk_engine
+from app.services.versions import (
+    delta_payload,
+    is_not_modified,
+    not_modified_response,
+    resource_versions,
+    version_headers,
+)
 
 router = APIRouter(prefix="/limits", tags=["risk_limits"])
 
 
-@router.get("", response_model=list[RiskLimitOut])
-async def list_limits(
-    db: AsyncSession = Depends(get_db),
-    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> list[RiskLimitOut]:
+async def _limit_items(db: AsyncSession, changed: set | None) -> list[dict]:
     stmt = (
-        select(RiskLimit, Client.name, Instrument.symbol)
+        select(
+            RiskLimit.id,
+            RiskLimit.client_id,
+            Client.name,
+            RiskLimit.instrument_id,
+            Instrument.symbol,
+            RiskLimit.soft_limit_usd,
+            RiskLimit.hard_limit_usd,
+            RiskLimit.leverage_limit,
+            RiskLimit.requires_supervisor,
+            RiskLimit.active,
+        )
         .outerjoin(Client, RiskLimit.client_id == Client.id)
         .outerjoin(Instrument, RiskLimit.instrument_id == Instrument.id)
         .order_by(RiskLimit.id)
     )
+    if changed is not None:
+        stmt = stmt.where(RiskLimit.id.in_(list(changed)))
     rows = (await db.execute(stmt)).all()
 
     return [
-        RiskLimitOut(
-            id=limit.id,
-            client_id=limit.client_id,
-            client_name=client_name,
-            instrument_id=limit.instrument_id,
-            instrument_symbol=instrument_symbol,
-            soft_limit_usd=float(limit.soft_limit_usd),
-            hard_limit_usd=float(limit.hard_limit_usd),
-            leverage_limit=float(limit.leverage_limit),
-            requires_supervisor=limit.requires_supervisor,
-            active=limit.active,
-        )
-        for limit, client_name, instrument_symbol in rows
+        {
+            "id": limit_id,
+            "client_id": client_id,
+            "client_name": client_name,
+            "instrument_id": instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "soft_limit_usd": float(soft_limit_usd),
+            "hard_limit_usd": float(hard_limit_usd),
+            "leverage_limit": float(leverage_limit),
+            "requires_supervisor": requires_supervisor,
+            "active": active,
+        }
+        for (
+            limit_id,
+            client_id,
+            client_name,
+            instrument_id,
+            instrument_symbol,
+            soft_limit_usd,
+            hard_limit_usd,
+            leverage_limit,
+            requires_supervisor,
+            active,
+        ) in rows
     ]
 
 
+@router.get("", response_model=list[RiskLimitOut])
+async def list_limits(
+    request: Request,
+    since: int | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    version = resource_versions.current("limits")
+    etag = resource_versions.etag(request, "limits")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    changed = resource_versions.changed_since("limits", since) if since is not None else None
+    if changed is not None and not changed:
+        headers = version_headers(etag, version)
+        return FastJSONResponse(delta_payload(version, changed, []), headers=headers)
+
+    if since is None:
+
+        async def build() -> Response:
+            items = await _limit_items(db, None)
+            return FastJSONResponse(items, headers=version_headers(etag, version))
+
+        return await cached_response(request, ["limits"], build)
+
+    items = await _limit_items(db, changed)
+    headers = version_headers(etag, version)
+    return FastJSONResponse(delta_payload(version, changed, items), headers=headers)
+
+
+@router.put("/{limit_id}", response_model=RiskLimitOut)
+async def update_limit(
+    limit_id: int,
+    payload: RiskLimitUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.risk, UserRole.admin)),
+) -> Response:
+    limit = await db.get(RiskLimit, limit_id, with_for_update=True)
+    if limit is None:
+        raise HTTPException(status_code=404, detail="Risk limit not found")
+    changes = payload.model_dump(exclude_none=True)
+    soft_limit = changes.get("soft_limit_usd", float(limit.soft_limit_usd))
+    hard_limit = changes.get("hard_limit_usd", float(limit.hard_limit_usd))
+    if soft_limit > hard_limit:
+        raise HTTPException(status_code=400, detail="soft_limit_usd exceeds hard_limit_usd")
+    for field, value in changes.items():
+        setattr(limit, field, value)
+    await log_event(
+        db,
+        event_type="risk.limit_updated",
+        entity_type="risk_limit",
+        entity_id=str(limit_id),
+        user_id=current_user.id,
+        metadata=changes,
+    )
+    await db.commit()
+    # Reloading here publishes the limit update, so this process checks trades against the new
+    # limit from the next request; other workers pick it up on their next poll.
+    await risk_engine.refresh_limits(db)
+    items = await _limit_items(db, {limit_id})
+    return FastJSONResponse(items[0])
+
+
 @router.get("/alerts")
 async def list_limit_alerts(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> dict:
+) -> Response:
+    version = resource_versions.current("positions")
+    etag = resource_versions.etag(request, "positions", "limits")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
     positions = (await db.execute(select(Position))).scalars().all()
     alerts = []
 
@@ -82,7 +181,7 @@ async def list_limit_alerts(
             }
         )
 
-    return {"alerts": alerts}
+    return FastJSONResponse({"alerts": alerts}, headers=version_headers(etag, version))
 
 
 @router.post("/override", response_model=RiskOverrideResponse)
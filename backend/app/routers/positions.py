@@ -1,38 +1,114 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import desc, select
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import desc, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.responses import FastJSONResponse
 from app.db import get_db
 from app.deps import require_roles
 from app.models import Client, Instrument, Position, User, UserRole
-from app.schemas import PositionOut
+from app.schemas import ExposureMatrixOut, PositionOut
+from app.services.cache import cached_response
+from app.services.exposure import exposure_matrix
+from app.services.versions import (
+    delta_payload,
+    is_not_modified,
+    not_modified_response,
+    resource_versions,
+    version_headers,
+)
 
 router = APIRouter(prefix="/positions", tags=["positions"])
 
 
-@router.get("", response_model=list[PositionOut])
-async def get_positions(
-    db: AsyncSession = Depends(get_db),
-    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> list[PositionOut]:
+async def _position_items(db: AsyncSession, changed: set | None) -> list[dict]:
     stmt = (
-        select(Position, Client.name, Instrument.symbol)
+        select(
+            Position.client_id,
+            Client.name,
+            Position.instrument_id,
+            Instrument.symbol,
+            Position.net_size,
+            Position.avg_price,
+            Position.usd_exposure,
+            Position.updated_at,
+        )
         .join(Client, Position.client_id == Client.id)
         .join(Instrument, Position.instrument_id == Instrument.id)
         .order_by(desc(Position.usd_exposure))
     )
+    if changed is not None:
+        stmt = stmt.where(tuple_(Position.client_id, Position.instrument_id).in_(list(changed)))
     rows = (await db.execute(stmt)).all()
 
     return [
-        PositionOut(
-            client_id=position.client_id,
-            client_name=client_name,
-            instrument_id=position.instrument_id,
-            instrument_symbol=instrument_symbol,
-            net_size=float(position.net_size),
-            avg_price=float(position.avg_price),
-            usd_exposure=float(position.usd_exposure),
-            updated_at=position.updated_at,
-        )
-        for position, client_name, instrument_symbol in rows
+        {
+            "client_id": client_id,
+            "client_name": client_name,
+            "instrument_id": instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "net_size": float(net_size),
+            "avg_price": float(avg_price),
+            "usd_exposure": float(usd_exposure),
+            "updated_at": updated_at,
+        }
+        for (
+            client_id,
+            client_name,
+            instrument_id,
+            instrument_symbol,
+            net_size,
+            avg_price,
+            usd_exposure,
+            updated_at,
+        ) in rows
     ]
+
+
+@router.get("", response_model=list[PositionOut])
+async def get_positions(
+    request: Request,
+    since: int | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    version = resource_versions.current("positions")
+    etag = resource_versions.etag(request, "positions")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    changed = resource_versions.changed_since("positions", since) if since is not None else None
+    if changed is not None and not changed:
+        headers = version_headers(etag, version)
+        return FastJSONResponse(delta_payload(version, changed, []), headers=headers)
+
+    if since is None:
+
+        async def build() -> Response:
+            items = await _position_items(db, None)
+            return FastJSONResponse(items, headers=version_headers(etag, version))
+
+        return await cached_response(request, ["positions"], build)
+
+    items = await _position_items(db, changed)
+    headers = version_headers(etag, version)
+    return FastJSONResponse(delta_payload(version, changed, items), headers=headers)
+
+
+@router.get("/exposure-matrix", response_model=ExposureMatrixOut)
+async def get_exposure_matrix(
+    request: Request,
+    max_clients: int = Query(default=200, ge=2, le=5000),
+    max_instruments: int = Query(default=100, ge=2, le=1000),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    await exposure_matrix.refresh(db)
+    version = resource_versions.current("exposure")
+    etag = resource_versions.etag(request, "exposure")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    payload = exposure_matrix.snapshot(max_clients, max_instruments)
+    return FastJSONResponse(
+        {"version": version, **payload}, headers=version_headers(etag, version)
+    )
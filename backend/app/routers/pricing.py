@@ -1,28 +1,72 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.db import get_db
 from app.deps import require_roles
-from app.models import Instrument, MarketPrice, User, UserRole
-from app.schemas import MarketPriceOut
+from app.models import Client, Instrument, MarketPrice, Position, User, UserRole
+from app.schemas import MarketPriceOut, QuoteLadderOut, QuoteLadderRow, VenueBookOut
+from app.services.estimators import tick_estimators
+from app.services.pricing import (
+    calculate_quotes,
+    default_mid,
+    inventory_skew_bps_array,
+    volatility_spread_bps,
+)
+from app.services.venue_book import venue_books
+from app.services.versions import (
+    delta_payload,
+    is_not_modified,
+    not_modified_response,
+    resource_versions,
+    version_headers,
+)
 
 router = APIRouter(prefix="/pricing", tags=["pricing"])
 
+DEFAULT_LADDER_SIZES = [1.0, 5.0, 10.0, 25.0, 50.0, 100.0]
+MAX_LADDER_CELLS = 50_000
+
 
 @router.get("/current", response_model=list[MarketPriceOut])
 async def get_current_prices(
+    request: Request,
+    since: int | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> list[MarketPriceOut]:
-    latest_subquery = (
-        select(MarketPrice.instrument_id, func.max(MarketPrice.ts).label("max_ts"))
-        .group_by(MarketPrice.instrument_id)
-        .subquery()
-    )
+) -> Response:
+    version = resource_versions.current("prices")
+    etag = resource_versions.etag(request, "prices")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    changed = resource_versions.changed_since("prices", since) if since is not None else None
+    if changed is not None and not changed:
+        headers = version_headers(etag, version)
+        return FastJSONResponse(delta_payload(version, changed, []), headers=headers)
+
+    latest_subquery = select(MarketPrice.instrument_id, func.max(MarketPrice.ts).label("max_ts"))
+    if changed is not None:
+        latest_subquery = latest_subquery.where(MarketPrice.instrument_id.in_(list(changed)))
+    latest_subquery = latest_subquery.group_by(MarketPrice.instrument_id).subquery()
 
     stmt = (
-        select(MarketPrice, Instrument.symbol)
+        select(
+            MarketPrice.instrument_id,
+            Instrument.symbol,
+            MarketPrice.bid,
+            MarketPrice.ask,
+            MarketPrice.mid,
+            MarketPrice.spread_bps,
+            MarketPrice.rolling_vwap,
+            MarketPrice.volatility_5m,
+            MarketPrice.ts,
+        )
         .join(Instrument, MarketPrice.instrument_id == Instrument.id)
         .join(
             latest_subquery,
@@ -35,17 +79,178 @@ async def get_current_prices(
     )
 
     rows = (await db.execute(stmt)).all()
-    return [
-        MarketPriceOut(
-            instrument_id=price.instrument_id,
-            instrument_symbol=symbol,
-            bid=float(price.bid),
-            ask=float(price.ask),
-            mid=float(price.mid),
-            spread_bps=float(price.spread_bps),
-            rolling_vwap=float(price.rolling_vwap),
-            volatility_5m=float(price.volatility_5m),
-            ts=price.ts,
+    items = [
+        {
+            "instrument_id": instrument_id,
+            "instrument_symbol": symbol,
+            "bid": float(bid),
+            "ask": float(ask),
+            "mid": float(mid),
+            "spread_bps": float(spread_bps),
+            "rolling_vwap": float(rolling_vwap),
+            "volatility_5m": float(volatility_5m),
+            "ts": ts,
+        }
+        for (
+            instrument_id,
+            symbol,
+            bid,
+            ask,
+            mid,
+            spread_bps,
+            rolling_vwap,
+            volatility_5m,
+            ts,
+        ) in rows
+    ]
+
+    headers = version_headers(etag, version)
+    if since is not None:
+        return FastJSONResponse(delta_payload(version, changed, items), headers=headers)
+    return FastJSONResponse(items, headers=headers)
+
+
+@router.get("/ladder", response_model=QuoteLadderOut)
+async def get_quote_ladder(
+    instrument_ids: list[int] | None = Query(default=None),
+    client_ids: list[int] | None = Query(default=None),
+    sizes: list[float] | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> QuoteLadderOut:
+    ladder_sizes = sorted(set(sizes or DEFAULT_LADDER_SIZES))
+    if any(size <= 0 for size in ladder_sizes):
+        raise HTTPException(status_code=400, detail="Ladder sizes must be positive")
+
+    instrument_stmt = select(Instrument.id, Instrument.symbol).where(Instrument.is_active.is_(True))
+    if instrument_ids:
+        instrument_stmt = instrument_stmt.where(Instrument.id.in_(instrument_ids))
+    instruments = (await db.execute(instrument_stmt.order_by(Instrument.symbol))).all()
+
+    client_stmt = select(Client.id, Client.name, Client.default_markup_bps).where(
+        Client.is_active.is_(True)
+    )
+    if client_ids:
+        client_stmt = client_stmt.where(Client.id.in_(client_ids))
+    clients = (await db.execute(client_stmt.order_by(Client.name))).all()
+
+    if len(instruments) * len(clients) * len(ladder_sizes) > MAX_LADDER_CELLS:
+        raise HTTPException(status_code=400, detail="Ladder grid too large")
+    if not instruments or not clients:
+        return QuoteLadderOut(
+            sizes=ladder_sizes,
+            spread_buffer_bps=settings.rfq_spread_buffer_bps,
+            generated_at=datetime.now(timezone.utc),
+            rows=[],
+        )
+
+    selected_ids = [instrument_id for instrument_id, _ in instruments]
+    latest_subquery = (
+        select(MarketPrice.instrument_id, func.max(MarketPrice.ts).label("max_ts"))
+        .where(MarketPrice.instrument_id.in_(selected_ids))
+        .group_by(MarketPrice.instrument_id)
+        .subquery()
+    )
+    mid_rows = await db.execute(
+        select(MarketPrice.instrument_id, MarketPrice.mid).join(
+            latest_subquery,
+            and_(
+                MarketPrice.instrument_id == latest_subquery.c.instrument_id,
+                MarketPrice.ts == latest_subquery.c.max_ts,
+            ),
         )
-        for price, symbol in rows
+    )
+    latest_mid = {instrument_id: float(mid) for instrument_id, mid in mid_rows.all()}
+
+    inventory_rows = await db.execute(
+        select(Position.instrument_id, func.coalesce(func.sum(Position.net_size), 0))
+        .where(Position.instrument_id.in_(selected_ids))
+        .group_by(Position.instrument_id)
+    )
+    inventory_map = {instrument_id: float(total) for instrument_id, total in inventory_rows.all()}
+
+    # Grid axes: instrument x client x side; the quote model is size-independent today,
+    # so each size column repeats the level the RFQ path would return for that size.
+    mids = np.array(
+        [latest_mid.get(instrument_id, default_mid(symbol)) for instrument_id, symbol in instruments]
+    )[:, None, None]
+    inventory = np.array([inventory_map.get(instrument_id, 0.0) for instrument_id, _ in instruments])[
+        :, None, None
+    ]
+    markups = np.array([float(markup) for _, _, markup in clients])[None, :, None]
+    spreads = np.array(
+        [
+            settings.rfq_spread_buffer_bps
+            + volatility_spread_bps(tick_estimators.volatility(instrument_id))
+            for instrument_id, _ in instruments
+        ]
+    )[:, None, None]
+    sides = np.array([-1.0, 1.0])[None, None, :]
+
+    skew = inventory_skew_bps_array(inventory, sides)
+    quotes = calculate_quotes(
+        mid_price=mids,
+        sides=sides,
+        spread_buffer_bps=spreads,
+        inventory_skew_bps=skew,
+        client_markup_bps=markups,
+    )
+
+    size_count = len(ladder_sizes)
+    rows: list[QuoteLadderRow] = []
+    for i, (instrument_id, symbol) in enumerate(instruments):
+        for j, (client_id, client_name, _) in enumerate(clients):
+            bid, ask = quotes[i, j].tolist()
+            rows.append(
+                QuoteLadderRow(
+                    instrument_id=instrument_id,
+                    instrument_symbol=symbol,
+                    client_id=client_id,
+                    client_name=client_name,
+                    mid=round(float(mids[i, 0, 0]), 8),
+                    desk_inventory=float(inventory[i, 0, 0]),
+                    bid=[bid] * size_count,
+                    ask=[ask] * size_count,
+                )
+            )
+
+    return QuoteLadderOut(
+        sizes=ladder_sizes,
+        spread_buffer_bps=settings.rfq_spread_buffer_bps,
+        generated_at=datetime.now(timezone.utc),
+        rows=rows,
+    )
+
+
+@router.get("/venues", response_model=list[VenueBookOut])
+async def get_venue_books(
+    instrument_ids: list[int] | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    symbols = dict((await db.execute(select(Instrument.id, Instrument.symbol))).all())
+    wanted = set(instrument_ids or ())
+    items = [
+        {
+            "instrument_id": instrument_id,
+            "instrument_symbol": symbols.get(instrument_id, str(instrument_id)),
+            "best_bid": book.best_bid,
+            "best_bid_venue": book.best_bid_venue,
+            "best_ask": book.best_ask,
+            "best_ask_venue": book.best_ask_venue,
+            "depth_weighted_mid": round(book.depth_weighted_mid, 8),
+            "venues": [
+                {
+                    "venue": quote.venue,
+                    "bid": quote.bid,
+                    "ask": quote.ask,
+                    "size": quote.size,
+                    "ts": datetime.fromtimestamp(quote.ts, timezone.utc),
+                }
+                for quote in sorted(book.quotes.values(), key=lambda quote: quote.venue)
+            ],
+        }
+        for instrument_id, book in sorted(venue_books.items())
+        if not wanted or instrument_id in wanted
     ]
+    return FastJSONResponse(items)
@@ -1,11 +1,12 @@
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.db import get_db
 from app.deps import require_roles
 from app.models import (
@@ -19,77 +20,151 @@ from app.models import (
     UserRole,
 )
 from app.schemas import RFQCreate, RFQOut
+from app.services.admission import admission
 from app.services.audit import log_event
-from app.services.pricing import calculate_quote, clamp_expiry, inventory_skew_bps
-from app.services.ws import manager
+from app.services.estimators import tick_estimators
+from app.services.idempotency import idempotency
+from app.services.events import RFQ_CHANGED, domain_events
+from app.services.pricing import (
+    calculate_quote,
+    clamp_expiry,
+    default_mid,
+    inventory_skew_bps,
+    volatility_spread_bps,
+)
+from app.services.rfq_stream import StreamedRFQ, rfq_stream_service
+from app.services.venue_book import venue_books
+from app.services.versions import (
+    delta_payload,
+    is_not_modified,
+    not_modified_response,
+    resource_versions,
+    version_headers,
+)
+from app.services.ws_outbox import ws_outbox
 
 router = APIRouter(prefix="/rfq", tags=["rfq"])
 
 
-def _default_mid(symbol: str) -> float:
-    defaults = {
-        "BTC-USD": 52000.0,
-        "ETH-USD": 2800.0,
-        "SOL-USD": 115.0,
-        "ADA-USD": 0.64,
-    }
-    return defaults.get(symbol, 1000.0)
-
-
 @router.get("", response_model=list[RFQOut])
 async def list_rfqs(
+    request: Request,
     active_only: bool = Query(default=True),
     limit: int = Query(default=200, ge=1, le=500),
+    since: int | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> list[RFQOut]:
+) -> Response:
+    version = resource_versions.current("rfqs")
+    etag = resource_versions.etag(request, "rfqs")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    changed = resource_versions.changed_since("rfqs", since) if since is not None else None
+    if changed is not None and not changed:
+        headers = version_headers(etag, version)
+        return FastJSONResponse(delta_payload(version, changed, []), headers=headers)
+
     stmt = (
-        select(RFQRequest, Client.name, Instrument.symbol)
+        select(
+            RFQRequest.id,
+            RFQRequest.client_id,
+            Client.name,
+            RFQRequest.instrument_id,
+            Instrument.symbol,
+            RFQRequest.side,
+            RFQRequest.size,
+            RFQRequest.quoted_price,
+            RFQRequest.quote_expiry,
+            RFQRequest.status,
+            RFQRequest.created_at,
+        )
         .join(Client, RFQRequest.client_id == Client.id)
         .join(Instrument, RFQRequest.instrument_id == Instrument.id)
         .order_by(RFQRequest.created_at.desc())
         .limit(limit)
     )
-    if active_only:
+    if changed is not None:
+        # Deltas include RFQs that left the active set so clients can see the status change.
+        stmt = stmt.where(RFQRequest.id.in_(list(changed)))
+    elif active_only:
         stmt = stmt.where(RFQRequest.status.in_([RFQStatus.pending, RFQStatus.quoted]))
 
     rows = (await db.execute(stmt)).all()
 
     now = datetime.now(timezone.utc)
-    changed = False
-    output: list[RFQOut] = []
-    for rfq, client_name, instrument_symbol in rows:
-        if rfq.status in {RFQStatus.pending, RFQStatus.quoted} and now > rfq.quote_expiry:
-            rfq.status = RFQStatus.expired
-            changed = True
-            await manager.broadcast(
-                "rfq_updates",
-                {
-                    "channel": "rfq_updates",
-                    "data": {"id": str(rfq.id), "status": "expired", "expired_at": now.isoformat()},
-                },
-            )
+    expired: dict[UUID, tuple[int, int]] = {}
+    output: list[dict] = []
+    for (
+        rfq_id,
+        client_id,
+        client_name,
+        instrument_id,
+        instrument_symbol,
+        side,
+        size,
+        quoted_price,
+        quote_expiry,
+        rfq_status,
+        created_at,
+    ) in rows:
+        if rfq_status in {RFQStatus.pending, RFQStatus.quoted} and now > quote_expiry:
+            rfq_status = RFQStatus.expired
+            expired[rfq_id] = (client_id, instrument_id)
 
         output.append(
-            RFQOut(
-                id=rfq.id,
-                client_id=rfq.client_id,
-                client_name=client_name,
-                instrument_id=rfq.instrument_id,
-                instrument_symbol=instrument_symbol,
-                side=rfq.side,
-                size=float(rfq.size),
-                quoted_price=float(rfq.quoted_price),
-                quote_expiry=rfq.quote_expiry,
-                status=rfq.status,
-                created_at=rfq.created_at,
-            )
+            {
+                "id": rfq_id,
+                "client_id": client_id,
+                "client_name": client_name,
+                "instrument_id": instrument_id,
+                "instrument_symbol": instrument_symbol,
+                "side": side.value,
+                "size": float(size),
+                "quoted_price": float(quoted_price),
+                "quote_expiry": quote_expiry,
+                "status": rfq_status.value,
+                "created_at": created_at,
+                "streaming": rfq_stream_service.is_streaming(rfq_id, instrument_id),
+            }
         )
 
-    if changed:
+    if expired:
+        await db.execute(
+            update(RFQRequest)
+            .where(
+                RFQRequest.id.in_(list(expired)),
+                RFQRequest.status.in_([RFQStatus.pending, RFQStatus.quoted]),
+            )
+            .values(status=RFQStatus.expired)
+        )
+        for rfq_id, (client_id, instrument_id) in expired.items():
+            ws_outbox.enqueue(
+                db,
+                "rfq_updates",
+                {
+                    "id": str(rfq_id),
+                    "client_id": client_id,
+                    "instrument_id": instrument_id,
+                    "status": "expired",
+                    "expired_at": now.isoformat(),
+                },
+            )
         await db.commit()
+        ws_outbox.notify()
+        domain_events.publish(
+            RFQ_CHANGED,
+            entity_ids=tuple(expired),
+            client_ids=tuple({client_id for client_id, _ in expired.values()}),
+            instrument_ids=tuple({instrument_id for _, instrument_id in expired.values()}),
+        )
+        version = resource_versions.current("rfqs")
+        etag = resource_versions.etag(request, "rfqs")
 
-    return output
+    headers = version_headers(etag, version)
+    if since is not None:
+        return FastJSONResponse(delta_payload(version, changed, output), headers=headers)
+    return FastJSONResponse(output, headers=headers)
 
 
 @router.post("", response_model=RFQOut)
@@ -97,7 +172,14 @@ async def create_rfq(
     payload: RFQCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.trader, UserRole.admin)),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
 ) -> RFQOut:
+    # Replays are answered before rate limiting, so retries of finished work are never refused.
+    idem = idempotency.request(current_user.id, "rfq", idempotency_key, payload)
+    replay = await idempotency.replay(db, idem)
+    if replay is not None:
+        return replay
+    admission.check("rfq", user_id=current_user.id, client_id=payload.client_id)
     client = await db.get(Client, payload.client_id)
     instrument = await db.get(Instrument, payload.instrument_id)
 
@@ -106,14 +188,18 @@ async def create_rfq(
     if instrument is None:
         raise HTTPException(status_code=404, detail="Instrument not found")
 
-    latest_price_result = await db.execute(
-        select(MarketPrice)
-        .where(MarketPrice.instrument_id == payload.instrument_id)
-        .order_by(MarketPrice.ts.desc())
-        .limit(1)
-    )
-    latest_price = latest_price_result.scalar_one_or_none()
-    mid = float(latest_price.mid) if latest_price else _default_mid(instrument.symbol)
+    book = venue_books.fresh(payload.instrument_id)
+    if book is not None:
+        mid = book.depth_weighted_mid
+    else:
+        latest_price_result = await db.execute(
+            select(MarketPrice)
+            .where(MarketPrice.instrument_id == payload.instrument_id)
+            .order_by(MarketPrice.ts.desc())
+            .limit(1)
+        )
+        latest_price = latest_price_result.scalar_one_or_none()
+        mid = float(latest_price.mid) if latest_price else default_mid(instrument.symbol)
 
     desk_inventory_result = await db.execute(
         select(func.coalesce(func.sum(Position.net_size), 0)).where(
@@ -129,10 +215,13 @@ async def create_rfq(
     )
 
     skew_bps = inventory_skew_bps(desk_inventory, payload.side)
+    spread_bps = settings.rfq_spread_buffer_bps + volatility_spread_bps(
+        tick_estimators.volatility(payload.instrument_id)
+    )
     quote = calculate_quote(
         mid_price=mid,
         side=payload.side,
-        spread_buffer_bps=10.0,
+        spread_buffer_bps=spread_bps,
         inventory_skew_bps=skew_bps,
         client_markup_bps=client.default_markup_bps,
     )
@@ -148,6 +237,8 @@ async def create_rfq(
         quoted_price=quote,
         quote_expiry=expiry_at,
         status=RFQStatus.quoted,
+        streaming=payload.stream,
+        created_at=datetime.now(timezone.utc),
     )
     db.add(rfq)
     await db.flush()
@@ -166,12 +257,11 @@ async def create_rfq(
             "quoted_price": quote,
             "expiry_seconds": expiry_seconds,
             "inventory_skew_bps": skew_bps,
+            "spread_bps": spread_bps,
+            "stream": payload.stream,
         },
     )
 
-    await db.commit()
-    await db.refresh(rfq)
-
     message = RFQOut(
         id=rfq.id,
         client_id=client.id,
@@ -184,16 +274,39 @@ async def create_rfq(
         quote_expiry=rfq.quote_expiry,
         status=rfq.status,
         created_at=rfq.created_at,
+        streaming=payload.stream,
     )
-
-    await manager.broadcast(
-        "rfq_updates",
-        {
-            "channel": "rfq_updates",
-            "data": message.model_dump(mode="json"),
-        },
+    body = message.model_dump(mode="json")
+    ws_outbox.enqueue(db, "rfq_updates", body)
+
+    replay = await idempotency.commit(db, idem, body)
+    if replay is not None:
+        return replay
+    ws_outbox.notify()
+    domain_events.publish(
+        RFQ_CHANGED,
+        entity_ids=(rfq.id,),
+        client_ids=(client.id,),
+        instrument_ids=(instrument.id,),
     )
 
+    if payload.stream:
+        rfq_stream_service.register(
+            StreamedRFQ(
+                id=rfq.id,
+                client_id=client.id,
+                client_name=client.name,
+                instrument_id=instrument.id,
+                instrument_symbol=instrument.symbol,
+                side=rfq.side,
+                size=float(rfq.size),
+                markup_bps=client.default_markup_bps,
+                quoted_price=float(rfq.quoted_price),
+                quote_expiry=rfq.quote_expiry,
+                created_at=rfq.created_at,
+            )
+        )
+
     return message
 
 
@@ -227,19 +340,25 @@ async def get_rfq_status(
             user_id=None,
             metadata={"expired_at": now.isoformat()},
         )
-        await db.commit()
-
-        await manager.broadcast(
+        ws_outbox.enqueue(
+            db,
             "rfq_updates",
             {
-                "channel": "rfq_updates",
-                "data": {
-                    "id": str(rfq.id),
-                    "status": rfq.status.value,
-                    "expired_at": now.isoformat(),
-                },
+                "id": str(rfq.id),
+                "client_id": rfq.client_id,
+                "instrument_id": rfq.instrument_id,
+                "status": rfq.status.value,
+                "expired_at": now.isoformat(),
             },
         )
+        await db.commit()
+        ws_outbox.notify()
+        domain_events.publish(
+            RFQ_CHANGED,
+            entity_ids=(rfq.id,),
+            client_ids=(rfq.client_id,),
+            instrument_ids=(rfq.instrument_id,),
+        )
 
     return RFQOut(
         id=rfq.id,
@@ -253,4 +372,5 @@ async def get_rfq_status(
         quote_expiry=rfq.quote_expiry,
         status=rfq.status,
         created_at=rfq.created_at,
+        streaming=rfq_stream_service.is_streaming(rfq.id, rfq.instrument_id),
     )
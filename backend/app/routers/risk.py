@@ -0,0 +1,66 @@
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse, dumps
+from app.db import get_db
+from app.deps import require_roles
+from app.models import User, UserRole
+from app.schemas import ScenarioRunOut, ScenarioRunRequest, VaROut
+from app.services.cache import cached_response
+from app.services.scenarios import ScenarioShocks, scenario_engine
+from app.services.var import var_service
+
+router = APIRouter(prefix="/risk", tags=["risk"])
+
+MAX_SCENARIO_CELLS = 5_000_000
+
+
+@router.post("/scenarios", response_model=ScenarioRunOut)
+async def run_scenarios(
+    payload: ScenarioRunRequest,
+    request: Request,
+    _: User = Depends(require_roles(UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    book = scenario_engine.book()
+    if len(payload.scenarios) * len(book.market_value) > MAX_SCENARIO_CELLS:
+        raise HTTPException(status_code=400, detail="Scenario grid too large")
+
+    # Results are keyed by the position snapshot they were computed on; the tags drop them as
+    # soon as a fill, limit change or tick makes that snapshot stale.
+    digest = hashlib.sha256(dumps(payload.model_dump())).hexdigest()
+    key = f"risk:scenarios:{book.key[0]}-{book.key[1]}:{digest}"
+    tags = [
+        "positions",
+        "limits",
+        *(f"instrument:{instrument_id}" for instrument_id in book.instrument_axis.tolist()),
+    ]
+
+    async def build() -> Response:
+        scenarios = [
+            ScenarioShocks(
+                name=scenario.name,
+                default_shock=scenario.default_shock,
+                shocks=scenario.shocks,
+            )
+            for scenario in payload.scenarios
+        ]
+        return FastJSONResponse(scenario_engine.run(book, scenarios, payload.max_breaches))
+
+    return await cached_response(request, tags, build, key=key)
+
+
+@router.get("/var", response_model=VaROut)
+async def get_var(
+    bucket_seconds: int = Query(default=settings.var_bucket_seconds, ge=1, le=86_400),
+    window: int = Query(default=settings.var_window, ge=20, le=20_000),
+    confidence: float = Query(default=settings.var_confidence, gt=0.5, lt=1),
+    db: AsyncSession = Depends(get_db),
+    _: User = Depends(require_roles(UserRole.trader, UserRole.risk, UserRole.admin)),
+) -> Response:
+    result = await var_service.compute(
+        db, bucket_seconds=bucket_seconds, window=window, confidence=confidence
+    )
+    return FastJSONResponse(result)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+
+from app.deps import require_roles
+from app.models import User, UserRole
+from app.services.admission import admission
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/admission")
+async def admission_metrics(_: User = Depends(require_roles(UserRole.admin))) -> dict:
+    return admission.metrics()
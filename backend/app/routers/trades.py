@@ -1,17 +1,19 @@
 import csv
+import math
 from datetime import datetime, timezone
 from io import StringIO
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy import and_, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db import get_db, get_read_db, get_versioned_read_db
 from app.deps import require_roles
 from app.models import (
     Client,
     Instrument,
-    Position,
     RFQRequest,
     RFQStatus,
     Trade,
@@ -19,13 +21,29 @@ from app.models import (
     User,
     UserRole,
 )
-from app.schemas import TradeCreate, TradeOut, TradesPage
+from app.schemas import RiskCheckResult, TradeCreate, TradeOut, TradesPage
+from app.services.admission import admission
 from app.services.audit import log_event
-from app.services.risk import apply_trade_to_positions, evaluate_trade_risk
-from app.services.ws import manager
+from app.services.events import RFQ_CHANGED, TRADE_BOOKED, domain_events
+from app.services.idempotency import idempotency
+from app.services.mtm import mtm_engine
+from app.services.rfq_stream import rfq_stream_service
+from app.services.risk_engine import risk_engine
+from app.services.versions import (
+    delta_payload,
+    is_not_modified,
+    not_modified_response,
+    resource_versions,
+    version_headers,
+)
+from app.services.ws_outbox import ws_outbox
 
 router = APIRouter(prefix="/trades", tags=["trades"])
 
+trades_read_db = get_versioned_read_db(
+    lambda: resource_versions.changed_within("trades", settings.read_replica_max_lag_seconds)
+)
+
 
 def _build_filters(
     client_id: int | None,
@@ -48,12 +66,30 @@ def _build_filters(
     return filters
 
 
+def _reject_hard_breach(risk_check: RiskCheckResult) -> None:
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "message": risk_check.message,
+            "projected_exposure_usd": risk_check.projected_exposure_usd,
+            "hard_limit_usd": risk_check.hard_limit_usd,
+        },
+    )
+
+
 @router.post("", response_model=TradeOut)
 async def create_trade(
     payload: TradeCreate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.trader, UserRole.admin)),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
 ) -> TradeOut:
+    # Replays are answered before rate limiting, so retries of finished work are never refused.
+    idem = idempotency.request(current_user.id, "trades", idempotency_key, payload)
+    replay = await idempotency.replay(db, idem)
+    if replay is not None:
+        return replay
+    admission.check("trade", user_id=current_user.id, client_id=payload.client_id)
     client = await db.get(Client, payload.client_id)
     instrument = await db.get(Instrument, payload.instrument_id)
     if client is None:
@@ -62,128 +98,174 @@ async def create_trade(
         raise HTTPException(status_code=404, detail="Instrument not found")
 
     if payload.rfq_id:
-        rfq = await db.get(RFQRequest, payload.rfq_id)
+        # The row lock orders this accept against streamed requotes and concurrent accepts.
+        rfq = await db.get(RFQRequest, payload.rfq_id, with_for_update=True)
         if rfq is None:
             raise HTTPException(status_code=404, detail="RFQ not found")
         if rfq.status != RFQStatus.quoted:
+            # A retry that overlapped its original finds the RFQ already accepted by it.
+            replay = await idempotency.replay(db, idem)
+            if replay is not None:
+                return replay
             raise HTTPException(status_code=400, detail="RFQ is not quote-active")
         if rfq.quote_expiry < datetime.now(timezone.utc):
             rfq.status = RFQStatus.expired
             await db.commit()
+            domain_events.publish(
+                RFQ_CHANGED,
+                entity_ids=(rfq.id,),
+                client_ids=(rfq.client_id,),
+                instrument_ids=(rfq.instrument_id,),
+            )
             raise HTTPException(status_code=400, detail="RFQ expired")
+        if (
+            rfq.client_id != payload.client_id
+            or rfq.instrument_id != payload.instrument_id
+            or rfq.side != payload.side
+            or not math.isclose(float(rfq.size), payload.size, rel_tol=1e-9, abs_tol=1e-8)
+        ):
+            raise HTTPException(status_code=400, detail="Trade does not match the RFQ")
+        # Streamed RFQs are requoted on every tick; only the quote currently on the RFQ is
+        # executable.
+        quoted_price = float(rfq.quoted_price)
+        if round(payload.price, 2) != round(quoted_price, 2):
+            raise HTTPException(
+                status_code=409,
+                detail=f"RFQ quote moved to {quoted_price:.2f}; execute at the current quote",
+            )
         rfq.status = RFQStatus.accepted
 
-    risk_check = await evaluate_trade_risk(
-        db,
-        client_id=payload.client_id,
-        instrument_id=payload.instrument_id,
-        side=payload.side,
-        size=payload.size,
-        price=payload.price,
-    )
-
-    if risk_check.hard_breach:
-        raise HTTPException(
-            status_code=409,
-            detail={
-                "message": risk_check.message,
-                "projected_exposure_usd": risk_check.projected_exposure_usd,
-                "hard_limit_usd": risk_check.hard_limit_usd,
-            },
+    async with risk_engine.lock(payload.client_id, payload.instrument_id):
+        # The pre-trade check is answered from memory; the only position round trip is the
+        # fill upsert below.
+        risk_check = risk_engine.check(
+            client_id=payload.client_id,
+            instrument_id=payload.instrument_id,
+            side=payload.side,
+            size=payload.size,
+            price=payload.price,
+        )
+        if risk_check.hard_breach:
+            _reject_hard_breach(risk_check)
+
+        notional = abs(payload.size * payload.price)
+        trade = Trade(
+            rfq_id=payload.rfq_id,
+            client_id=payload.client_id,
+            instrument_id=payload.instrument_id,
+            side=payload.side,
+            size=payload.size,
+            price=payload.price,
+            notional_usd=notional,
+            executed_by_user_id=current_user.id,
+            timestamp=datetime.now(timezone.utc),
         )
 
-    notional = abs(payload.size * payload.price)
-    trade = Trade(
-        rfq_id=payload.rfq_id,
-        client_id=payload.client_id,
-        instrument_id=payload.instrument_id,
-        side=payload.side,
-        size=payload.size,
-        price=payload.price,
-        notional_usd=notional,
-        executed_by_user_id=current_user.id,
-    )
-
-    db.add(trade)
-    await db.flush()
-
-    position = await apply_trade_to_positions(
-        db,
-        client_id=payload.client_id,
-        instrument_id=payload.instrument_id,
-        side=payload.side,
-        size=payload.size,
-        price=payload.price,
-    )
+        db.add(trade)
+        await db.flush()
 
-    await log_event(
-        db,
-        event_type="trade.executed",
-        entity_type="trade",
-        entity_id=str(trade.id),
-        user_id=current_user.id,
-        metadata={
-            "client_id": payload.client_id,
-            "instrument_id": payload.instrument_id,
-            "side": payload.side.value,
-            "size": payload.size,
-            "price": payload.price,
-            "notional_usd": notional,
-            "risk_soft_breach": risk_check.soft_breach,
-        },
-    )
+        position = await risk_engine.write_fill(
+            db,
+            client_id=payload.client_id,
+            instrument_id=payload.instrument_id,
+            side=payload.side,
+            size=payload.size,
+            price=payload.price,
+        )
+        # The upsert returns the stored position, including fills booked by other workers since
+        # this process last saw it; a breach against it rolls the whole booking back.
+        risk_check = risk_engine.assess(
+            client_id=payload.client_id,
+            instrument_id=payload.instrument_id,
+            net_size=position.net_size,
+            price=payload.price,
+        )
+        if risk_check.hard_breach:
+            _reject_hard_breach(risk_check)
 
-    if risk_check.soft_breach:
         await log_event(
             db,
-            event_type="risk.soft_breach",
+            event_type="trade.executed",
             entity_type="trade",
             entity_id=str(trade.id),
             user_id=current_user.id,
             metadata={
-                "projected_exposure_usd": risk_check.projected_exposure_usd,
-                "soft_limit_usd": risk_check.soft_limit_usd,
+                "client_id": payload.client_id,
+                "instrument_id": payload.instrument_id,
+                "side": payload.side.value,
+                "size": payload.size,
+                "price": payload.price,
+                "notional_usd": notional,
+                "risk_soft_breach": risk_check.soft_breach,
             },
         )
 
-    await db.commit()
-    await db.refresh(trade)
-    await db.refresh(position)
-
-    out = TradeOut(
-        id=trade.id,
-        client_id=client.id,
-        client_name=client.name,
-        instrument_id=instrument.id,
-        instrument_symbol=instrument.symbol,
-        side=trade.side,
-        size=float(trade.size),
-        price=float(trade.price),
-        notional_usd=float(trade.notional_usd),
-        timestamp=trade.timestamp,
-    )
-
-    await manager.broadcast(
-        "trade_updates",
-        {
-            "channel": "trade_updates",
-            "data": out.model_dump(mode="json"),
-        },
-    )
-
-    await manager.broadcast(
-        "positions",
-        {
-            "channel": "positions",
-            "data": {
+        if risk_check.soft_breach:
+            await log_event(
+                db,
+                event_type="risk.soft_breach",
+                entity_type="trade",
+                entity_id=str(trade.id),
+                user_id=current_user.id,
+                metadata={
+                    "projected_exposure_usd": risk_check.projected_exposure_usd,
+                    "soft_limit_usd": risk_check.soft_limit_usd,
+                },
+            )
+
+        out = TradeOut(
+            id=trade.id,
+            client_id=client.id,
+            client_name=client.name,
+            instrument_id=instrument.id,
+            instrument_symbol=instrument.symbol,
+            side=trade.side,
+            size=float(trade.size),
+            price=float(trade.price),
+            notional_usd=float(trade.notional_usd),
+            timestamp=trade.timestamp,
+        )
+        body = out.model_dump(mode="json")
+        mark_price = mtm_engine.mark(position.instrument_id) or position.avg_price
+        ws_outbox.enqueue(db, "trade_updates", body)
+        ws_outbox.enqueue(
+            db,
+            "positions",
+            {
                 "client_id": position.client_id,
                 "instrument_id": position.instrument_id,
-                "net_size": float(position.net_size),
-                "avg_price": float(position.avg_price),
-                "usd_exposure": float(position.usd_exposure),
+                "net_size": position.net_size,
+                "avg_price": position.avg_price,
+                "usd_exposure": round(abs(position.net_size * mark_price), 2),
+                "mark_price": mark_price,
+                "unrealized_pnl": round((mark_price - position.avg_price) * position.net_size, 2),
                 "soft_breach": risk_check.soft_breach,
             },
-        },
+        )
+
+        replay = await idempotency.commit(db, idem, body)
+        if replay is not None:
+            return replay
+        risk_engine.commit_fill(position)
+
+    ws_outbox.notify()
+    mtm_engine.apply_fill(
+        position.client_id, position.instrument_id, position.net_size, position.avg_price
+    )
+
+    if payload.rfq_id:
+        rfq_stream_service.discard(payload.rfq_id, payload.instrument_id)
+        domain_events.publish(
+            RFQ_CHANGED,
+            entity_ids=(payload.rfq_id,),
+            client_ids=(payload.client_id,),
+            instrument_ids=(payload.instrument_id,),
+        )
+    domain_events.publish(
+        TRADE_BOOKED,
+        entity_ids=(trade.id,),
+        client_ids=(position.client_id,),
+        instrument_ids=(position.instrument_id,),
     )
 
     return out
@@ -191,6 +273,7 @@ async def create_trade(
 
 @router.get("", response_model=TradesPage)
 async def list_trades(
+    request: Request,
     client_id: int | None = Query(default=None),
     instrument_id: int | None = Query(default=None),
     side: TradeSide | None = Query(default=None),
@@ -198,45 +281,87 @@ async def list_trades(
     end: datetime | None = Query(default=None),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=500),
-    db: AsyncSession = Depends(get_db),
+    since: int | None = Query(default=None),
+    db: AsyncSession = Depends(trades_read_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
-) -> TradesPage:
+) -> Response:
+    version = resource_versions.current("trades")
+    etag = resource_versions.etag(request, "trades")
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, version)
+
+    changed = resource_versions.changed_since("trades", since) if since is not None else None
+    if changed is not None and not changed:
+        headers = version_headers(etag, version)
+        return FastJSONResponse(delta_payload(version, changed, []), headers=headers)
+
     filters = _build_filters(client_id, instrument_id, side, start, end)
 
-    count_stmt = select(func.count()).select_from(Trade)
-    if filters:
-        count_stmt = count_stmt.where(and_(*filters))
-    total = int((await db.execute(count_stmt)).scalar_one())
+    if changed is not None:
+        filters.append(Trade.id.in_(list(changed)))
+    else:
+        count_stmt = select(func.count()).select_from(Trade)
+        if filters:
+            count_stmt = count_stmt.where(and_(*filters))
+        total = int((await db.execute(count_stmt)).scalar_one())
 
     stmt = (
-        select(Trade, Client.name, Instrument.symbol)
+        select(
+            Trade.id,
+            Trade.client_id,
+            Client.name,
+            Trade.instrument_id,
+            Instrument.symbol,
+            Trade.side,
+            Trade.size,
+            Trade.price,
+            Trade.notional_usd,
+            Trade.timestamp,
+        )
         .join(Client, Trade.client_id == Client.id)
         .join(Instrument, Trade.instrument_id == Instrument.id)
         .order_by(desc(Trade.timestamp))
-        .offset((page - 1) * page_size)
         .limit(page_size)
     )
+    if changed is None:
+        stmt = stmt.offset((page - 1) * page_size)
     if filters:
         stmt = stmt.where(and_(*filters))
 
     rows = (await db.execute(stmt)).all()
     items = [
-        TradeOut(
-            id=trade.id,
-            client_id=trade.client_id,
-            client_name=client_name,
-            instrument_id=trade.instrument_id,
-            instrument_symbol=instrument_symbol,
-            side=trade.side,
-            size=float(trade.size),
-            price=float(trade.price),
-            notional_usd=float(trade.notional_usd),
-            timestamp=trade.timestamp,
-        )
-        for trade, client_name, instrument_symbol in rows
+        {
+            "id": trade_id,
+            "client_id": trade_client_id,
+            "client_name": client_name,
+            "instrument_id": trade_instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "side": trade_side.value,
+            "size": float(size),
+            "price": float(price),
+            "notional_usd": float(notional_usd),
+            "timestamp": timestamp,
+        }
+        for (
+            trade_id,
+            trade_client_id,
+            client_name,
+            trade_instrument_id,
+            instrument_symbol,
+            trade_side,
+            size,
+            price,
+            notional_usd,
+            timestamp,
+        ) in rows
     ]
 
-    return TradesPage(items=items, page=page, page_size=page_size, total=total)
+    headers = version_headers(etag, version)
+    if since is not None:
+        return FastJSONResponse(delta_payload(version, changed, items), headers=headers)
+    return FastJSONResponse(
+        {"items": items, "page": page, "page_size": page_size, "total": total}, headers=headers
+    )
 
 
 @router.get("/export.csv")
@@ -246,7 +371,7 @@ async def export_trades_csv(
     side: TradeSide | None = Query(default=None),
     start: datetime | None = Query(default=None),
     end: datetime | None = Query(default=None),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     _: User = Depends(require_roles(UserRole.viewer, UserRole.trader, UserRole.risk, UserRole.admin)),
 ) -> Response:
     filters = _build_filters(client_id, instrument_id, side, start, end)
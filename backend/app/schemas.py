@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Annotated
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -32,6 +33,7 @@ class RFQCreate(BaseModel):
     side: TradeSide
     size: float = Field(gt=0)
     expiry_seconds: int = Field(default=20, ge=10, le=60)
+    stream: bool = False
 
 
 class RFQOut(BaseModel):
@@ -46,6 +48,7 @@ class RFQOut(BaseModel):
     quote_expiry: datetime
     status: RFQStatus
     created_at: datetime
+    streaming: bool = False
 
 
 class TradeCreate(BaseModel):
@@ -89,6 +92,43 @@ class MarketPriceOut(BaseModel):
     ts: datetime
 
 
+class QuoteLadderRow(BaseModel):
+    instrument_id: int
+    instrument_symbol: str
+    client_id: int
+    client_name: str
+    mid: float
+    desk_inventory: float
+    bid: list[float]
+    ask: list[float]
+
+
+class QuoteLadderOut(BaseModel):
+    sizes: list[float]
+    spread_buffer_bps: float
+    generated_at: datetime
+    rows: list[QuoteLadderRow]
+
+
+class VenueQuoteOut(BaseModel):
+    venue: str
+    bid: float
+    ask: float
+    size: float
+    ts: datetime
+
+
+class VenueBookOut(BaseModel):
+    instrument_id: int
+    instrument_symbol: str
+    best_bid: float
+    best_bid_venue: str | None
+    best_ask: float
+    best_ask_venue: str | None
+    depth_weighted_mid: float
+    venues: list[VenueQuoteOut]
+
+
 class PositionOut(BaseModel):
     client_id: int
     client_name: str
@@ -100,6 +140,86 @@ class PositionOut(BaseModel):
     updated_at: datetime
 
 
+class ExposureMatrixOut(BaseModel):
+    version: int
+    client_ids: list[int]
+    client_names: list[str]
+    instrument_ids: list[int]
+    instrument_symbols: list[str]
+    exposure_usd: list[int]
+    utilization: list[float]
+    max_exposure_usd: float
+    folded_clients: int
+    folded_instruments: int
+
+
+class ScenarioIn(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    default_shock: float = Field(default=0.0, ge=-1)
+    shocks: dict[int, Annotated[float, Field(ge=-1)]] = Field(default_factory=dict)
+
+
+class ScenarioRunRequest(BaseModel):
+    scenarios: list[ScenarioIn] = Field(min_length=1, max_length=2000)
+    max_breaches: int = Field(default=100, ge=0, le=10_000)
+
+
+class ScenarioBreachOut(BaseModel):
+    client_id: int
+    instrument_id: int
+    shocked_exposure_usd: float
+    soft_limit_usd: float
+    hard_limit_usd: float
+    severity: str
+
+
+class ScenarioResultOut(BaseModel):
+    name: str
+    total_pnl_usd: float
+    pnl_by_client_usd: list[float]
+    pnl_by_instrument_usd: list[float]
+    hard_breaches: int
+    soft_breaches: int
+    breaches: list[ScenarioBreachOut]
+
+
+class ScenarioRunOut(BaseModel):
+    snapshot: str
+    client_ids: list[int]
+    instrument_ids: list[int]
+    scenarios: list[ScenarioResultOut]
+
+
+class VaROut(BaseModel):
+    bucket_seconds: int
+    window: int
+    observations: int
+    confidence: float
+    as_of: datetime
+    desk_var_usd: float
+    desk_es_usd: float
+    client_ids: list[int]
+    client_var_usd: list[float]
+    client_es_usd: list[float]
+    uncovered_instrument_ids: list[int]
+
+
+class AuditLogOut(BaseModel):
+    id: int
+    event_type: str
+    entity_type: str
+    entity_id: str
+    user_id: int | None
+    metadata: dict
+    immutable_hash: str
+    created_at: datetime
+
+
+class AuditPage(BaseModel):
+    items: list[AuditLogOut]
+    next_cursor: str | None
+
+
 class ClientAnalyticsOut(BaseModel):
     client_id: int
     client_name: str
@@ -123,6 +243,12 @@ class RiskLimitOut(BaseModel):
     active: bool
 
 
+class RiskLimitUpdate(BaseModel):
+    soft_limit_usd: float | None = Field(default=None, gt=0)
+    hard_limit_usd: float | None = Field(default=None, gt=0)
+    active: bool | None = None
+
+
 class RiskOverrideRequest(BaseModel):
     client_id: int
     instrument_id: int
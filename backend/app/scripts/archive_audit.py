@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.responses import dumps
+from app.db import AsyncSessionLocal
+from app.models import AuditArchiveCheckpoint, AuditLog
+from app.services.audit import GENESIS_HASH, chain_hash
+
+FETCH_BATCH_SIZE = 5_000
+
+
+class ChainBroken(Exception):
+    pass
+
+
+async def _chain_anchor(db: AsyncSession) -> tuple[int, str]:
+    row = (
+        await db.execute(
+            select(AuditArchiveCheckpoint.last_id, AuditArchiveCheckpoint.last_hash)
+            .order_by(AuditArchiveCheckpoint.last_id.desc())
+            .limit(1)
+        )
+    ).first()
+    return (row[0], row[1]) if row else (0, GENESIS_HASH)
+
+
+async def _archive_boundary(db: AsyncSession, cutoff: datetime) -> int | None:
+    # Only a contiguous id prefix is archived, so the rows left behind still chain from the
+    # last checkpoint; a single recent row stops the prefix there.
+    first_recent = (
+        await db.execute(select(func.min(AuditLog.id)).where(AuditLog.created_at >= cutoff))
+    ).scalar_one_or_none()
+    if first_recent is not None:
+        return first_recent - 1
+    return (await db.execute(select(func.max(AuditLog.id)))).scalar_one_or_none()
+
+
+async def _write_segment(
+    db: AsyncSession, output_dir: Path, after_id: int, previous_hash: str, boundary: int, rows_per_file: int
+) -> AuditArchiveCheckpoint | None:
+    tmp_path = output_dir / f".audit_{after_id + 1:012d}.jsonl.gz.tmp"
+    first_id: int | None = None
+    last_id = after_id
+    last_hash = previous_hash
+    count = 0
+
+    try:
+        with tmp_path.open("wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as handle:
+            handle.write(dumps({"format": "audit_logs.v1", "previous_hash": previous_hash}) + b"\n")
+            while count < rows_per_file:
+                stmt = (
+                    select(AuditLog)
+                    .where(AuditLog.id > last_id, AuditLog.id <= boundary)
+                    .order_by(AuditLog.id)
+                    .limit(min(FETCH_BATCH_SIZE, rows_per_file - count))
+                )
+                batch = (await db.execute(stmt)).scalars().all()
+                if not batch:
+                    break
+                for log in batch:
+                    expected = chain_hash(
+                        event_type=log.event_type,
+                        entity_type=log.entity_type,
+                        entity_id=log.entity_id,
+                        user_id=log.user_id,
+                        metadata=log.metadata_json,
+                        previous_hash=last_hash,
+                    )
+                    if expected != log.immutable_hash:
+                        raise ChainBroken(f"audit_logs row {log.id} does not chain from its predecessor")
+                    handle.write(
+                        dumps(
+                            {
+                                "id": log.id,
+                                "event_type": log.event_type,
+                                "entity_type": log.entity_type,
+                                "entity_id": log.entity_id,
+                                "user_id": log.user_id,
+                                "metadata": log.metadata_json,
+                                "immutable_hash": log.immutable_hash,
+                                "created_at": log.created_at,
+                            }
+                        )
+                        + b"\n"
+                    )
+                    first_id = log.id if first_id is None else first_id
+                    last_id, last_hash = log.id, log.immutable_hash
+                    count += 1
+                db.expunge_all()
+            handle.write(dumps({"last_id": last_id, "last_hash": last_hash, "rows": count}) + b"\n")
+            handle.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if first_id is None:
+        tmp_path.unlink()
+        return None
+
+    path = output_dir / f"audit_{first_id:012d}_{last_id:012d}.jsonl.gz"
+    os.replace(tmp_path, path)
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+
+    return AuditArchiveCheckpoint(
+        first_id=first_id,
+        last_id=last_id,
+        row_count=count,
+        previous_hash=previous_hash,
+        last_hash=last_hash,
+        file_path=str(path),
+        file_sha256=digest.hexdigest(),
+    )
+
+
+async def archive_audit(output_dir: Path, older_than: timedelta, rows_per_file: int) -> int:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    cutoff = datetime.now(timezone.utc) - older_than
+    archived = 0
+
+    async with AsyncSessionLocal() as db:
+        boundary = await _archive_boundary(db, cutoff)
+        if boundary is None:
+            return 0
+
+        while True:
+            after_id, previous_hash = await _chain_anchor(db)
+            if after_id >= boundary:
+                break
+            checkpoint = await _write_segment(
+                db, output_dir, after_id, previous_hash, boundary, rows_per_file
+            )
+            await db.rollback()
+            if checkpoint is None:
+                break
+
+            # The file is durable before its rows are deleted; the checkpoint and the delete
+            # commit together, so a crash leaves either both or neither.
+            db.add(checkpoint)
+            await db.execute(
+                delete(AuditLog).where(
+                    AuditLog.id >= checkpoint.first_id, AuditLog.id <= checkpoint.last_id
+                )
+            )
+            await db.commit()
+            archived += checkpoint.row_count
+            print(f"Archived {checkpoint.row_count} rows to {checkpoint.file_path}")
+
+    return archived
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Move aged audit_logs rows to compressed, hash-chained archive files"
+    )
+    parser.add_argument("--output-dir", type=Path, default=Path("audit_archive"))
+    parser.add_argument("--older-than-days", type=float, default=90.0)
+    parser.add_argument("--rows-per-file", type=int, default=250_000)
+    args = parser.parse_args()
+
+    try:
+        count = asyncio.run(
+            archive_audit(args.output_dir, timedelta(days=args.older_than_days), args.rows_per_file)
+        )
+    except ChainBroken as exc:
+        raise SystemExit(f"Archival stopped, nothing deleted for the failing segment: {exc}") from exc
+    print(f"Archived {count} audit rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import itertools
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import Float, case, cast, func, select
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import Client, MarketPrice, Trade, TradeSide
+from app.services.backtest import QuoteParams, TickHistory, TradeTape, run_backtest
+
+
+def _float_list(raw: str) -> list[float]:
+    return [float(item) for item in raw.split(",") if item.strip()]
+
+
+async def load_history(
+    start: datetime | None, end: datetime | None, instrument_id: int | None
+) -> tuple[TickHistory, TradeTape]:
+    tick_stmt = select(
+        MarketPrice.instrument_id,
+        cast(func.extract("epoch", MarketPrice.ts), Float),
+        cast(MarketPrice.mid, Float),
+    )
+    trade_stmt = select(
+        Trade.instrument_id,
+        cast(func.extract("epoch", Trade.timestamp), Float),
+        case((Trade.side == TradeSide.buy, 1), else_=-1),
+        cast(Trade.size, Float),
+        cast(Trade.price, Float),
+        Client.default_markup_bps,
+    ).join(Client, Trade.client_id == Client.id)
+
+    if start is not None:
+        tick_stmt = tick_stmt.where(MarketPrice.ts >= start)
+        trade_stmt = trade_stmt.where(Trade.timestamp >= start)
+    if end is not None:
+        tick_stmt = tick_stmt.where(MarketPrice.ts <= end)
+        trade_stmt = trade_stmt.where(Trade.timestamp <= end)
+    if instrument_id is not None:
+        tick_stmt = tick_stmt.where(MarketPrice.instrument_id == instrument_id)
+        trade_stmt = trade_stmt.where(Trade.instrument_id == instrument_id)
+
+    async with AsyncSessionLocal() as db:
+        tick_rows = (await db.execute(tick_stmt)).all()
+        trade_rows = (await db.execute(trade_stmt)).all()
+
+    tick_array = np.fromiter(
+        itertools.chain.from_iterable(tick_rows), dtype=np.float64, count=len(tick_rows) * 3
+    ).reshape(-1, 3)
+    trade_array = np.fromiter(
+        itertools.chain.from_iterable(trade_rows), dtype=np.float64, count=len(trade_rows) * 6
+    ).reshape(-1, 6)
+
+    ticks = TickHistory(
+        instrument_ids=tick_array[:, 0].astype(np.int64),
+        ts=tick_array[:, 1],
+        mid=tick_array[:, 2],
+    )
+    tape = TradeTape(
+        instrument_ids=trade_array[:, 0].astype(np.int64),
+        ts=trade_array[:, 1],
+        sides=trade_array[:, 2],
+        sizes=trade_array[:, 3],
+        prices=trade_array[:, 4],
+        markup_bps=trade_array[:, 5],
+    )
+    return ticks, tape
+
+
+async def backtest_quotes(args: argparse.Namespace) -> None:
+    load_started = time.perf_counter()
+    ticks, tape = await load_history(args.start, args.end, args.instrument_id)
+    load_seconds = time.perf_counter() - load_started
+
+    grid = [
+        QuoteParams(spread_buffer_bps=spread, skew_threshold=threshold, max_skew_bps=max_skew)
+        for spread, threshold, max_skew in itertools.product(
+            args.spread_buffers, args.skew_thresholds, args.max_skews
+        )
+    ]
+
+    run_started = time.perf_counter()
+    results = run_backtest(ticks, tape, grid, reference_markup_bps=args.reference_markup_bps)
+    run_seconds = time.perf_counter() - run_started
+
+    print(
+        f"{ticks.ts.size} ticks, {tape.ts.size} trades, {len(grid)} parameter sets "
+        f"(load {load_seconds:.2f}s, backtest {run_seconds:.2f}s)"
+    )
+    print(
+        f"{'spread':>8} {'thresh':>8} {'maxskew':>8} {'hits':>7} {'hit%':>7} "
+        f"{'capt_bps':>9} {'capt_usd':>14} {'quoted_bps':>11}"
+    )
+    for result in results:
+        params = result.params
+        print(
+            f"{params.spread_buffer_bps:>8.2f} {params.skew_threshold:>8.1f} "
+            f"{params.max_skew_bps:>8.2f} {result.hits:>7} {result.hit_rate * 100:>6.1f}% "
+            f"{result.avg_spread_capture_bps:>9.2f} {result.spread_capture_usd:>14,.2f} "
+            f"{result.avg_quoted_spread_bps:>11.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay market_prices and the trade tape through the quoting model"
+    )
+    parser.add_argument(
+        "--spread-buffers", type=_float_list, default=[settings.rfq_spread_buffer_bps]
+    )
+    parser.add_argument(
+        "--skew-thresholds", type=_float_list, default=[settings.inventory_skew_threshold]
+    )
+    parser.add_argument("--max-skews", type=_float_list, default=[settings.inventory_max_skew_bps])
+    parser.add_argument("--reference-markup-bps", type=float, default=0.0)
+    parser.add_argument("--instrument-id", type=int, default=None)
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    asyncio.run(backtest_quotes(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.db import AsyncSessionLocal
+from app.models import Instrument, MarketPrice
+from app.services.feeds import FeedTick, TickFileWriter
+
+EXPORT_BATCH_SIZE = 10_000
+
+
+async def export_ticks(path: Path, start: datetime | None, end: datetime | None) -> int:
+    stmt = (
+        select(
+            MarketPrice.ts,
+            Instrument.symbol,
+            MarketPrice.exchange,
+            MarketPrice.bid,
+            MarketPrice.ask,
+        )
+        .join(Instrument, MarketPrice.instrument_id == Instrument.id)
+        .order_by(MarketPrice.ts, MarketPrice.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if start is not None:
+        stmt = stmt.where(MarketPrice.ts >= start)
+    if end is not None:
+        stmt = stmt.where(MarketPrice.ts <= end)
+
+    # market_prices keeps no tick sizes, so the file is written without them rather than with
+    # zeros that read as real sizes.
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        with TickFileWriter(path, sized=False) as writer:
+            async for rows in result.partitions():
+                writer.write(
+                    FeedTick(
+                        symbol=symbol,
+                        exchange=exchange,
+                        bid=float(bid),
+                        ask=float(ask),
+                        size=0.0,
+                        ts=ts,
+                    )
+                    for ts, symbol, exchange, bid, ask in rows
+                )
+    return writer.count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record market_prices history to a replay tick file")
+    parser.add_argument("path", type=Path, help="Output file (.csv for CSV, anything else for binary)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    count = asyncio.run(export_ticks(args.path, args.start, args.end))
+    print(f"Wrote {count} ticks to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import asyncpg
+import numpy as np
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal, init_db
+from app.models import Client, Instrument, User, UserRole
+from app.seed import ensure_seed_data
+from app.services.pricing import default_mid
+
+CHUNK_SIZE = 50_000
+EXCHANGES = ["coinbase", "kraken", "binance", "bitstamp"]
+EXCHANGE_WEIGHTS = [0.35, 0.2, 0.35, 0.1]
+GENERATED_TABLES = [
+    "audit_logs",
+    "audit_outbox",
+    "audit_archive_checkpoints",
+    "positions",
+    "trades",
+    "rfq_requests",
+    "market_prices",
+]
+# Anchor for generated timestamps, so the same --seed always yields the same rows.
+DEFAULT_START = "2026-01-01T00:00:00+00:00"
+CLIENT_TIERS = ["platinum", "gold", "silver", "bronze"]
+
+# Annualised volatility per instrument; anything unknown trades like a mid-cap alt.
+ANNUAL_VOL = {"BTC-USD": 0.55, "ETH-USD": 0.7, "SOL-USD": 1.0, "ADA-USD": 0.9}
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def _asyncpg_dsn() -> str:
+    return settings.database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def _timestamps(epoch_seconds: np.ndarray) -> list[datetime]:
+    return [datetime.fromtimestamp(value, timezone.utc) for value in epoch_seconds.tolist()]
+
+
+def _numeric(values: np.ndarray) -> list[str]:
+    # NUMERIC columns get decimal strings; asyncpg would expand floats to their full binary value.
+    return np.round(values, 8).astype(str).tolist()
+
+
+def _uuids(rng: np.random.Generator, count: int) -> list[uuid.UUID]:
+    raw = rng.bytes(16 * count)
+    return [
+        uuid.UUID(bytes=raw[offset : offset + 16], version=4) for offset in range(0, 16 * count, 16)
+    ]
+
+
+def _utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _chunks(count: int) -> Iterator[tuple[int, int]]:
+    for start in range(0, count, CHUNK_SIZE):
+        yield start, min(start + CHUNK_SIZE, count)
+
+
+class BenchData:
+    def __init__(
+        self,
+        *,
+        seed: int,
+        client_ids: list[int],
+        instruments: list[tuple[int, str]],
+        user_id: int,
+        start: datetime,
+        days: float,
+        ticks_per_instrument: int,
+        trades: int,
+        rejected_rfqs: int,
+    ) -> None:
+        self.seed = seed
+        self.client_ids = np.array(client_ids)
+        self.instrument_ids = np.array([instrument_id for instrument_id, _ in instruments])
+        self.symbols = [symbol for _, symbol in instruments]
+        self.user_id = user_id
+        self.start = start.timestamp()
+        self.span = days * 24 * 3600
+        self.ticks_per_instrument = ticks_per_instrument
+        self.trades = trades
+        self.rejected_rfqs = rejected_rfqs
+
+        rng = np.random.default_rng(seed)
+        # Client activity is heavy-tailed: a few accounts do most of the flow.
+        weights = rng.pareto(1.2, len(client_ids)) + 0.05
+        self.client_weights = weights / weights.sum()
+        self.tick_times = self.start + np.linspace(0, self.span, ticks_per_instrument)
+        self.mids = np.vstack([self._price_path(rng, symbol) for symbol in self.symbols])
+
+        self.trade_clients = rng.choice(self.client_ids, size=trades, p=self.client_weights)
+        self.trade_instruments = rng.integers(0, len(self.symbols), size=trades)
+        self.trade_times = np.sort(rng.uniform(self.start, self.start + self.span, size=trades))
+        self.trade_sides = np.where(rng.random(trades) < 0.5, 1, -1)
+        trade_mids = self._mid_at(self.trade_times, self.trade_instruments)
+        notional = rng.lognormal(mean=np.log(250_000), sigma=1.1, size=trades)
+        markup_bps = rng.gamma(shape=2.0, scale=4.0, size=trades)
+        self.trade_prices = np.round(trade_mids * (1 + self.trade_sides * markup_bps / 10_000), 8)
+        self.trade_sizes = np.round(notional / trade_mids, 8)
+        self.rfq_ids = _uuids(rng, trades)
+        self.rfq_latency = rng.gamma(shape=2.0, scale=1.5, size=trades)
+
+    def _mid_at(self, times: np.ndarray, instruments: np.ndarray) -> np.ndarray:
+        mids = np.empty(len(times))
+        for row in range(len(self.symbols)):
+            mask = instruments == row
+            mids[mask] = np.interp(times[mask], self.tick_times, self.mids[row])
+        return mids
+
+    def _price_path(self, rng: np.random.Generator, symbol: str) -> np.ndarray:
+        step = self.span / max(self.ticks_per_instrument - 1, 1)
+        sigma = ANNUAL_VOL.get(symbol, 1.2) * np.sqrt(step / SECONDS_PER_YEAR)
+        shocks = rng.standard_t(df=4, size=self.ticks_per_instrument) * sigma / np.sqrt(2)
+        shocks[0] = 0.0
+        return default_mid(symbol) * np.exp(np.cumsum(shocks))
+
+    def market_prices(self) -> Iterator[list[tuple]]:
+        rng = np.random.default_rng([self.seed, 1])
+        window = 20
+        for row, instrument_id in enumerate(self.instrument_ids.tolist()):
+            mids = self.mids[row]
+            log_returns = np.diff(np.log(mids), prepend=np.log(mids[0]))
+            cumulative = np.cumsum(np.insert(mids, 0, 0.0))
+            counts = np.minimum(np.arange(1, len(mids) + 1), window)
+            window_start = np.maximum(np.arange(1, len(mids) + 1) - window, 0)
+            vwap = (cumulative[1:] - cumulative[window_start]) / counts
+            squared = np.cumsum(np.insert(log_returns**2, 0, 0.0))
+            volatility = np.sqrt((squared[1:] - squared[window_start]) / counts * window)
+            for start, end in _chunks(len(mids)):
+                size = end - start
+                spread_bps = np.clip(rng.lognormal(np.log(10.0), 0.35, size), 2.0, 80.0)
+                mid = mids[start:end]
+                bid = mid * (1 - spread_bps / 20_000)
+                ask = mid * (1 + spread_bps / 20_000)
+                exchanges = rng.choice(EXCHANGES, size=size, p=EXCHANGE_WEIGHTS)
+                yield list(
+                    zip(
+                        [instrument_id] * size,
+                        exchanges.tolist(),
+                        _numeric(bid),
+                        _numeric(ask),
+                        _numeric(mid),
+                        np.round(spread_bps, 4).tolist(),
+                        _numeric(vwap[start:end]),
+                        np.round(volatility[start:end], 6).tolist(),
+                        _timestamps(self.tick_times[start:end]),
+                    )
+                )
+
+    def rfq_requests(self) -> Iterator[list[tuple]]:
+        for start, end in _chunks(self.trades):
+            created = self.trade_times[start:end] - self.rfq_latency[start:end]
+            yield list(
+                zip(
+                    self.rfq_ids[start:end],
+                    self.trade_clients[start:end].tolist(),
+                    self.instrument_ids[self.trade_instruments[start:end]].tolist(),
+                    [self.user_id] * (end - start),
+                    ["buy" if side > 0 else "sell" for side in self.trade_sides[start:end]],
+                    _numeric(self.trade_sizes[start:end]),
+                    _numeric(self.trade_prices[start:end]),
+                    _timestamps(created + 30),
+                    ["accepted"] * (end - start),
+                    _timestamps(created),
+                    _timestamps(self.trade_times[start:end]),
+                )
+            )
+
+        # Unfilled RFQs: clients walk away from most quotes, the rest time out.
+        rng = np.random.default_rng([self.seed, 2])
+        for start, end in _chunks(self.rejected_rfqs):
+            size = end - start
+            instruments = rng.integers(0, len(self.symbols), size=size)
+            created = np.sort(rng.uniform(self.start, self.start + self.span, size=size))
+            mids = self._mid_at(created, instruments)
+            sides = np.where(rng.random(size) < 0.5, 1, -1)
+            statuses = np.where(rng.random(size) < 0.7, "rejected", "expired")
+            notional = rng.lognormal(mean=np.log(250_000), sigma=1.1, size=size)
+            yield list(
+                zip(
+                    _uuids(rng, size),
+                    rng.choice(self.client_ids, size=size, p=self.client_weights).tolist(),
+                    self.instrument_ids[instruments].tolist(),
+                    [self.user_id] * size,
+                    ["buy" if side > 0 else "sell" for side in sides],
+                    _numeric(notional / mids),
+                    _numeric(mids * (1 + sides * 8 / 10_000)),
+                    _timestamps(created + 30),
+                    statuses.tolist(),
+                    _timestamps(created),
+                    _timestamps(created + rng.uniform(1, 30, size)),
+                )
+            )
+
+    def trades_rows(self) -> Iterator[list[tuple]]:
+        for start, end in _chunks(self.trades):
+            sizes = self.trade_sizes[start:end]
+            yield list(
+                zip(
+                    self.rfq_ids[start:end],
+                    self.trade_clients[start:end].tolist(),
+                    self.instrument_ids[self.trade_instruments[start:end]].tolist(),
+                    ["buy" if side > 0 else "sell" for side in self.trade_sides[start:end]],
+                    _numeric(sizes),
+                    _numeric(self.trade_prices[start:end]),
+                    _numeric(np.abs(sizes * self.trade_prices[start:end])),
+                    [self.user_id] * (end - start),
+                    _timestamps(self.trade_times[start:end]),
+                )
+            )
+
+    def positions(self) -> list[tuple]:
+        if not self.trades:
+            return []
+        signed = self.trade_sides * self.trade_sizes
+        keys = self.trade_clients * len(self.symbols) + self.trade_instruments
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        net = np.bincount(inverse, weights=signed)
+        cost = np.bincount(inverse, weights=signed * self.trade_prices)
+        last_mid = self.mids[:, -1]
+        rows = []
+        now = datetime.fromtimestamp(self.start + self.span, timezone.utc)
+        for key, net_size, total_cost in zip(unique_keys.tolist(), net.tolist(), cost.tolist()):
+            client_id, instrument = divmod(key, len(self.symbols))
+            avg_price = total_cost / net_size if abs(net_size) > 1e-6 else 0.0
+            rows.append(
+                (
+                    client_id,
+                    int(self.instrument_ids[instrument]),
+                    f"{net_size:.8f}",
+                    f"{avg_price:.8f}",
+                    f"{abs(net_size * last_mid[instrument]):.8f}",
+                    now,
+                )
+            )
+        return rows
+
+    def audit_logs(self, previous_hash: str) -> Iterator[list[tuple]]:
+        for start, end in _chunks(self.trades):
+            rows = []
+            for index in range(start, end):
+                metadata = {
+                    "client_id": int(self.trade_clients[index]),
+                    "instrument_id": int(self.instrument_ids[self.trade_instruments[index]]),
+                    "side": "buy" if self.trade_sides[index] > 0 else "sell",
+                    "size": float(self.trade_sizes[index]),
+                    "price": float(self.trade_prices[index]),
+                }
+                entity_id = f"bench-{index}"
+                # Same hash chain as services.audit.log_event, so verification works across it.
+                payload = {
+                    "event_type": "trade.executed",
+                    "entity_type": "trade",
+                    "entity_id": entity_id,
+                    "user_id": self.user_id,
+                    "metadata": metadata,
+                    "previous_hash": previous_hash,
+                }
+                previous_hash = hashlib.sha256(
+                    json.dumps(payload, sort_keys=True).encode()
+                ).hexdigest()
+                rows.append(
+                    (
+                        "trade.executed",
+                        "trade",
+                        entity_id,
+                        self.user_id,
+                        json.dumps(metadata),
+                        previous_hash,
+                        datetime.fromtimestamp(float(self.trade_times[index]), timezone.utc),
+                    )
+                )
+            yield rows
+
+
+MARKET_PRICE_COLUMNS = [
+    "instrument_id",
+    "exchange",
+    "bid",
+    "ask",
+    "mid",
+    "spread_bps",
+    "rolling_vwap",
+    "volatility_5m",
+    "ts",
+]
+RFQ_COLUMNS = [
+    "id",
+    "client_id",
+    "instrument_id",
+    "requested_by_user_id",
+    "side",
+    "size",
+    "quoted_price",
+    "quote_expiry",
+    "status",
+    "created_at",
+    "updated_at",
+]
+TRADE_COLUMNS = [
+    "rfq_id",
+    "client_id",
+    "instrument_id",
+    "side",
+    "size",
+    "price",
+    "notional_usd",
+    "executed_by_user_id",
+    "timestamp",
+]
+POSITION_COLUMNS = [
+    "client_id",
+    "instrument_id",
+    "net_size",
+    "avg_price",
+    "usd_exposure",
+    "updated_at",
+]
+AUDIT_COLUMNS = [
+    "event_type",
+    "entity_type",
+    "entity_id",
+    "user_id",
+    "metadata",
+    "immutable_hash",
+    "created_at",
+]
+
+
+async def _copy(table: str, columns: list[str], batches) -> tuple[str, int, float]:
+    started = time.perf_counter()
+    count = 0
+    conn = await asyncpg.connect(_asyncpg_dsn())
+    try:
+        for records in batches:
+            await conn.copy_records_to_table(table, records=records, columns=columns)
+            count += len(records)
+    finally:
+        await conn.close()
+    return table, count, time.perf_counter() - started
+
+
+# Each table is generated and copied in its own worker process, since generating rows is
+# CPU-bound and would serialize on one event loop. Workers receive the data once, when they
+# start, rather than with every task.
+_worker_data: tuple["BenchData", str] | None = None
+
+
+def _init_worker(data: "BenchData", previous_hash: str) -> None:
+    global _worker_data
+    _worker_data = (data, previous_hash)
+
+
+def _load_table(table: str) -> tuple[str, int, float]:
+    assert _worker_data is not None
+    data, previous_hash = _worker_data
+    batches = {
+        "market_prices": (MARKET_PRICE_COLUMNS, data.market_prices),
+        "rfq_requests": (RFQ_COLUMNS, data.rfq_requests),
+        "positions": (POSITION_COLUMNS, lambda: [data.positions()]),
+        "audit_logs": (AUDIT_COLUMNS, lambda: data.audit_logs(previous_hash)),
+        "trades": (TRADE_COLUMNS, data.trades_rows),
+    }
+    columns, rows = batches[table]
+    return asyncio.run(_copy(table, columns, rows()))
+
+
+async def _prepare(args: argparse.Namespace) -> tuple[list[int], list[tuple[int, str]], int, str]:
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await ensure_seed_data(db)
+
+        client_count = await db.scalar(select(func.count()).select_from(Client))
+        if client_count < args.clients:
+            rng = np.random.default_rng([args.seed, 3])
+            db.add_all(
+                Client(
+                    name=f"Bench Client {index:05d}",
+                    tier=str(rng.choice(CLIENT_TIERS)),
+                    default_markup_bps=round(float(rng.uniform(0.8, 3.5)), 2),
+                )
+                for index in range(client_count + 1, args.clients + 1)
+            )
+            await db.commit()
+
+        client_ids = list((await db.execute(select(Client.id).order_by(Client.id))).scalars())
+        instruments = [
+            (instrument_id, symbol)
+            for instrument_id, symbol in (
+                await db.execute(select(Instrument.id, Instrument.symbol).order_by(Instrument.id))
+            ).all()
+        ]
+        user_id = await db.scalar(
+            select(User.id)
+            .where(User.role.in_([UserRole.trader, UserRole.admin]))
+            .order_by(User.id)
+            .limit(1)
+        )
+
+    conn = await asyncpg.connect(_asyncpg_dsn())
+    try:
+        existing_trades = await conn.fetchval("SELECT count(*) FROM trades")
+        if existing_trades and not args.truncate:
+            raise SystemExit(
+                f"trades already holds {existing_trades} rows; pass --truncate to replace generated tables"
+            )
+        if args.truncate:
+            await conn.execute(f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE")
+        previous_hash = await conn.fetchval(
+            "SELECT immutable_hash FROM audit_logs ORDER BY id DESC LIMIT 1"
+        )
+    finally:
+        await conn.close()
+    return client_ids, instruments, user_id, previous_hash or "GENESIS"
+
+
+async def generate(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    client_ids, instruments, user_id, previous_hash = await _prepare(args)
+
+    data = BenchData(
+        seed=args.seed,
+        client_ids=client_ids,
+        instruments=instruments,
+        user_id=user_id,
+        start=args.start,
+        days=args.days,
+        ticks_per_instrument=args.ticks_per_instrument,
+        trades=args.trades,
+        rejected_rfqs=args.rejected_rfqs,
+    )
+    print(f"Generated price paths and trade tape in {time.perf_counter() - started:.1f}s")
+
+    # Trades reference RFQs, so they load once rfq_requests is in; the rest run side by side.
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(
+        max_workers=4, initializer=_init_worker, initargs=(data, previous_hash)
+    ) as pool:
+        others = [
+            loop.run_in_executor(pool, _load_table, table)
+            for table in ("market_prices", "positions", "audit_logs")
+        ]
+        results = [await loop.run_in_executor(pool, _load_table, "rfq_requests")]
+        results.append(await loop.run_in_executor(pool, _load_table, "trades"))
+        results.extend(await asyncio.gather(*others))
+
+    conn = await asyncpg.connect(_asyncpg_dsn())
+    try:
+        await conn.execute(f"ANALYZE {', '.join(GENERATED_TABLES)}")
+    finally:
+        await conn.close()
+
+    for table, count, elapsed in results:
+        rate = count / elapsed if elapsed else 0.0
+        print(f"{table:<15} {count:>12,} rows  {elapsed:7.1f}s  {rate:>12,.0f} rows/s")
+    print(f"Total {time.perf_counter() - started:.1f}s (seed {args.seed})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-load reproducible benchmark data via COPY")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=float, default=30.0)
+    parser.add_argument(
+        "--start",
+        type=_utc,
+        default=_utc(DEFAULT_START),
+        help=f"First generated timestamp (ISO 8601, default {DEFAULT_START})",
+    )
+    parser.add_argument("--clients", type=int, default=200, help="Minimum number of clients")
+    parser.add_argument("--ticks-per-instrument", type=int, default=500_000)
+    parser.add_argument("--trades", type=int, default=1_000_000)
+    parser.add_argument("--rejected-rfqs", type=int, default=2_000_000)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help=f"Empty {', '.join(GENERATED_TABLES)} before loading",
+    )
+    args = parser.parse_args()
+    asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    main()
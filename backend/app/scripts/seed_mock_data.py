@@ -17,7 +17,7 @@ from app.models import (
     UserRole,
 )
 from app.seed import ensure_seed_data
-from app.services.audit import log_event
+from app.services.audit import audit_writer, log_event
 from app.services.risk import apply_trade_to_positions
 
 PRICE_BASE = {
@@ -128,6 +128,8 @@ async def seed_mock_data() -> None:
 
         await db.commit()
 
+    await audit_writer.drain()
+
 
 if __name__ == "__main__":
     asyncio.run(seed_mock_data())
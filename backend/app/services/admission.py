@@ -0,0 +1,107 @@
+import math
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+# Past this many tracked buckets the least recently used is dropped. Every request touches its
+# user's bucket, so spraying client ids only evicts idle buckets, never the sender's own.
+MAX_BUCKETS = 50_000
+
+BucketKey = tuple[str, str, int]
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+
+    def take(self, now: float) -> float:
+        # Returns 0 when a token was taken, otherwise the seconds until one is available.
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class AdmissionControl:
+    def __init__(self, max_inflight_writes: int) -> None:
+        self._max_inflight = max_inflight_writes
+        self._buckets: OrderedDict[BucketKey, TokenBucket] = OrderedDict()
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.admitted: Counter[str] = Counter()
+        self.rejected: Counter[tuple[str, str]] = Counter()
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= self._max_inflight:
+            self.rejected["write", "overload"] += 1
+            return False
+        self.inflight += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+        return True
+
+    def release(self) -> None:
+        self.inflight -= 1
+
+    def _bucket(self, key: BucketKey, rate: float, burst: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
+        if len(self._buckets) >= MAX_BUCKETS:
+            self._buckets.popitem(last=False)
+        bucket = self._buckets[key] = TokenBucket(rate, float(burst), float(burst), now)
+        return bucket
+
+    def check(self, scope: str, *, user_id: int, client_id: int) -> None:
+        now = time.monotonic()
+        limits = (
+            ("user", user_id, settings.rate_limit_user_per_second, settings.rate_limit_user_burst),
+            (
+                "client",
+                client_id,
+                settings.rate_limit_client_per_second,
+                settings.rate_limit_client_burst,
+            ),
+        )
+        taken: list[TokenBucket] = []
+        for kind, key, rate, burst in limits:
+            bucket = self._bucket((scope, kind, key), rate, burst, now)
+            wait = bucket.take(now)
+            if not wait:
+                taken.append(bucket)
+                continue
+            # A request refused by one bucket does not spend the others.
+            for refund in taken:
+                refund.tokens += 1.0
+            self.rejected[scope, kind] += 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for this {kind}",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        self.admitted[scope] += 1
+
+    def metrics(self) -> dict:
+        return {
+            "inflight_writes": self.inflight,
+            "peak_inflight_writes": self.peak_inflight,
+            "max_inflight_writes": self._max_inflight,
+            "tracked_buckets": len(self._buckets),
+            "admitted": dict(self.admitted),
+            "rejected": [
+                {"scope": scope, "reason": reason, "count": count}
+                for (scope, reason), count in sorted(self.rejected.items())
+            ],
+        }
+
+
+admission = AdmissionControl(max_inflight_writes=settings.max_inflight_writes)
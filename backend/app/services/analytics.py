@@ -1,11 +1,28 @@
-from sqlalchemy import desc, func, select
+from sqlalchemy import Row, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Client, MarketPrice, Position, RFQRequest, Trade
 from app.schemas import ClientAnalyticsOut
 
 
-async def _latest_mid_map(db: AsyncSession) -> dict[int, float]:
+async def position_rows(db: AsyncSession) -> list[Row]:
+    # One scan shared by the in-memory engines that are built from positions at startup.
+    return list(
+        (
+            await db.execute(
+                select(
+                    Position.client_id,
+                    Position.instrument_id,
+                    Position.net_size,
+                    Position.avg_price,
+                    Position.usd_exposure,
+                )
+            )
+        ).all()
+    )
+
+
+async def latest_mid_map(db: AsyncSession) -> dict[int, float]:
     latest_subquery = (
         select(MarketPrice.instrument_id, func.max(MarketPrice.ts).label("max_ts"))
         .group_by(MarketPrice.instrument_id)
@@ -29,7 +46,9 @@ async def _latest_mid_map(db: AsyncSession) -> dict[int, float]:
     return latest
 
 
-async def calculate_client_analytics(db: AsyncSession, client_id: int) -> ClientAnalyticsOut:
+async def calculate_client_analytics(
+    db: AsyncSession, client_id: int, *, touched_instruments: set[int] | None = None
+) -> ClientAnalyticsOut:
     client = await db.get(Client, client_id)
     if client is None:
         raise ValueError("Client not found")
@@ -40,7 +59,7 @@ async def calculate_client_analytics(db: AsyncSession, client_id: int) -> Client
     total_volume = sum(abs(float(t.size) * float(t.price)) for t in trades)
     trade_count = len(trades)
 
-    latest_mid = await _latest_mid_map(db)
+    latest_mid = await latest_mid_map(db)
 
     positions_result = await db.execute(select(Position).where(Position.client_id == client_id))
     positions = positions_result.scalars().all()
@@ -57,6 +76,10 @@ async def calculate_client_analytics(db: AsyncSession, client_id: int) -> Client
             continue
         spread_capture_bps.append(abs((float(trade.price) - mid) / mid) * 10_000)
 
+    if touched_instruments is not None:
+        touched_instruments.update(trade.instrument_id for trade in trades)
+        touched_instruments.update(position.instrument_id for position in positions)
+
     rfq_result = await db.execute(select(RFQRequest).where(RFQRequest.client_id == client_id))
     rfqs = rfq_result.scalars().all()
     response_seconds: list[float] = [
@@ -1,25 +1,29 @@
+import asyncio
 import hashlib
 import json
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import AuditLog
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import AuditArchiveCheckpoint, AuditLog, AuditOutbox
 
 
-async def log_event(
-    db: AsyncSession,
+GENESIS_HASH = "GENESIS"
+# pg advisory lock held by whichever worker is chaining the outbox, so only one writer appends.
+AUDIT_WRITER_LOCK_KEY = 0x61756474
+
+
+def chain_hash(
     *,
     event_type: str,
     entity_type: str,
     entity_id: str,
     user_id: int | None,
     metadata: dict,
-) -> AuditLog:
-    previous = await db.execute(select(AuditLog).order_by(AuditLog.id.desc()).limit(1))
-    last = previous.scalar_one_or_none()
-    previous_hash = last.immutable_hash if last else "GENESIS"
-
+    previous_hash: str,
+) -> str:
     payload = {
         "event_type": event_type,
         "entity_type": entity_type,
@@ -28,15 +32,139 @@ async def log_event(
         "metadata": metadata,
         "previous_hash": previous_hash,
     }
-    immutable_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def archived_chain_head(db: AsyncSession) -> str:
+    # Once every row has been archived, the chain continues from the last archived hash.
+    result = await db.execute(
+        select(AuditArchiveCheckpoint.last_hash)
+        .order_by(AuditArchiveCheckpoint.last_id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none() or GENESIS_HASH
 
-    log = AuditLog(
+
+async def chain_head(db: AsyncSession) -> str:
+    result = await db.execute(select(AuditLog.immutable_hash).order_by(AuditLog.id.desc()).limit(1))
+    return result.scalar_one_or_none() or await archived_chain_head(db)
+
+
+async def log_event(
+    db: AsyncSession,
+    *,
+    event_type: str,
+    entity_type: str,
+    entity_id: str,
+    user_id: int | None,
+    metadata: dict,
+) -> AuditOutbox:
+    # Events are queued in the caller's transaction and chained into audit_logs by the writer
+    # task, so they commit or roll back with the change they describe.
+    event = AuditOutbox(
         event_type=event_type,
         entity_type=entity_type,
         entity_id=entity_id,
         user_id=user_id,
         metadata_json=metadata,
-        immutable_hash=immutable_hash,
     )
-    db.add(log)
-    return log
+    db.add(event)
+    audit_writer.notify()
+    return event
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int, interval_seconds: float) -> None:
+        self._batch_size = batch_size
+        self._interval = interval_seconds
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def flush(self) -> int:
+        async with AsyncSessionLocal() as db, db.begin():
+            locked = await db.scalar(select(func.pg_try_advisory_xact_lock(AUDIT_WRITER_LOCK_KEY)))
+            if not locked:
+                return 0
+            events = (
+                await db.execute(
+                    select(AuditOutbox).order_by(AuditOutbox.id).limit(self._batch_size)
+                )
+            ).scalars().all()
+            if not events:
+                return 0
+
+            previous_hash = await chain_head(db)
+            rows = []
+            for event in events:
+                previous_hash = chain_hash(
+                    event_type=event.event_type,
+                    entity_type=event.entity_type,
+                    entity_id=event.entity_id,
+                    user_id=event.user_id,
+                    metadata=event.metadata_json,
+                    previous_hash=previous_hash,
+                )
+                rows.append(
+                    {
+                        "event_type": event.event_type,
+                        "entity_type": event.entity_type,
+                        "entity_id": event.entity_id,
+                        "user_id": event.user_id,
+                        "metadata_json": event.metadata_json,
+                        "immutable_hash": previous_hash,
+                        "created_at": event.created_at,
+                    }
+                )
+            await db.execute(insert(AuditLog), rows)
+            await db.execute(
+                delete(AuditOutbox).where(AuditOutbox.id.in_([event.id for event in events]))
+            )
+        return len(events)
+
+    async def drain(self) -> None:
+        while await self.flush() == self._batch_size:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                written = await self.flush()
+            except Exception:
+                written = 0
+            if written == self._batch_size:
+                continue
+            # Events are queued before their request commits, so a wake-up only shortens the wait;
+            # the interval still picks up anything that was not yet visible.
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.sleep(self._interval / 10)
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="audit-writer")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Anything left stays in audit_outbox and is chained on the next start.
+        try:
+            await self.drain()
+        except Exception:
+            pass
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_writer_batch_size,
+    interval_seconds=settings.audit_writer_interval_seconds,
+)
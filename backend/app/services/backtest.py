@@ -0,0 +1,243 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.estimators import MIN_TICK_INTERVAL_SECONDS
+from app.services.pricing import (
+    calculate_quotes,
+    inventory_skew_bps_array,
+    volatility_spread_bps_array,
+)
+
+# Largest decay exponent summed within one block of _ewma_variance_rate, keeping exp() finite.
+DECAY_BLOCK = 300.0
+
+
+@dataclass(slots=True)
+class QuoteParams:
+    spread_buffer_bps: float
+    skew_threshold: float
+    max_skew_bps: float
+
+
+@dataclass(slots=True)
+class TickHistory:
+    instrument_ids: np.ndarray
+    ts: np.ndarray
+    mid: np.ndarray
+
+
+@dataclass(slots=True)
+class TradeTape:
+    instrument_ids: np.ndarray
+    ts: np.ndarray
+    sides: np.ndarray
+    sizes: np.ndarray
+    prices: np.ndarray
+    markup_bps: np.ndarray
+
+
+@dataclass(slots=True)
+class BacktestResult:
+    params: QuoteParams
+    trades: int
+    hits: int
+    hit_rate: float
+    avg_spread_capture_bps: float
+    spread_capture_usd: float
+    ticks: int
+    avg_quoted_spread_bps: float
+    bid: np.ndarray | None = None
+    ask: np.ndarray | None = None
+
+
+def _sort_ticks(ticks: TickHistory) -> TickHistory:
+    order = np.lexsort((ticks.ts, ticks.instrument_ids))
+    return TickHistory(
+        instrument_ids=ticks.instrument_ids[order],
+        ts=ticks.ts[order],
+        mid=ticks.mid[order],
+    )
+
+
+def _sort_tape(tape: TradeTape) -> TradeTape:
+    order = np.lexsort((tape.ts, tape.instrument_ids))
+    return TradeTape(
+        instrument_ids=tape.instrument_ids[order],
+        ts=tape.ts[order],
+        sides=tape.sides[order],
+        sizes=tape.sizes[order],
+        prices=tape.prices[order],
+        markup_bps=tape.markup_bps[order],
+    )
+
+
+def _group_bounds(sorted_ids: np.ndarray) -> dict[int, tuple[int, int]]:
+    if sorted_ids.size == 0:
+        return {}
+    keys, starts = np.unique(sorted_ids, return_index=True)
+    ends = np.append(starts[1:], sorted_ids.size)
+    return {int(key): (int(start), int(end)) for key, start, end in zip(keys, starts, ends)}
+
+
+def _ewma_variance_rate(ts: np.ndarray, mid: np.ndarray, tau: float) -> np.ndarray:
+    # EWMAVolatility's recurrence v[i] = d[i] * v[i-1] + (1 - d[i]) * x[i], d[i] = exp(-a[i]),
+    # solved in closed form: v[i] = exp(-A[i]) * cumsum((1 - d) * x * exp(A))[i] with A the
+    # cumulative decay. A grows without bound, so it is split into blocks of DECAY_BLOCK and the
+    # value at each block boundary is carried into the next one.
+    dt = np.maximum(np.diff(ts), MIN_TICK_INTERVAL_SECONDS)
+    valid = (mid[:-1] > 0) & (mid[1:] > 0)
+    log_return = np.log(np.where(valid, mid[1:], 1.0) / np.where(valid, mid[:-1], 1.0))
+    decay = np.where(valid, dt / tau, 0.0)
+    contribution = -np.expm1(-decay) * log_return * log_return / dt
+
+    rate = np.zeros(ts.size)
+    cumulative = np.cumsum(decay)
+    blocks = (cumulative // DECAY_BLOCK).astype(np.int64)
+    bounds = np.flatnonzero(np.diff(blocks)) + 1
+    carry, carry_at = 0.0, 0.0
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, blocks.size]):
+        anchor = blocks[start] * DECAY_BLOCK
+        offset = cumulative[start:end] - anchor
+        carried = carry * np.exp(carry_at - anchor)
+        weighted = np.cumsum(contribution[start:end] * np.exp(offset))
+        block_rate = np.exp(-offset) * (carried + weighted)
+        rate[start + 1 : end + 1] = block_rate
+        carry, carry_at = block_rate[-1], cumulative[end - 1]
+    return rate
+
+
+def _volatility_spread(ticks: TickHistory) -> np.ndarray:
+    # The capped volatility widening live quotes carry, as the live estimators would have seen
+    # the replayed feed tick by tick.
+    tau = settings.volatility_halflife_seconds / np.log(2)
+    rate = np.zeros(ticks.ts.size)
+    for start, end in _group_bounds(ticks.instrument_ids).values():
+        if end - start > 1:
+            rate[start:end] = _ewma_variance_rate(ticks.ts[start:end], ticks.mid[start:end], tau)
+    return volatility_spread_bps_array(np.sqrt(rate * settings.volatility_horizon_seconds))
+
+
+def _trade_state(
+    ticks: TickHistory, tape: TradeTape, tick_vol_spread: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Per instrument: mid and volatility spread prevailing at each trade, desk inventory just
+    # before each trade, and desk inventory prevailing at each tick.
+    trade_mid = np.full(tape.ts.size, np.nan)
+    trade_vol_spread = np.zeros(tape.ts.size)
+    trade_inventory = np.zeros(tape.ts.size)
+    tick_inventory = np.zeros(ticks.ts.size)
+
+    tick_groups = _group_bounds(ticks.instrument_ids)
+    trade_groups = _group_bounds(tape.instrument_ids)
+
+    for instrument_id, (t_start, t_end) in trade_groups.items():
+        signed = tape.sides[t_start:t_end] * tape.sizes[t_start:t_end]
+        cumulative = np.cumsum(signed)
+        trade_inventory[t_start:t_end] = cumulative - signed
+
+        if instrument_id not in tick_groups:
+            continue
+        k_start, k_end = tick_groups[instrument_id]
+        tick_ts = ticks.ts[k_start:k_end]
+
+        prior = np.searchsorted(tick_ts, tape.ts[t_start:t_end], side="right") - 1
+        has_mid = prior >= 0
+        mids = np.full(prior.size, np.nan)
+        mids[has_mid] = ticks.mid[k_start:k_end][prior[has_mid]]
+        trade_mid[t_start:t_end] = mids
+        vol_spread = np.zeros(prior.size)
+        vol_spread[has_mid] = tick_vol_spread[k_start:k_end][prior[has_mid]]
+        trade_vol_spread[t_start:t_end] = vol_spread
+
+        filled = np.searchsorted(tape.ts[t_start:t_end], tick_ts, side="right") - 1
+        inventory = np.zeros(tick_ts.size)
+        inventory[filled >= 0] = cumulative[filled[filled >= 0]]
+        tick_inventory[k_start:k_end] = inventory
+
+    return trade_mid, trade_vol_spread, trade_inventory, tick_inventory
+
+
+def run_backtest(
+    ticks: TickHistory,
+    tape: TradeTape,
+    grid: list[QuoteParams],
+    *,
+    reference_markup_bps: float = 0.0,
+    include_quotes: bool = False,
+) -> list[BacktestResult]:
+    ticks = _sort_ticks(ticks)
+    tape = _sort_tape(tape)
+    tick_vol_spread = _volatility_spread(ticks)
+    trade_mid, trade_vol_spread, trade_inventory, tick_inventory = _trade_state(
+        ticks, tape, tick_vol_spread
+    )
+
+    priced = ~np.isnan(trade_mid)
+    mid = trade_mid[priced]
+    sides = tape.sides[priced]
+    sizes = tape.sizes[priced]
+    prices = tape.prices[priced]
+    markups = tape.markup_bps[priced]
+    inventory = trade_inventory[priced]
+    vol_spread = trade_vol_spread[priced]
+
+    buy = np.ones(ticks.ts.size)
+    results: list[BacktestResult] = []
+    for params in grid:
+        skew = inventory_skew_bps_array(
+            inventory, sides, threshold=params.skew_threshold, max_skew=params.max_skew_bps
+        )
+        quotes = calculate_quotes(
+            mid_price=mid,
+            sides=sides,
+            spread_buffer_bps=params.spread_buffer_bps + vol_spread,
+            inventory_skew_bps=skew,
+            client_markup_bps=markups,
+        )
+        # A client would have traded with us if our quote was no worse than the price they dealt.
+        hit = sides * (prices - quotes) >= 0
+        edge = sides * (quotes - mid)
+        hits = int(hit.sum())
+
+        tick_quotes = []
+        for tick_sides in (-buy, buy):
+            tick_skew = inventory_skew_bps_array(
+                tick_inventory,
+                tick_sides,
+                threshold=params.skew_threshold,
+                max_skew=params.max_skew_bps,
+            )
+            tick_quotes.append(
+                calculate_quotes(
+                    mid_price=ticks.mid,
+                    sides=tick_sides,
+                    spread_buffer_bps=params.spread_buffer_bps + tick_vol_spread,
+                    inventory_skew_bps=tick_skew,
+                    client_markup_bps=reference_markup_bps,
+                )
+            )
+        bid, ask = tick_quotes
+
+        results.append(
+            BacktestResult(
+                params=params,
+                trades=int(mid.size),
+                hits=hits,
+                hit_rate=round(hits / mid.size, 4) if mid.size else 0.0,
+                avg_spread_capture_bps=round(float(np.mean(edge[hit] / mid[hit]) * 10_000), 2)
+                if hits
+                else 0.0,
+                spread_capture_usd=round(float(np.sum(edge[hit] * sizes[hit])), 2),
+                ticks=int(ticks.ts.size),
+                avg_quoted_spread_bps=round(float(np.mean((ask - bid) / ticks.mid) * 10_000), 2)
+                if ticks.ts.size
+                else 0.0,
+                # Shown quotes follow tick order sorted by (instrument_id, ts).
+                bid=bid if include_quotes else None,
+                ask=ask if include_quotes else None,
+            )
+        )
+
+    return results
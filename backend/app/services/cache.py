@@ -0,0 +1,194 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.services.events import (
+    LIMIT_UPDATED,
+    PRICES_TICKED,
+    RFQ_CHANGED,
+    TRADE_BOOKED,
+    DomainEvent,
+    domain_events,
+)
+
+SKIPPED_HEADERS = {"content-length", "content-type"}
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    body: bytes
+    media_type: str | None
+    headers: dict[str, str]
+    tags: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class _Flight:
+    future: asyncio.Future
+    tags: list[str]
+    invalidated_tags: set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    bytes: int = 0
+    tags: dict[str, int] = field(default_factory=dict)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._tag_index: dict[str, set[str]] = {}
+        self._in_flight: dict[str, _Flight] = {}
+        self._bytes = 0
+        self._stats = CacheStats()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        if len(entry.body) > self._max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        for tag in entry.tags:
+            self._tag_index.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._stats.evictions += 1
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            for key in list(self._tag_index.get(tag, ())):
+                self._drop(key)
+                self._stats.invalidations += 1
+        for key, flight in list(self._in_flight.items()):
+            flight.invalidated_tags.update(tags)
+            # Requests arriving after the invalidation must not join a build that may predate it.
+            if not flight.invalidated_tags.isdisjoint(flight.tags):
+                del self._in_flight[key]
+
+    async def get_or_build(
+        self,
+        key: str,
+        tags: list[str],
+        build: Callable[[], Awaitable[Response]],
+    ) -> CachedResponse | Response:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self._stats.coalesced += 1
+            return await asyncio.shield(flight.future)
+
+        self._stats.misses += 1
+        flight = _Flight(future=asyncio.get_running_loop().create_future(), tags=tags)
+        self._in_flight[key] = flight
+        try:
+            response = await build()
+        except Exception as exc:
+            flight.future.set_exception(exc)
+            flight.future.exception()
+            raise
+        except BaseException:
+            flight.future.cancel()
+            raise
+        finally:
+            if self._in_flight.get(key) is flight:
+                del self._in_flight[key]
+
+        if response.status_code != 200:
+            flight.future.set_result(response)
+            return response
+
+        entry = CachedResponse(
+            body=bytes(response.body),
+            media_type=response.media_type,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name not in SKIPPED_HEADERS
+            },
+            tags=tuple(tags),
+        )
+        # Builders may add tags while running (e.g. the instruments a client holds); results
+        # invalidated while they were being built are served once but never stored.
+        if flight.invalidated_tags.isdisjoint(entry.tags):
+            self._store(key, entry)
+        flight.future.set_result(entry)
+        return entry
+
+    def on_event(self, event: DomainEvent) -> None:
+        if event.name == TRADE_BOOKED:
+            self.invalidate(
+                "positions", *(f"analytics:{client_id}" for client_id in event.client_ids)
+            )
+        elif event.name == RFQ_CHANGED:
+            self.invalidate(*(f"analytics:{client_id}" for client_id in event.client_ids))
+        elif event.name == LIMIT_UPDATED:
+            self.invalidate("limits")
+        elif event.name == PRICES_TICKED:
+            self.invalidate(
+                *(f"instrument:{instrument_id}" for instrument_id in event.instrument_ids)
+            )
+
+    def stats(self) -> CacheStats:
+        self._stats.entries = len(self._entries)
+        self._stats.bytes = self._bytes
+        self._stats.tags = {tag: len(keys) for tag, keys in self._tag_index.items()}
+        return self._stats
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+)
+domain_events.subscribe(response_cache.on_event)
+
+
+def cache_key(request: Request) -> str:
+    params = "&".join(
+        f"{name}={value}" for name, value in sorted(request.query_params.multi_items())
+    )
+    return f"{request.url.path}?{params}"
+
+
+async def cached_response(
+    request: Request,
+    tags: list[str],
+    build: Callable[[], Awaitable[Response]],
+    *,
+    key: str | None = None,
+) -> Response:
+    result = await response_cache.get_or_build(key or cache_key(request), tags, build)
+    if isinstance(result, Response):
+        return result
+    return Response(content=result.body, media_type=result.media_type, headers=result.headers)
@@ -0,0 +1,141 @@
+import math
+from array import array
+
+from app.core.config import settings
+
+# Floor for the time between ticks, so same-timestamp ticks cannot blow up the variance rate.
+MIN_TICK_INTERVAL_SECONDS = 1e-3
+
+
+class RollingVWAP:
+    # Time-windowed VWAP over a fixed-capacity ring buffer with running sums: each update adds one
+    # sample and evicts the expired ones from the head, so the cost per tick is amortized O(1).
+    __slots__ = (
+        "_window",
+        "_capacity",
+        "_ts",
+        "_notional",
+        "_volume",
+        "_price",
+        "_head",
+        "_count",
+        "_sized",
+        "_sum_notional",
+        "_sum_volume",
+        "_sum_price",
+    )
+
+    def __init__(self, window_seconds: float, capacity: int) -> None:
+        self._window = window_seconds
+        self._capacity = capacity
+        self._ts = array("d", bytes(8 * capacity))
+        self._notional = array("d", bytes(8 * capacity))
+        self._volume = array("d", bytes(8 * capacity))
+        self._price = array("d", bytes(8 * capacity))
+        self._head = 0
+        self._count = 0
+        # Samples with a positive size; when none are left the volume sums are exactly zero
+        # and any floating-point residue is discarded.
+        self._sized = 0
+        self._sum_notional = 0.0
+        self._sum_volume = 0.0
+        self._sum_price = 0.0
+
+    def _evict(self) -> None:
+        head = self._head
+        self._sum_notional -= self._notional[head]
+        self._sum_volume -= self._volume[head]
+        self._sum_price -= self._price[head]
+        if self._volume[head] > 0:
+            self._sized -= 1
+            if not self._sized:
+                self._sum_notional = self._sum_volume = 0.0
+        self._head = (head + 1) % self._capacity
+        self._count -= 1
+        if not self._count:
+            # Resetting on empty stops the running sums drifting from floating-point error.
+            self._sum_price = 0.0
+
+    def update(self, ts: float, price: float, size: float) -> float:
+        while self._count and self._ts[self._head] <= ts - self._window:
+            self._evict()
+        if self._count == self._capacity:
+            self._evict()
+
+        slot = (self._head + self._count) % self._capacity
+        volume = max(size, 0.0)
+        self._ts[slot] = ts
+        self._notional[slot] = price * volume
+        self._volume[slot] = volume
+        self._price[slot] = price
+        self._count += 1
+        if volume > 0:
+            self._sized += 1
+        self._sum_notional += price * volume
+        self._sum_volume += volume
+        self._sum_price += price
+
+        # Feeds without sizes (e.g. some replays) fall back to the plain average price.
+        if self._sized:
+            return self._sum_notional / self._sum_volume
+        return self._sum_price / self._count
+
+
+class EWMAVolatility:
+    # Exponentially weighted variance of log returns per second, decayed by the time between
+    # ticks so irregular feeds are weighted correctly, reported over `horizon_seconds`.
+    __slots__ = ("_tau", "_horizon", "_last_ts", "_last_price", "_variance_rate")
+
+    def __init__(self, halflife_seconds: float, horizon_seconds: float) -> None:
+        self._tau = halflife_seconds / math.log(2)
+        self._horizon = horizon_seconds
+        self._last_ts: float | None = None
+        self._last_price = 0.0
+        self._variance_rate = 0.0
+
+    def update(self, ts: float, price: float) -> float:
+        if self._last_ts is not None and self._last_price > 0 and price > 0:
+            dt = max(ts - self._last_ts, MIN_TICK_INTERVAL_SECONDS)
+            log_return = math.log(price / self._last_price)
+            weight = 1.0 - math.exp(-dt / self._tau)
+            self._variance_rate += weight * (log_return * log_return / dt - self._variance_rate)
+        self._last_ts = ts
+        self._last_price = price
+        return self.value()
+
+    def value(self) -> float:
+        return math.sqrt(self._variance_rate * self._horizon)
+
+
+class InstrumentEstimators:
+    __slots__ = ("vwap", "volatility")
+
+    def __init__(self) -> None:
+        self.vwap = RollingVWAP(settings.vwap_window_seconds, settings.estimator_buffer_size)
+        self.volatility = EWMAVolatility(
+            settings.volatility_halflife_seconds, settings.volatility_horizon_seconds
+        )
+
+
+class TickEstimators:
+    def __init__(self) -> None:
+        self._instruments: dict[int, InstrumentEstimators] = {}
+
+    def _get(self, instrument_id: int) -> InstrumentEstimators:
+        estimators = self._instruments.get(instrument_id)
+        if estimators is None:
+            estimators = self._instruments[instrument_id] = InstrumentEstimators()
+        return estimators
+
+    def update_vwap(self, instrument_id: int, ts: float, price: float, size: float) -> float:
+        return self._get(instrument_id).vwap.update(ts, price, size)
+
+    def update_volatility(self, instrument_id: int, ts: float, mid: float) -> float:
+        return self._get(instrument_id).volatility.update(ts, mid)
+
+    def volatility(self, instrument_id: int) -> float:
+        estimators = self._instruments.get(instrument_id)
+        return estimators.volatility.value() if estimators else 0.0
+
+
+tick_estimators = TickEstimators()
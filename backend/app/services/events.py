@@ -0,0 +1,48 @@
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+
+TRADE_BOOKED = "trade.booked"
+RFQ_CHANGED = "rfq.changed"
+RFQ_REQUOTED = "rfq.requoted"
+LIMIT_UPDATED = "limit.updated"
+PRICES_TICKED = "prices.ticked"
+
+
+@dataclass(slots=True, frozen=True)
+class DomainEvent:
+    name: str
+    entity_ids: tuple[Hashable, ...] = ()
+    client_ids: tuple[int, ...] = ()
+    instrument_ids: tuple[int, ...] = ()
+
+
+EventHandler = Callable[[DomainEvent], None]
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._handlers: list[EventHandler] = []
+
+    def subscribe(self, handler: EventHandler) -> None:
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def publish(
+        self,
+        name: str,
+        *,
+        entity_ids: tuple[Hashable, ...] = (),
+        client_ids: tuple[int, ...] = (),
+        instrument_ids: tuple[int, ...] = (),
+    ) -> None:
+        event = DomainEvent(
+            name=name,
+            entity_ids=entity_ids,
+            client_ids=client_ids,
+            instrument_ids=instrument_ids,
+        )
+        for handler in self._handlers:
+            handler(event)
+
+
+domain_events = EventBus()
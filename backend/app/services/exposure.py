@@ -0,0 +1,186 @@
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Client, Instrument, RiskLimit
+from app.services.events import LIMIT_UPDATED, DomainEvent, domain_events
+from app.services.mtm import MarkedPosition, mtm_engine
+from app.services.versions import resource_versions
+
+INITIAL_CAPACITY = 64
+
+
+class ExposureMatrix:
+    def __init__(self) -> None:
+        self._client_index: dict[int, int] = {}
+        self._instrument_index: dict[int, int] = {}
+        self._client_ids: list[int] = []
+        self._instrument_ids: list[int] = []
+        self._client_names: dict[int, str] = {}
+        self._instrument_symbols: dict[int, str] = {}
+        self._exposure = np.zeros((INITIAL_CAPACITY, INITIAL_CAPACITY))
+        self._hard_limits = np.full((INITIAL_CAPACITY, INITIAL_CAPACITY), np.nan)
+        self._limits: list[tuple[int | None, int | None, float]] = []
+        self._limits_stale = True
+
+    async def load(self, db: AsyncSession) -> None:
+        self._client_names = dict((await db.execute(select(Client.id, Client.name))).all())
+        self._instrument_symbols = dict(
+            (await db.execute(select(Instrument.id, Instrument.symbol))).all()
+        )
+        await self._load_limits(db)
+        for position in mtm_engine.positions():
+            self.on_position(position)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        missing_clients = [i for i in self._client_ids if i not in self._client_names]
+        if missing_clients:
+            rows = await db.execute(
+                select(Client.id, Client.name).where(Client.id.in_(missing_clients))
+            )
+            self._client_names.update(rows.all())
+        missing_instruments = [i for i in self._instrument_ids if i not in self._instrument_symbols]
+        if missing_instruments:
+            rows = await db.execute(
+                select(Instrument.id, Instrument.symbol).where(Instrument.id.in_(missing_instruments))
+            )
+            self._instrument_symbols.update(rows.all())
+        if self._limits_stale:
+            await self._load_limits(db)
+
+    async def _load_limits(self, db: AsyncSession) -> None:
+        rows = await db.execute(
+            select(RiskLimit.client_id, RiskLimit.instrument_id, RiskLimit.hard_limit_usd).where(
+                RiskLimit.active.is_(True)
+            )
+        )
+        self._limits = [
+            (client_id, instrument_id, float(hard_limit)) for client_id, instrument_id, hard_limit in rows
+        ]
+        self._limits_stale = False
+        self._resolve_limits()
+
+    def _resolve_limits(self) -> None:
+        # Most specific limit wins: exact cell, then client-wide, then instrument-wide, then global.
+        rows, cols = len(self._client_ids), len(self._instrument_ids)
+        limits = np.full((rows, cols), np.nan)
+        by_specificity = sorted(
+            self._limits, key=lambda limit: (limit[0] is not None) * 2 + (limit[1] is not None)
+        )
+        for client_id, instrument_id, hard_limit in by_specificity:
+            row = self._client_index.get(client_id) if client_id is not None else slice(None)
+            col = (
+                self._instrument_index.get(instrument_id) if instrument_id is not None else slice(None)
+            )
+            if row is None or col is None:
+                continue
+            limits[row, col] = hard_limit
+        self._hard_limits[:rows, :cols] = limits
+
+    def _ensure_capacity(self, rows: int, cols: int) -> None:
+        capacity_rows, capacity_cols = self._exposure.shape
+        if rows <= capacity_rows and cols <= capacity_cols:
+            return
+        new_shape = (max(rows, capacity_rows * 2), max(cols, capacity_cols * 2))
+        exposure = np.zeros(new_shape)
+        exposure[:capacity_rows, :capacity_cols] = self._exposure
+        hard_limits = np.full(new_shape, np.nan)
+        hard_limits[:capacity_rows, :capacity_cols] = self._hard_limits
+        self._exposure, self._hard_limits = exposure, hard_limits
+
+    def _cell(self, client_id: int, instrument_id: int) -> tuple[int, int]:
+        row = self._client_index.get(client_id)
+        col = self._instrument_index.get(instrument_id)
+        if row is not None and col is not None:
+            return row, col
+        if row is None:
+            row = self._client_index[client_id] = len(self._client_ids)
+            self._client_ids.append(client_id)
+        if col is None:
+            col = self._instrument_index[instrument_id] = len(self._instrument_ids)
+            self._instrument_ids.append(instrument_id)
+        self._ensure_capacity(len(self._client_ids), len(self._instrument_ids))
+        self._resolve_limits()
+        return row, col
+
+    def on_position(self, position: MarkedPosition) -> None:
+        row, col = self._cell(position.client_id, position.instrument_id)
+        self._exposure[row, col] = position.usd_exposure
+        resource_versions.bump("exposure")
+
+    def on_event(self, event: DomainEvent) -> None:
+        if event.name == LIMIT_UPDATED:
+            self._limits_stale = True
+            resource_versions.bump("exposure")
+
+    def snapshot(self, max_clients: int, max_instruments: int) -> dict:
+        rows, cols = len(self._client_ids), len(self._instrument_ids)
+        exposure = self._exposure[:rows, :cols]
+        hard_limits = self._hard_limits[:rows, :cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            utilization = np.where(hard_limits > 0, exposure / hard_limits, 0.0)
+
+        client_ids = np.array(self._client_ids, dtype=np.int64)
+        instrument_ids = np.array(self._instrument_ids, dtype=np.int64)
+        client_order = np.argsort(-exposure.sum(axis=1), kind="stable")
+        instrument_order = np.argsort(-exposure.sum(axis=0), kind="stable")
+        exposure = exposure[client_order][:, instrument_order]
+        utilization = utilization[client_order][:, instrument_order]
+        client_ids = client_ids[client_order]
+        instrument_ids = instrument_ids[instrument_order]
+
+        client_labels = [self._client_names.get(i, f"Client {i}") for i in client_ids.tolist()]
+        instrument_labels = [
+            self._instrument_symbols.get(i, f"Instrument {i}") for i in instrument_ids.tolist()
+        ]
+        client_ids, client_labels, exposure, utilization, clients_folded = _fold(
+            client_ids, client_labels, exposure, utilization, max_clients, axis=0
+        )
+        instrument_ids, instrument_labels, exposure, utilization, instruments_folded = _fold(
+            instrument_ids, instrument_labels, exposure, utilization, max_instruments, axis=1
+        )
+
+        return {
+            "client_ids": client_ids.tolist(),
+            "client_names": client_labels,
+            "instrument_ids": instrument_ids.tolist(),
+            "instrument_symbols": instrument_labels,
+            "exposure_usd": np.rint(exposure).astype(np.int64).ravel(),
+            "utilization": np.round(utilization, 4).ravel(),
+            "max_exposure_usd": float(exposure.max()) if exposure.size else 0.0,
+            "folded_clients": clients_folded,
+            "folded_instruments": instruments_folded,
+        }
+
+
+def _fold(
+    ids: np.ndarray,
+    labels: list[str],
+    exposure: np.ndarray,
+    utilization: np.ndarray,
+    limit: int,
+    *,
+    axis: int,
+) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray, int]:
+    # Axes are sorted by total exposure, so downsampling keeps the largest entries and folds
+    # the tail into one "Other" bucket (id 0) that sums exposure and keeps the worst utilization.
+    count = len(ids)
+    if count <= limit:
+        return ids, labels, exposure, utilization, 0
+    keep = max(limit - 1, 0)
+    kept = (slice(None), slice(0, keep)) if axis else (slice(0, keep), slice(None))
+    tail = (slice(None), slice(keep, None)) if axis else (slice(keep, None), slice(None))
+    exposure = np.concatenate(
+        [exposure[kept], exposure[tail].sum(axis=axis, keepdims=True)], axis=axis
+    )
+    utilization = np.concatenate(
+        [utilization[kept], utilization[tail].max(axis=axis, keepdims=True)], axis=axis
+    )
+    folded = count - keep
+    ids = np.append(ids[:keep], 0)
+    return ids, [*labels[:keep], f"Other ({folded})"], exposure, utilization, folded
+
+
+exposure_matrix = ExposureMatrix()
+mtm_engine.add_listener(exposure_matrix.on_position)
+domain_events.subscribe(exposure_matrix.on_event)
@@ -0,0 +1,272 @@
+import asyncio
+import csv
+import random
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.config import settings
+
+DEFAULT_MIDS = {
+    "BTC-USD": 52000.0,
+    "ETH-USD": 2800.0,
+    "SOL-USD": 115.0,
+    "ADA-USD": 0.64,
+}
+
+# Binary tick record: epoch ms, symbol, exchange, bid, ask, size (64 bytes, little-endian).
+# A size of 0 marks a tick without size; CSV files may leave the size column out instead.
+TICK_RECORD = struct.Struct("<q16s16sddd")
+CSV_FIELDS = ["ts", "symbol", "exchange", "bid", "ask", "size"]
+
+VENUE_SKIP_PROBABILITY = 0.2
+
+MIN_REPLAY_SPEED = 1.0
+MAX_REPLAY_SPEED = 1000.0
+
+
+@dataclass(slots=True)
+class FeedTick:
+    symbol: str
+    exchange: str
+    bid: float
+    ask: float
+    size: float
+    ts: datetime
+
+
+class FeedAdapter(ABC):
+    name: str = "abstract"
+
+    @abstractmethod
+    def stream(self, symbols: list[str]) -> AsyncIterator[list[FeedTick]]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class SyntheticFeed(FeedAdapter):
+    name = "synthetic"
+
+    def __init__(self, tick_seconds: float, exchanges: list[str] | None = None) -> None:
+        self._tick_seconds = tick_seconds
+        self._exchanges = exchanges or ["coinbase", "kraken", "binance"]
+        self._mid_cache: dict[str, float] = dict(DEFAULT_MIDS)
+
+    async def stream(self, symbols: list[str]) -> AsyncIterator[list[FeedTick]]:
+        while True:
+            now = datetime.now(timezone.utc)
+            batch: list[FeedTick] = []
+            for symbol in symbols:
+                base_mid = self._mid_cache.get(symbol, random.uniform(50, 50000))
+                drift = random.uniform(-0.0015, 0.0015)
+                mid = max(base_mid * (1 + drift), 0.0001)
+                self._mid_cache[symbol] = mid
+
+                # Every venue quotes around the common mid with its own offset and spread;
+                # a venue sits out a tick now and then, as real venues do.
+                for exchange in self._exchanges:
+                    if random.random() < VENUE_SKIP_PROBABILITY:
+                        continue
+                    venue_mid = mid * (1 + random.uniform(-2.0, 2.0) / 10_000)
+                    spread_bps = random.uniform(4.0, 25.0)
+                    batch.append(
+                        FeedTick(
+                            symbol=symbol,
+                            exchange=exchange,
+                            bid=venue_mid * (1 - spread_bps / 20_000),
+                            ask=venue_mid * (1 + spread_bps / 20_000),
+                            size=random.uniform(0.1, 25.0),
+                            ts=now,
+                        )
+                    )
+            yield batch
+            await asyncio.sleep(self._tick_seconds)
+
+
+def _decode_text(raw: bytes) -> str:
+    return raw.rstrip(b"\x00").decode()
+
+
+def _iter_csv_ticks(path: Path) -> Iterator[FeedTick]:
+    with path.open(newline="") as handle:
+        for row in csv.DictReader(handle):
+            ts = datetime.fromisoformat(row["ts"])
+            if ts.tzinfo is None:
+                ts = ts.replace(tzinfo=timezone.utc)
+            yield FeedTick(
+                symbol=row["symbol"],
+                exchange=row.get("exchange") or "replay",
+                bid=float(row["bid"]),
+                ask=float(row["ask"]),
+                size=float(row.get("size") or 0.0),
+                ts=ts,
+            )
+
+
+def _iter_binary_ticks(path: Path, chunk_records: int = 4096) -> Iterator[FeedTick]:
+    with path.open("rb") as handle:
+        while True:
+            chunk = handle.read(TICK_RECORD.size * chunk_records)
+            if not chunk:
+                return
+            usable = len(chunk) - len(chunk) % TICK_RECORD.size
+            for ts_ms, symbol, exchange, bid, ask, size in TICK_RECORD.iter_unpack(chunk[:usable]):
+                yield FeedTick(
+                    symbol=_decode_text(symbol),
+                    exchange=_decode_text(exchange),
+                    bid=bid,
+                    ask=ask,
+                    size=size,
+                    ts=datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc),
+                )
+
+
+def iter_tick_file(path: Path) -> Iterator[FeedTick]:
+    if path.suffix.lower() == ".csv":
+        return _iter_csv_ticks(path)
+    return _iter_binary_ticks(path)
+
+
+class TickFileWriter:
+    # Appends ticks in chunks so recordings larger than memory can be written as they are read.
+    def __init__(self, path: Path, *, sized: bool = True) -> None:
+        self._csv = path.suffix.lower() == ".csv"
+        self._sized = sized
+        self._handle = path.open("w", newline="") if self._csv else path.open("wb")
+        self._writer = csv.writer(self._handle) if self._csv else None
+        self.count = 0
+        if self._writer is not None:
+            self._writer.writerow(CSV_FIELDS if sized else CSV_FIELDS[:-1])
+
+    def write(self, ticks: Iterable[FeedTick]) -> None:
+        for tick in ticks:
+            if self._writer is not None:
+                row = [tick.ts.isoformat(), tick.symbol, tick.exchange, tick.bid, tick.ask]
+                self._writer.writerow([*row, tick.size] if self._sized else row)
+            else:
+                self._handle.write(
+                    TICK_RECORD.pack(
+                        int(tick.ts.timestamp() * 1000),
+                        tick.symbol.encode()[:16],
+                        tick.exchange.encode()[:16],
+                        tick.bid,
+                        tick.ask,
+                        tick.size if self._sized else 0.0,
+                    )
+                )
+            self.count += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "TickFileWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def write_tick_file(path: Path, ticks: Iterable[FeedTick]) -> int:
+    with TickFileWriter(path) as writer:
+        writer.write(ticks)
+    return writer.count
+
+
+class ReplayFeed(FeedAdapter):
+    name = "replay"
+
+    def __init__(
+        self,
+        path: str | Path,
+        speed: float = 1.0,
+        *,
+        loop: bool = False,
+        max_batch: int = 500,
+        read_chunk: int = 2000,
+    ) -> None:
+        self._path = Path(path)
+        self._speed = max(MIN_REPLAY_SPEED, min(MAX_REPLAY_SPEED, speed))
+        self._loop = loop
+        self._max_batch = max_batch
+        self._read_chunk = read_chunk
+
+    async def _chunks(self) -> AsyncIterator[list[FeedTick]]:
+        ticks = iter_tick_file(self._path)
+
+        def read_chunk() -> list[FeedTick]:
+            chunk: list[FeedTick] = []
+            for tick in ticks:
+                chunk.append(tick)
+                if len(chunk) >= self._read_chunk:
+                    break
+            return chunk
+
+        while True:
+            chunk = await asyncio.to_thread(read_chunk)
+            if not chunk:
+                return
+            yield chunk
+
+    async def stream(self, symbols: list[str]) -> AsyncIterator[list[FeedTick]]:
+        # Ticks are re-stamped onto the wall clock, keeping their spacing scaled by the speed, so
+        # replayed rows become the latest prices and every pass of a loop moves time forward.
+        wanted = set(symbols)
+        last_stamp = 0.0
+
+        while True:
+            first_ts: float | None = None
+            wall_start = time.monotonic()
+            epoch_start = max(time.time(), last_stamp + 0.001)
+            batch: list[FeedTick] = []
+
+            async for chunk in self._chunks():
+                for tick in chunk:
+                    if wanted and tick.symbol not in wanted:
+                        continue
+                    tick_ts = tick.ts.timestamp()
+                    if first_ts is None:
+                        first_ts = tick_ts
+
+                    due = wall_start + (tick_ts - first_ts) / self._speed
+                    delay = due - time.monotonic()
+                    if delay > 0 and batch:
+                        yield batch
+                        batch = []
+                        delay = due - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                    last_stamp = epoch_start + (tick_ts - first_ts) / self._speed
+                    tick.ts = datetime.fromtimestamp(last_stamp, tz=timezone.utc)
+                    batch.append(tick)
+                    if len(batch) >= self._max_batch:
+                        yield batch
+                        batch = []
+
+            if batch:
+                yield batch
+            if not self._loop:
+                return
+
+
+def build_feed_adapter() -> FeedAdapter:
+    if settings.market_feed == "synthetic":
+        return SyntheticFeed(settings.market_tick_seconds)
+    if settings.market_feed == "replay":
+        if not settings.market_replay_path:
+            raise ValueError("MARKET_REPLAY_PATH is required for the replay feed")
+        if not Path(settings.market_replay_path).is_file():
+            raise ValueError(f"MARKET_REPLAY_PATH {settings.market_replay_path} does not exist")
+        return ReplayFeed(
+            settings.market_replay_path,
+            settings.market_replay_speed,
+            loop=settings.market_replay_loop,
+            max_batch=settings.market_ingest_batch_size,
+        )
+    raise ValueError(f"Unknown market feed adapter: {settings.market_feed}")
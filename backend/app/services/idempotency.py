@@ -0,0 +1,157 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.models import IdempotencyKey
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+CacheKey = tuple[int, str, str]
+
+
+@dataclass(slots=True, frozen=True)
+class IdempotentRequest:
+    user_id: int
+    endpoint: str
+    key: str
+    request_hash: str
+
+    @property
+    def cache_key(self) -> CacheKey:
+        return self.user_id, self.endpoint, self.key
+
+
+@dataclass(slots=True, frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    body: dict
+    created_at: datetime
+
+
+class IdempotencyStore:
+    # Responses to keyed requests are stored in the same transaction as the work they describe,
+    # so a retry either finds the committed response or redoes the work from scratch. Recent keys
+    # are replayed from an LRU without touching Postgres.
+    def __init__(self, max_entries: int, ttl: timedelta) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[CacheKey, StoredResponse] = OrderedDict()
+
+    def request(
+        self, user_id: int, endpoint: str, key: str | None, payload: BaseModel
+    ) -> IdempotentRequest | None:
+        if not key:
+            return None
+        request_hash = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+        return IdempotentRequest(user_id, endpoint, key, request_hash)
+
+    def _remember(self, cache_key: CacheKey, stored: StoredResponse) -> None:
+        self._entries[cache_key] = stored
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, db: AsyncSession, idem: IdempotentRequest) -> StoredResponse | None:
+        stored = self._entries.get(idem.cache_key)
+        if stored is not None:
+            self._entries.move_to_end(idem.cache_key)
+            return stored
+        row = (
+            await db.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == idem.user_id,
+                    IdempotencyKey.endpoint == idem.endpoint,
+                    IdempotencyKey.key == idem.key,
+                )
+            )
+        ).scalar_one_or_none()
+        if row is None:
+            return None
+        stored = StoredResponse(row.request_hash, row.status_code, row.response, row.created_at)
+        self._remember(idem.cache_key, stored)
+        return stored
+
+    async def replay(
+        self, db: AsyncSession, idem: IdempotentRequest | None
+    ) -> FastJSONResponse | None:
+        if idem is None:
+            return None
+        stored = await self._load(db, idem)
+        if stored is None:
+            return None
+        if stored.created_at < datetime.now(timezone.utc) - self._ttl:
+            # An expired key is free to be reused; its row is replaced in this transaction.
+            self._entries.pop(idem.cache_key, None)
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == idem.user_id,
+                    IdempotencyKey.endpoint == idem.endpoint,
+                    IdempotencyKey.key == idem.key,
+                )
+            )
+            return None
+        if stored.request_hash != idem.request_hash:
+            raise HTTPException(
+                status_code=422, detail="Idempotency-Key was already used with a different request"
+            )
+        return FastJSONResponse(
+            stored.body, status_code=stored.status_code, headers={REPLAY_HEADER: "true"}
+        )
+
+    async def commit(
+        self,
+        db: AsyncSession,
+        idem: IdempotentRequest | None,
+        body: dict,
+        status_code: int = 200,
+    ) -> FastJSONResponse | None:
+        # A concurrent request with the same key that committed first makes this commit fail on
+        # the unique key; the work is rolled back and that request's response is returned instead.
+        if idem is not None:
+            db.add(
+                IdempotencyKey(
+                    user_id=idem.user_id,
+                    endpoint=idem.endpoint,
+                    key=idem.key,
+                    request_hash=idem.request_hash,
+                    status_code=status_code,
+                    response=body,
+                )
+            )
+        try:
+            await db.commit()
+        except IntegrityError:
+            if idem is None:
+                raise
+            await db.rollback()
+            replay = await self.replay(db, idem)
+            if replay is None:
+                raise
+            return replay
+        if idem is not None:
+            self._remember(
+                idem.cache_key,
+                StoredResponse(idem.request_hash, status_code, body, datetime.now(timezone.utc)),
+            )
+        return None
+
+    async def prune(self, db: AsyncSession) -> None:
+        cutoff = datetime.now(timezone.utc) - self._ttl
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+        await db.commit()
+
+
+idempotency = IdempotencyStore(
+    max_entries=settings.idempotency_cache_size,
+    ttl=timedelta(hours=settings.idempotency_ttl_hours),
+)
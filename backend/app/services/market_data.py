@@ -1,100 +1,219 @@
 import asyncio
-import random
-from datetime import datetime, timezone
+import logging
+import time
+from collections.abc import Awaitable, Callable
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 
 from app.core.config import settings
 from app.db import AsyncSessionLocal
 from app.models import Instrument, MarketPrice
+from app.services.feeds import FeedAdapter, FeedTick, build_feed_adapter
+from app.services.estimators import tick_estimators
+from app.services.events import PRICES_TICKED, domain_events
+from app.services.venue_book import InstrumentBook, venue_books
 from app.services.ws import manager
 
 
+CONSOLIDATED_VENUE = "consolidated"
+
+logger = logging.getLogger("uvicorn.error")
+
+TickListener = Callable[[dict[int, dict]], Awaitable[None]]
+
+
 class MarketDataService:
-    def __init__(self) -> None:
-        self._task: asyncio.Task | None = None
+    def __init__(self, adapter: FeedAdapter | None = None) -> None:
+        self._adapter = adapter
+        self._tasks: list[asyncio.Task] = []
         self._running = False
-        self._mid_cache: dict[str, float] = {
-            "BTC-USD": 52000.0,
-            "ETH-USD": 2800.0,
-            "SOL-USD": 115.0,
-            "ADA-USD": 0.64,
-        }
+        self._queue: asyncio.Queue[list[FeedTick]] = asyncio.Queue(
+            maxsize=settings.market_ingest_queue_size
+        )
+        self._instrument_ids: dict[str, int] = {}
+        self._instruments_loaded_at = 0.0
+        self._listeners: list[TickListener] = []
+        self.feed_error: str | None = None
+        self.ingest_failures = 0
+        self._crossed: set[int] = set()
+
+    def add_listener(self, listener: TickListener) -> None:
+        self._listeners.append(listener)
+
+    def set_adapter(self, adapter: FeedAdapter) -> None:
+        self._adapter = adapter
 
     async def start(self) -> None:
         if self._running:
             return
+        if self._adapter is None:
+            self._adapter = build_feed_adapter()
+
+        if not self._instrument_ids:
+            await self._load_instruments()
         self._running = True
-        self._task = asyncio.create_task(self._run(), name="market-data-loop")
+        self._tasks = [
+            asyncio.create_task(self._produce(), name=f"market-feed-{self._adapter.name}"),
+            asyncio.create_task(self._ingest(), name="market-data-ingest"),
+        ]
 
     async def stop(self) -> None:
         self._running = False
-        if self._task:
-            self._task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
             try:
-                await self._task
+                await task
             except asyncio.CancelledError:
                 pass
+        self._tasks = []
+        if self._adapter:
+            await self._adapter.close()
+
+    async def warm(self) -> None:
+        await self._load_instruments()
+
+    async def _load_instruments(self) -> None:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(Instrument.symbol, Instrument.id).where(Instrument.is_active.is_(True))
+                )
+            ).all()
+        self._instrument_ids = {symbol: instrument_id for symbol, instrument_id in rows}
+        self._instruments_loaded_at = time.monotonic()
+
+    async def _produce(self) -> None:
+        assert self._adapter is not None
+        try:
+            async for batch in self._adapter.stream(list(self._instrument_ids)):
+                if not self._running:
+                    break
+                await self._queue.put(batch)
+        except Exception as exc:
+            # Prices stop until a restart; /health reports the feed as down meanwhile.
+            self.feed_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Market feed %s stopped", self._adapter.name)
+            return
+        if self._running:
+            self.feed_error = "feed ended"
+            logger.warning("Market feed %s ended", self._adapter.name)
 
-    async def _run(self) -> None:
-        exchanges = ["coinbase", "kraken", "binance"]
+    async def _drain(self) -> list[FeedTick]:
+        ticks = list(await self._queue.get())
+        while len(ticks) < settings.market_ingest_batch_size:
+            try:
+                ticks.extend(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return ticks
 
+    async def _ingest(self) -> None:
         while self._running:
+            ticks = await self._drain()
             try:
-                async with AsyncSessionLocal() as db:
-                    instruments_result = await db.execute(
-                        select(Instrument).where(Instrument.is_active.is_(True))
+                await self._ingest_batch(ticks)
+            except Exception:
+                self.ingest_failures += 1
+                logger.exception("Dropped a market data batch of %d ticks", len(ticks))
+
+    async def _ingest_batch(self, ticks: list[FeedTick]) -> None:
+        if any(tick.symbol not in self._instrument_ids for tick in ticks) and (
+            time.monotonic() - self._instruments_loaded_at > 30
+        ):
+            await self._load_instruments()
+
+        # Venue quotes update the per-instrument books and the volume-weighted VWAP one by one;
+        # each instrument then records a single consolidated row per batch.
+        touched: dict[int, tuple[FeedTick, InstrumentBook, float]] = {}
+        inverted = 0
+        for tick in ticks:
+            instrument_id = self._instrument_ids.get(tick.symbol)
+            if instrument_id is None:
+                continue
+            if tick.bid > tick.ask:
+                inverted += 1
+                continue
+            ts = tick.ts.timestamp()
+            book = venue_books.update(
+                instrument_id, tick.exchange, tick.bid, tick.ask, tick.size, ts
+            )
+            vwap = tick_estimators.update_vwap(
+                instrument_id, ts, (tick.bid + tick.ask) / 2, tick.size
+            )
+            touched[instrument_id] = (tick, book, vwap)
+        if inverted:
+            logger.warning("Dropped %d venue quotes with bid above ask", inverted)
+
+        rows: list[dict] = []
+        latest: dict[int, dict] = {}
+        for instrument_id, (tick, book, vwap) in touched.items():
+            # Venues crossing each other leave no sensible consolidated price; the last one
+            # stands until the book uncrosses.
+            if book.crossed:
+                if instrument_id not in self._crossed:
+                    self._crossed.add(instrument_id)
+                    logger.warning(
+                        "Book for %s crossed (bid %s on %s, ask %s on %s); holding the last price",
+                        tick.symbol,
+                        book.best_bid,
+                        book.best_bid_venue,
+                        book.best_ask,
+                        book.best_ask_venue,
                     )
-                    instruments = instruments_result.scalars().all()
-
-                    for instrument in instruments:
-                        base_mid = self._mid_cache.get(instrument.symbol, random.uniform(50, 50000))
-                        drift = random.uniform(-0.0015, 0.0015)
-                        mid = max(base_mid * (1 + drift), 0.0001)
-                        self._mid_cache[instrument.symbol] = mid
-
-                        spread_bps = random.uniform(4.0, 25.0)
-                        bid = mid * (1 - spread_bps / 20_000)
-                        ask = mid * (1 + spread_bps / 20_000)
-                        vwap = mid * (1 + random.uniform(-0.0007, 0.0007))
-                        vol = random.uniform(0.01, 0.08)
-
-                        tick = MarketPrice(
-                            instrument_id=instrument.id,
-                            exchange=random.choice(exchanges),
-                            bid=round(bid, 8),
-                            ask=round(ask, 8),
-                            mid=round(mid, 8),
-                            spread_bps=round(spread_bps, 4),
-                            rolling_vwap=round(vwap, 8),
-                            volatility_5m=round(vol, 6),
-                            ts=datetime.now(timezone.utc),
-                        )
-                        db.add(tick)
-
-                        await manager.broadcast(
-                            "prices",
-                            {
-                                "channel": "prices",
-                                "data": {
-                                    "instrument_id": instrument.id,
-                                    "instrument_symbol": instrument.symbol,
-                                    "bid": round(bid, 8),
-                                    "ask": round(ask, 8),
-                                    "mid": round(mid, 8),
-                                    "spread_bps": round(spread_bps, 4),
-                                    "rolling_vwap": round(vwap, 8),
-                                    "volatility_5m": round(vol, 6),
-                                    "ts": datetime.now(timezone.utc).isoformat(),
-                                },
-                            },
-                        )
-
-                    await db.commit()
+                continue
+            self._crossed.discard(instrument_id)
+            mid = max(book.depth_weighted_mid, 0.0001)
+            spread_bps = (book.best_ask - book.best_bid) / mid * 10_000
+            vol = tick_estimators.update_volatility(instrument_id, tick.ts.timestamp(), mid)
+
+            row = {
+                "instrument_id": instrument_id,
+                "exchange": CONSOLIDATED_VENUE,
+                "bid": round(book.best_bid, 8),
+                "ask": round(book.best_ask, 8),
+                "mid": round(mid, 8),
+                "spread_bps": round(spread_bps, 4),
+                "rolling_vwap": round(vwap, 8),
+                "volatility_5m": round(vol, 6),
+                "ts": tick.ts,
+            }
+            rows.append(row)
+            latest[instrument_id] = {**row, "instrument_symbol": tick.symbol}
+
+        if not rows:
+            return
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(MarketPrice), rows)
+            await db.commit()
+        domain_events.publish(PRICES_TICKED, instrument_ids=tuple(latest))
+
+        # Fan-out is conflated to the last tick per instrument in each batch.
+        for data in latest.values():
+            await manager.broadcast(
+                "prices",
+                {
+                    "channel": "prices",
+                    "data": {
+                        "instrument_id": data["instrument_id"],
+                        "instrument_symbol": data["instrument_symbol"],
+                        "bid": data["bid"],
+                        "ask": data["ask"],
+                        "mid": data["mid"],
+                        "spread_bps": data["spread_bps"],
+                        "rolling_vwap": data["rolling_vwap"],
+                        "volatility_5m": data["volatility_5m"],
+                        "ts": data["ts"].isoformat(),
+                    },
+                },
+            )
+
+        for listener in self._listeners:
+            try:
+                await listener(latest)
             except Exception:
                 pass
 
-            await asyncio.sleep(settings.market_tick_seconds)
-
 
 market_data_service = MarketDataService()
@@ -0,0 +1,172 @@
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.analytics import latest_mid_map, position_rows
+from app.services.ws import manager
+
+PositionKey = tuple[int, int]
+
+# Revaluations smaller than this (in USD) are not worth a push.
+MIN_CHANGE_USD = 0.01
+
+
+@dataclass(slots=True)
+class MarkedPosition:
+    client_id: int
+    instrument_id: int
+    net_size: float
+    avg_price: float
+    mark_price: float
+    unrealized_pnl: float = 0.0
+    usd_exposure: float = 0.0
+
+    def revalue(self, mark_price: float) -> bool:
+        pnl = (mark_price - self.avg_price) * self.net_size
+        exposure = abs(self.net_size * mark_price)
+        changed = (
+            abs(pnl - self.unrealized_pnl) >= MIN_CHANGE_USD
+            or abs(exposure - self.usd_exposure) >= MIN_CHANGE_USD
+        )
+        self.mark_price = mark_price
+        self.unrealized_pnl = pnl
+        self.usd_exposure = exposure
+        return changed
+
+
+PositionListener = Callable[[MarkedPosition], None]
+
+
+class MTMEngine:
+    def __init__(self) -> None:
+        self._positions: dict[PositionKey, MarkedPosition] = {}
+        self._by_instrument: dict[int, set[PositionKey]] = {}
+        self._marks: dict[int, float] = {}
+        self._dirty: set[PositionKey] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._listeners: list[PositionListener] = []
+        # Bumped on every fill and mark change, so derived snapshots can tell when they are stale.
+        self.version = 0
+
+    def add_listener(self, listener: PositionListener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, position: MarkedPosition) -> None:
+        for listener in self._listeners:
+            listener(position)
+
+    async def load(self, db: AsyncSession, rows: list[Row] | None = None) -> None:
+        marks = await latest_mid_map(db)
+        if rows is None:
+            rows = await position_rows(db)
+        self._positions.clear()
+        self._by_instrument.clear()
+        self._marks = marks
+        self.version += 1
+        for client_id, instrument_id, net_size, avg_price, _ in rows:
+            self._upsert(client_id, instrument_id, float(net_size), float(avg_price))
+
+    def _upsert(
+        self, client_id: int, instrument_id: int, net_size: float, avg_price: float
+    ) -> MarkedPosition:
+        key = (client_id, instrument_id)
+        position = self._positions.get(key)
+        if position is None:
+            position = MarkedPosition(
+                client_id=client_id,
+                instrument_id=instrument_id,
+                net_size=net_size,
+                avg_price=avg_price,
+                mark_price=avg_price,
+            )
+            self._positions[key] = position
+            self._by_instrument.setdefault(instrument_id, set()).add(key)
+        else:
+            position.net_size = net_size
+            position.avg_price = avg_price
+        position.revalue(self._marks.get(instrument_id, avg_price))
+        self.version += 1
+        self._notify(position)
+        return position
+
+    def apply_fill(
+        self, client_id: int, instrument_id: int, net_size: float, avg_price: float
+    ) -> MarkedPosition:
+        # The booking path pushes the filled position itself, so fills are not queued here.
+        self._dirty.discard((client_id, instrument_id))
+        return self._upsert(client_id, instrument_id, net_size, avg_price)
+
+    async def on_ticks(self, ticks: dict[int, dict]) -> None:
+        for instrument_id, tick in ticks.items():
+            mark = float(tick["mid"])
+            if self._marks.get(instrument_id) == mark:
+                continue
+            self._marks[instrument_id] = mark
+            self.version += 1
+            # Only positions in the instrument that moved are revalued.
+            for key in self._by_instrument.get(instrument_id, ()):
+                position = self._positions[key]
+                if position.revalue(mark):
+                    self._notify(position)
+                    self._mark_dirty(key)
+
+    def positions(self) -> list[MarkedPosition]:
+        return list(self._positions.values())
+
+    def get(self, client_id: int, instrument_id: int) -> MarkedPosition | None:
+        return self._positions.get((client_id, instrument_id))
+
+    def mark(self, instrument_id: int) -> float | None:
+        return self._marks.get(instrument_id)
+
+    def client_pnl(self, client_id: int) -> float:
+        return sum(
+            position.unrealized_pnl
+            for position in self._positions.values()
+            if position.client_id == client_id
+        )
+
+    def _mark_dirty(self, key: PositionKey) -> None:
+        self._dirty.add(key)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later(), name="mtm-flush")
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(settings.mtm_push_interval_seconds)
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            position = self._positions.get(key)
+            if position is None:
+                continue
+            await manager.broadcast(
+                "positions",
+                {
+                    "channel": "positions",
+                    "type": "mtm",
+                    "data": {
+                        "client_id": position.client_id,
+                        "instrument_id": position.instrument_id,
+                        "net_size": position.net_size,
+                        "avg_price": position.avg_price,
+                        "mark_price": position.mark_price,
+                        "unrealized_pnl": round(position.unrealized_pnl, 2),
+                        "usd_exposure": round(position.usd_exposure, 2),
+                    },
+                },
+            )
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+
+mtm_engine = MTMEngine()
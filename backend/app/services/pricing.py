@@ -1,10 +1,27 @@
+import numpy as np
+
+from app.core.config import settings
 from app.models import TradeSide
 
 
+def default_mid(symbol: str) -> float:
+    defaults = {
+        "BTC-USD": 52000.0,
+        "ETH-USD": 2800.0,
+        "SOL-USD": 115.0,
+        "ADA-USD": 0.64,
+    }
+    return defaults.get(symbol, 1000.0)
+
+
 def clamp_expiry(expiry_seconds: int, lower: int, upper: int) -> int:
     return max(lower, min(upper, expiry_seconds))
 
 
+def side_sign(side: TradeSide) -> int:
+    return 1 if side == TradeSide.buy else -1
+
+
 def calculate_quote(
     *,
     mid_price: float,
@@ -18,9 +35,27 @@ def calculate_quote(
     return round(mid_price * (1 + (signed_bps / 10_000)), 2)
 
 
-def inventory_skew_bps(desk_inventory: float, side: TradeSide) -> float:
-    threshold = 250.0
-    max_skew = 25.0
+def volatility_spread_bps(volatility: float) -> float:
+    # Quotes widen by a share of the recent (horizon) volatility, capped so a spike cannot
+    # push prices off-market.
+    extra = volatility * 10_000 * settings.quote_vol_spread_factor
+    return round(max(0.0, min(settings.quote_vol_spread_max_bps, extra)), 2)
+
+
+def volatility_spread_bps_array(volatility: np.ndarray) -> np.ndarray:
+    extra = volatility * 10_000 * settings.quote_vol_spread_factor
+    return np.round(np.clip(extra, 0.0, settings.quote_vol_spread_max_bps), 2)
+
+
+def inventory_skew_bps(
+    desk_inventory: float,
+    side: TradeSide,
+    *,
+    threshold: float | None = None,
+    max_skew: float | None = None,
+) -> float:
+    threshold = settings.inventory_skew_threshold if threshold is None else threshold
+    max_skew = settings.inventory_max_skew_bps if max_skew is None else max_skew
     normalized = max(-1.0, min(1.0, desk_inventory / threshold))
 
     if side == TradeSide.buy:
@@ -29,3 +64,29 @@ def inventory_skew_bps(desk_inventory: float, side: TradeSide) -> float:
         raw = normalized * max_skew
 
     return round(raw, 2)
+
+
+# Array variants of the quoting model: `sides` holds +1 (buy) / -1 (sell) and all inputs broadcast.
+def calculate_quotes(
+    *,
+    mid_price: np.ndarray,
+    sides: np.ndarray,
+    spread_buffer_bps: float | np.ndarray,
+    inventory_skew_bps: np.ndarray,
+    client_markup_bps: float | np.ndarray,
+) -> np.ndarray:
+    total_bps = spread_buffer_bps + inventory_skew_bps + client_markup_bps
+    return np.round(mid_price * (1 + sides * total_bps / 10_000), 2)
+
+
+def inventory_skew_bps_array(
+    desk_inventory: np.ndarray,
+    sides: np.ndarray,
+    *,
+    threshold: float | np.ndarray | None = None,
+    max_skew: float | np.ndarray | None = None,
+) -> np.ndarray:
+    threshold = settings.inventory_skew_threshold if threshold is None else threshold
+    max_skew = settings.inventory_max_skew_bps if max_skew is None else max_skew
+    normalized = np.clip(desk_inventory / threshold, -1.0, 1.0)
+    return np.round(-sides * normalized * max_skew, 2)
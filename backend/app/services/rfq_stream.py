@@ -0,0 +1,198 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import Numeric, Uuid, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import Client, Instrument, Position, RFQRequest, RFQStatus, TradeSide
+from app.services.pricing import (
+    calculate_quotes,
+    inventory_skew_bps_array,
+    side_sign,
+    volatility_spread_bps,
+)
+from app.services.events import RFQ_REQUOTED, domain_events
+from app.services.ws import manager
+
+
+@dataclass(slots=True)
+class StreamedRFQ:
+    id: UUID
+    client_id: int
+    client_name: str
+    instrument_id: int
+    instrument_symbol: str
+    side: TradeSide
+    size: float
+    markup_bps: float
+    quoted_price: float
+    quote_expiry: datetime
+    created_at: datetime
+
+
+class RFQStreamService:
+    def __init__(self) -> None:
+        self._by_instrument: dict[int, dict[UUID, StreamedRFQ]] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        # Streams outlive the process in rfq_requests.streaming, so a restart resumes them.
+        rows = await db.execute(
+            select(RFQRequest, Client.name, Client.default_markup_bps, Instrument.symbol)
+            .join(Client, RFQRequest.client_id == Client.id)
+            .join(Instrument, RFQRequest.instrument_id == Instrument.id)
+            .where(
+                RFQRequest.streaming.is_(True),
+                RFQRequest.status == RFQStatus.quoted,
+                RFQRequest.quote_expiry > datetime.now(timezone.utc),
+            )
+        )
+        self._by_instrument.clear()
+        for rfq, client_name, markup_bps, instrument_symbol in rows.all():
+            self.register(
+                StreamedRFQ(
+                    id=rfq.id,
+                    client_id=rfq.client_id,
+                    client_name=client_name,
+                    instrument_id=rfq.instrument_id,
+                    instrument_symbol=instrument_symbol,
+                    side=rfq.side,
+                    size=float(rfq.size),
+                    markup_bps=markup_bps,
+                    quoted_price=float(rfq.quoted_price),
+                    quote_expiry=rfq.quote_expiry,
+                    created_at=rfq.created_at,
+                )
+            )
+
+    def register(self, rfq: StreamedRFQ) -> None:
+        self._by_instrument.setdefault(rfq.instrument_id, {})[rfq.id] = rfq
+
+    def discard(self, rfq_id: UUID, instrument_id: int) -> None:
+        streams = self._by_instrument.get(instrument_id)
+        if streams is None:
+            return
+        streams.pop(rfq_id, None)
+        if not streams:
+            del self._by_instrument[instrument_id]
+
+    def is_streaming(self, rfq_id: UUID, instrument_id: int) -> bool:
+        return rfq_id in self._by_instrument.get(instrument_id, {})
+
+    def active_count(self) -> int:
+        return sum(len(streams) for streams in self._by_instrument.values())
+
+    def _live_streams(self, instrument_ids: list[int]) -> dict[int, list[StreamedRFQ]]:
+        now = datetime.now(timezone.utc)
+        live: dict[int, list[StreamedRFQ]] = {}
+        for instrument_id in instrument_ids:
+            streams = self._by_instrument.get(instrument_id)
+            if not streams:
+                continue
+            for rfq_id in [key for key, rfq in streams.items() if rfq.quote_expiry <= now]:
+                del streams[rfq_id]
+            if streams:
+                live[instrument_id] = list(streams.values())
+            else:
+                del self._by_instrument[instrument_id]
+        return live
+
+    async def on_ticks(self, ticks: dict[int, dict]) -> None:
+        live = self._live_streams([key for key in ticks if key in self._by_instrument])
+        if not live:
+            return
+
+        async with AsyncSessionLocal() as db:
+            inventory_rows = await db.execute(
+                select(Position.instrument_id, func.coalesce(func.sum(Position.net_size), 0))
+                .where(Position.instrument_id.in_(list(live)))
+                .group_by(Position.instrument_id)
+            )
+            inventory_map = {
+                instrument_id: float(total) for instrument_id, total in inventory_rows.all()
+            }
+
+            requotes: dict[UUID, tuple[StreamedRFQ, float]] = {}
+            for instrument_id, rfqs in live.items():
+                spread_bps = settings.rfq_spread_buffer_bps + volatility_spread_bps(
+                    float(ticks[instrument_id]["volatility_5m"])
+                )
+                sides = np.array([side_sign(rfq.side) for rfq in rfqs], dtype=np.float64)
+                skew = inventory_skew_bps_array(
+                    np.full(sides.size, inventory_map.get(instrument_id, 0.0)), sides
+                )
+                quotes = calculate_quotes(
+                    mid_price=float(ticks[instrument_id]["mid"]),
+                    sides=sides,
+                    spread_buffer_bps=spread_bps,
+                    inventory_skew_bps=skew,
+                    client_markup_bps=np.array([rfq.markup_bps for rfq in rfqs]),
+                )
+                for rfq, quote in zip(rfqs, quotes.tolist()):
+                    if quote != rfq.quoted_price:
+                        requotes[rfq.id] = (rfq, quote)
+
+            if not requotes:
+                return
+
+            # Requotes leave updated_at alone so RFQ response-time analytics stay meaningful.
+            rfq_table = RFQRequest.__table__
+            new_prices = values(
+                column("id", Uuid), column("quoted_price", Numeric(24, 8)), name="requotes"
+            ).data([(rfq_id, quote) for rfq_id, (_, quote) in requotes.items()])
+            updated = await db.scalars(
+                update(rfq_table)
+                .where(
+                    rfq_table.c.id == new_prices.c.id,
+                    rfq_table.c.status == RFQStatus.quoted,
+                )
+                .values(quoted_price=new_prices.c.quoted_price, updated_at=rfq_table.c.updated_at)
+                .returning(rfq_table.c.id)
+            )
+            updated_ids = set(updated.all())
+            await db.commit()
+
+        # RFQs the update skipped were traded or expired, possibly by another worker.
+        changed: list[StreamedRFQ] = []
+        for rfq_id, (rfq, quote) in requotes.items():
+            if rfq_id in updated_ids:
+                rfq.quoted_price = quote
+                changed.append(rfq)
+            else:
+                self.discard(rfq_id, rfq.instrument_id)
+        if not changed:
+            return
+
+        domain_events.publish(
+            RFQ_REQUOTED,
+            entity_ids=tuple(rfq.id for rfq in changed),
+            client_ids=tuple({rfq.client_id for rfq in changed}),
+            instrument_ids=tuple({rfq.instrument_id for rfq in changed}),
+        )
+        for rfq in changed:
+            await manager.broadcast(
+                "rfq_updates",
+                {
+                    "channel": "rfq_updates",
+                    "data": {
+                        "id": str(rfq.id),
+                        "client_id": rfq.client_id,
+                        "client_name": rfq.client_name,
+                        "instrument_id": rfq.instrument_id,
+                        "instrument_symbol": rfq.instrument_symbol,
+                        "side": rfq.side.value,
+                        "size": rfq.size,
+                        "quoted_price": rfq.quoted_price,
+                        "quote_expiry": rfq.quote_expiry.isoformat(),
+                        "status": RFQStatus.quoted.value,
+                        "created_at": rfq.created_at.isoformat(),
+                        "streaming": True,
+                    },
+                },
+            )
+
+
+rfq_stream_service = RFQStreamService()
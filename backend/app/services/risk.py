@@ -35,29 +35,10 @@ async def get_effective_limit(
     return candidates[0]
 
 
-async def evaluate_trade_risk(
-    db: AsyncSession,
-    *,
-    client_id: int,
-    instrument_id: int,
-    side: TradeSide,
-    size: float,
-    price: float,
+def assess_exposure(
+    projected_exposure: float, soft_limit: float | None, hard_limit: float | None
 ) -> RiskCheckResult:
-    result = await db.execute(
-        select(Position).where(
-            Position.client_id == client_id, Position.instrument_id == instrument_id
-        )
-    )
-    position = result.scalar_one_or_none()
-    current_net = float(position.net_size) if position else 0.0
-
-    signed_size = size if side == TradeSide.buy else -size
-    projected_net = current_net + signed_size
-    projected_exposure = abs(projected_net * price)
-
-    limit = await get_effective_limit(db, client_id, instrument_id)
-    if limit is None:
+    if soft_limit is None or hard_limit is None:
         return RiskCheckResult(
             soft_breach=False,
             hard_breach=False,
@@ -65,8 +46,6 @@ async def evaluate_trade_risk(
             message="No active limit configured",
         )
 
-    soft_limit = float(limit.soft_limit_usd)
-    hard_limit = float(limit.hard_limit_usd)
     soft_breach = projected_exposure >= soft_limit
     hard_breach = projected_exposure >= hard_limit
 
@@ -86,6 +65,15 @@ async def evaluate_trade_risk(
     )
 
 
+def next_position(
+    net_size: float, avg_price: float, signed_size: float, price: float
+) -> tuple[float, float]:
+    new_net = net_size + signed_size
+    if abs(new_net) < 1e-12:
+        return new_net, 0.0
+    return new_net, (net_size * avg_price + signed_size * price) / new_net
+
+
 async def apply_trade_to_positions(
     db: AsyncSession,
     *,
@@ -115,17 +103,9 @@ async def apply_trade_to_positions(
         db.add(position)
         return position
 
-    old_net = float(position.net_size)
-    old_avg = float(position.avg_price)
-    new_net = old_net + signed_size
-
-    if abs(new_net) < 1e-12:
-        new_avg = 0.0
-    else:
-        old_cost = old_net * old_avg
-        new_cost = old_cost + (signed_size * price)
-        new_avg = new_cost / new_net
-
+    new_net, new_avg = next_position(
+        float(position.net_size), float(position.avg_price), signed_size, price
+    )
     position.net_size = new_net
     position.avg_price = new_avg
     position.usd_exposure = abs(new_net * price)
@@ -0,0 +1,237 @@
+import asyncio
+from dataclasses import dataclass
+
+from sqlalchemy import Row, case, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import Position, RiskLimit, TradeSide
+from app.schemas import RiskCheckResult
+from app.services.analytics import position_rows
+from app.services.events import LIMIT_UPDATED, DomainEvent, domain_events
+from app.services.risk import assess_exposure
+
+PositionKey = tuple[int, int]
+LimitKey = tuple[int | None, int | None]
+
+
+@dataclass(slots=True, frozen=True)
+class PositionState:
+    client_id: int
+    instrument_id: int
+    net_size: float
+    avg_price: float
+    usd_exposure: float
+
+
+@dataclass(slots=True, frozen=True)
+class LimitState:
+    soft_limit_usd: float
+    hard_limit_usd: float
+
+
+class RiskEngine:
+    def __init__(self) -> None:
+        self._positions: dict[PositionKey, PositionState] = {}
+        self._limits: dict[LimitKey, LimitState] = {}
+        self._locks: dict[PositionKey, asyncio.Lock] = {}
+        self._limit_rows: dict[int, tuple] = {}
+        self._wake = asyncio.Event()
+        self._poll_task: asyncio.Task | None = None
+        self.limits_version = 0
+
+    async def load(self, db: AsyncSession, rows: list[Row] | None = None) -> None:
+        if rows is None:
+            rows = await position_rows(db)
+        self._positions = {
+            (client_id, instrument_id): PositionState(
+                client_id=client_id,
+                instrument_id=instrument_id,
+                net_size=float(net_size),
+                avg_price=float(avg_price),
+                usd_exposure=float(usd_exposure),
+            )
+            for client_id, instrument_id, net_size, avg_price, usd_exposure in rows
+        }
+        await self._load_limits(db)
+
+    async def _load_limits(self, db: AsyncSession) -> set[int]:
+        rows = (
+            await db.execute(
+                select(
+                    RiskLimit.id,
+                    RiskLimit.client_id,
+                    RiskLimit.instrument_id,
+                    RiskLimit.soft_limit_usd,
+                    RiskLimit.hard_limit_usd,
+                    RiskLimit.active,
+                )
+            )
+        ).all()
+        limit_rows = {row[0]: tuple(row[1:]) for row in rows}
+        changed = {
+            limit_id
+            for limit_id in limit_rows.keys() | self._limit_rows.keys()
+            if limit_rows.get(limit_id) != self._limit_rows.get(limit_id)
+        }
+        limits: dict[LimitKey, LimitState] = {}
+        for client_id, instrument_id, soft_limit, hard_limit, active in limit_rows.values():
+            if not active:
+                continue
+            limit = LimitState(float(soft_limit), float(hard_limit))
+            # The unique constraint treats NULL scopes as distinct, so client-wide, instrument-wide
+            # and global limits can repeat; the tightest of them applies.
+            current = limits.get((client_id, instrument_id))
+            if current is not None:
+                limit = LimitState(
+                    min(current.soft_limit_usd, limit.soft_limit_usd),
+                    min(current.hard_limit_usd, limit.hard_limit_usd),
+                )
+            limits[client_id, instrument_id] = limit
+        self._limits = limits
+        self._limit_rows = limit_rows
+        if changed:
+            self.limits_version += 1
+        return changed
+
+    async def refresh_limits(self, db: AsyncSession) -> None:
+        # The limits table is small, so a reload diffs every row; edits that keep counts, sums
+        # and timestamps (e.g. a moved client_id) are still seen. Changes are announced so
+        # caches, ETags and the exposure matrix follow.
+        changed = await self._load_limits(db)
+        if changed:
+            domain_events.publish(LIMIT_UPDATED, entity_ids=tuple(sorted(changed)))
+
+    async def _poll_limits(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.limits_poll_seconds)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.refresh_limits(db)
+            except Exception:
+                pass
+
+    async def start(self) -> None:
+        # Checks never query limits. Edits made through the API reload them immediately; edits
+        # made by other workers or directly in the DB arrive within one poll interval.
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll_limits(), name="risk-limits-poll")
+
+    async def stop(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+    def on_event(self, event: DomainEvent) -> None:
+        if event.name == LIMIT_UPDATED:
+            self._wake.set()
+
+    def lock(self, client_id: int, instrument_id: int) -> asyncio.Lock:
+        # Checks and fills for the same position are serialized from check to commit, so two
+        # concurrent bookings cannot both pass against the same pre-trade exposure.
+        key = (client_id, instrument_id)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def position(self, client_id: int, instrument_id: int) -> PositionState | None:
+        return self._positions.get((client_id, instrument_id))
+
+    def effective_limit(self, client_id: int, instrument_id: int) -> LimitState | None:
+        for key in (
+            (client_id, instrument_id),
+            (client_id, None),
+            (None, instrument_id),
+            (None, None),
+        ):
+            limit = self._limits.get(key)
+            if limit is not None:
+                return limit
+        return None
+
+    def assess(
+        self, *, client_id: int, instrument_id: int, net_size: float, price: float
+    ) -> RiskCheckResult:
+        projected_exposure = abs(net_size * price)
+        limit = self.effective_limit(client_id, instrument_id)
+        if limit is None:
+            return assess_exposure(projected_exposure, None, None)
+        return assess_exposure(projected_exposure, limit.soft_limit_usd, limit.hard_limit_usd)
+
+    def check(
+        self, *, client_id: int, instrument_id: int, side: TradeSide, size: float, price: float
+    ) -> RiskCheckResult:
+        position = self._positions.get((client_id, instrument_id))
+        current_net = position.net_size if position else 0.0
+        signed_size = size if side == TradeSide.buy else -size
+        return self.assess(
+            client_id=client_id,
+            instrument_id=instrument_id,
+            net_size=current_net + signed_size,
+            price=price,
+        )
+
+    async def write_fill(
+        self,
+        db: AsyncSession,
+        *,
+        client_id: int,
+        instrument_id: int,
+        side: TradeSide,
+        size: float,
+        price: float,
+    ) -> PositionState:
+        signed_size = size if side == TradeSide.buy else -size
+        stmt = insert(Position).values(
+            client_id=client_id,
+            instrument_id=instrument_id,
+            net_size=signed_size,
+            avg_price=price,
+            usd_exposure=abs(signed_size * price),
+        )
+        # The fill is applied to the stored row in SQL (same arithmetic as next_position), so
+        # the result never depends on this process having seen every earlier fill.
+        new_net = Position.net_size + stmt.excluded.net_size
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_position_client_instrument",
+            set_={
+                "net_size": new_net,
+                "avg_price": case(
+                    (func.abs(new_net) < 1e-12, 0),
+                    else_=(
+                        Position.net_size * Position.avg_price
+                        + stmt.excluded.net_size * stmt.excluded.avg_price
+                    )
+                    / new_net,
+                ),
+                "usd_exposure": func.abs(new_net * stmt.excluded.avg_price),
+                "updated_at": func.now(),
+            },
+        ).returning(Position.net_size, Position.avg_price, Position.usd_exposure)
+        net_size, avg_price, usd_exposure = (await db.execute(stmt)).one()
+        return PositionState(
+            client_id=client_id,
+            instrument_id=instrument_id,
+            net_size=float(net_size),
+            avg_price=float(avg_price),
+            usd_exposure=float(usd_exposure),
+        )
+
+    def commit_fill(self, state: PositionState) -> None:
+        # Called only after the booking transaction commits, so a rollback leaves memory untouched.
+        self._positions[(state.client_id, state.instrument_id)] = state
+
+
+risk_engine = RiskEngine()
+domain_events.subscribe(risk_engine.on_event)
@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.services.mtm import mtm_engine
+from app.services.risk_engine import risk_engine
+
+
+@dataclass(slots=True, frozen=True)
+class ScenarioShocks:
+    name: str
+    default_shock: float
+    shocks: dict[int, float]
+
+
+@dataclass(slots=True)
+class PositionBook:
+    # Positions are ordered by client so per-client sums are a single reduceat over contiguous runs.
+    key: tuple[int, int]
+    client_ids: np.ndarray
+    instrument_ids: np.ndarray
+    client_axis: np.ndarray
+    client_starts: np.ndarray
+    instrument_axis: np.ndarray
+    instrument_index: np.ndarray
+    instrument_order: np.ndarray
+    instrument_starts: np.ndarray
+    market_value: np.ndarray
+    soft_limits: np.ndarray
+    hard_limits: np.ndarray
+
+
+class ScenarioEngine:
+    def __init__(self) -> None:
+        self._book: PositionBook | None = None
+
+    def snapshot_key(self) -> tuple[int, int]:
+        return mtm_engine.version, risk_engine.limits_version
+
+    def book(self) -> PositionBook:
+        key = self.snapshot_key()
+        if self._book is not None and self._book.key == key:
+            return self._book
+
+        positions = sorted(
+            mtm_engine.positions(), key=lambda position: (position.client_id, position.instrument_id)
+        )
+        client_ids = np.array([position.client_id for position in positions], dtype=np.int64)
+        instrument_ids = np.array([position.instrument_id for position in positions], dtype=np.int64)
+        market_value = np.array(
+            [position.net_size * position.mark_price for position in positions], dtype=np.float64
+        )
+        soft_limits = np.full(len(positions), np.nan)
+        hard_limits = np.full(len(positions), np.nan)
+        for i, position in enumerate(positions):
+            limit = risk_engine.effective_limit(position.client_id, position.instrument_id)
+            if limit is not None:
+                soft_limits[i] = limit.soft_limit_usd
+                hard_limits[i] = limit.hard_limit_usd
+
+        client_axis, client_starts = np.unique(client_ids, return_index=True)
+        instrument_axis, instrument_index = np.unique(instrument_ids, return_inverse=True)
+        instrument_order = np.argsort(instrument_index, kind="stable")
+        instrument_starts = np.searchsorted(
+            instrument_index[instrument_order], np.arange(len(instrument_axis))
+        )
+
+        self._book = PositionBook(
+            key=key,
+            client_ids=client_ids,
+            instrument_ids=instrument_ids,
+            client_axis=client_axis,
+            client_starts=client_starts,
+            instrument_axis=instrument_axis,
+            instrument_index=instrument_index,
+            instrument_order=instrument_order,
+            instrument_starts=instrument_starts,
+            market_value=market_value,
+            soft_limits=soft_limits,
+            hard_limits=hard_limits,
+        )
+        return self._book
+
+    def run(self, book: PositionBook, scenarios: list[ScenarioShocks], max_breaches: int) -> dict:
+        instrument_column = {
+            instrument_id: col for col, instrument_id in enumerate(book.instrument_axis.tolist())
+        }
+        shocks = np.repeat(
+            np.array([[scenario.default_shock] for scenario in scenarios]),
+            len(book.instrument_axis),
+            axis=1,
+        )
+        for row, scenario in enumerate(scenarios):
+            for instrument_id, shock in scenario.shocks.items():
+                col = instrument_column.get(instrument_id)
+                if col is not None:
+                    shocks[row, col] = shock
+
+        # scenarios x positions: P&L is the shocked move in market value, exposure is the
+        # absolute shocked market value checked against each position's effective limit.
+        position_shocks = shocks[:, book.instrument_index]
+        pnl = position_shocks * book.market_value
+        shocked_exposure = np.abs(book.market_value + pnl)
+        with np.errstate(invalid="ignore"):
+            hard_breach = shocked_exposure >= book.hard_limits
+            soft_breach = (shocked_exposure >= book.soft_limits) & ~hard_breach
+
+        if len(book.market_value):
+            pnl_by_client = np.add.reduceat(pnl, book.client_starts, axis=1)
+            pnl_by_instrument = np.add.reduceat(
+                pnl[:, book.instrument_order], book.instrument_starts, axis=1
+            )
+        else:
+            pnl_by_client = np.zeros((len(scenarios), 0))
+            pnl_by_instrument = np.zeros((len(scenarios), 0))
+
+        # Breaches for all scenarios at once, worst first relative to the hard limit, capped per
+        # scenario by ranking within each row after a single lexsort.
+        rows, cols = np.nonzero(hard_breach | soft_breach)
+        ratios = shocked_exposure[rows, cols] / book.hard_limits[cols]
+        order = np.lexsort((-ratios, rows))
+        rows, cols = rows[order], cols[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+        keep = rank < max_breaches
+        rows, cols = rows[keep], cols[keep]
+        bounds = np.searchsorted(rows, np.arange(len(scenarios) + 1)).tolist()
+        breaches = [
+            {
+                "client_id": client_id,
+                "instrument_id": instrument_id,
+                "shocked_exposure_usd": exposure,
+                "soft_limit_usd": soft_limit,
+                "hard_limit_usd": hard_limit,
+                "severity": "hard" if hard else "soft",
+            }
+            for client_id, instrument_id, exposure, soft_limit, hard_limit, hard in zip(
+                book.client_ids[cols].tolist(),
+                book.instrument_ids[cols].tolist(),
+                np.round(shocked_exposure[rows, cols], 2).tolist(),
+                book.soft_limits[cols].tolist(),
+                book.hard_limits[cols].tolist(),
+                hard_breach[rows, cols].tolist(),
+            )
+        ]
+
+        totals = np.round(pnl.sum(axis=1), 2).tolist()
+        hard_counts = hard_breach.sum(axis=1).tolist()
+        soft_counts = soft_breach.sum(axis=1).tolist()
+        pnl_by_client = np.round(pnl_by_client, 2)
+        pnl_by_instrument = np.round(pnl_by_instrument, 2)
+        results = [
+            {
+                "name": scenario.name,
+                "total_pnl_usd": totals[row],
+                "pnl_by_client_usd": pnl_by_client[row],
+                "pnl_by_instrument_usd": pnl_by_instrument[row],
+                "hard_breaches": hard_counts[row],
+                "soft_breaches": soft_counts[row],
+                "breaches": breaches[bounds[row] : bounds[row + 1]],
+            }
+            for row, scenario in enumerate(scenarios)
+        ]
+
+        return {
+            "snapshot": f"{book.key[0]}-{book.key[1]}",
+            "client_ids": book.client_axis,
+            "instrument_ids": book.instrument_axis,
+            "scenarios": results,
+        }
+
+
+scenario_engine = ScenarioEngine()
@@ -0,0 +1,227 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import Client, Instrument, MarketPrice, Position, RFQRequest, RFQStatus, Trade
+from app.services.rfq_stream import rfq_stream_service
+from app.services.ws import manager
+
+
+async def _latest_prices(db: AsyncSession) -> list[dict]:
+    latest_subquery = (
+        select(MarketPrice.instrument_id, func.max(MarketPrice.ts).label("max_ts"))
+        .group_by(MarketPrice.instrument_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            MarketPrice.instrument_id,
+            Instrument.symbol,
+            MarketPrice.bid,
+            MarketPrice.ask,
+            MarketPrice.mid,
+            MarketPrice.spread_bps,
+            MarketPrice.rolling_vwap,
+            MarketPrice.volatility_5m,
+            MarketPrice.ts,
+        )
+        .join(Instrument, MarketPrice.instrument_id == Instrument.id)
+        .join(
+            latest_subquery,
+            and_(
+                MarketPrice.instrument_id == latest_subquery.c.instrument_id,
+                MarketPrice.ts == latest_subquery.c.max_ts,
+            ),
+        )
+        .order_by(Instrument.symbol)
+    )
+    return [
+        {
+            "instrument_id": instrument_id,
+            "instrument_symbol": symbol,
+            "bid": float(bid),
+            "ask": float(ask),
+            "mid": float(mid),
+            "spread_bps": float(spread_bps),
+            "rolling_vwap": float(rolling_vwap),
+            "volatility_5m": float(volatility_5m),
+            "ts": ts.isoformat(),
+        }
+        for (
+            instrument_id,
+            symbol,
+            bid,
+            ask,
+            mid,
+            spread_bps,
+            rolling_vwap,
+            volatility_5m,
+            ts,
+        ) in (await db.execute(stmt)).all()
+    ]
+
+
+async def _positions(db: AsyncSession) -> list[dict]:
+    stmt = (
+        select(
+            Position.client_id,
+            Client.name,
+            Position.instrument_id,
+            Instrument.symbol,
+            Position.net_size,
+            Position.avg_price,
+            Position.usd_exposure,
+            Position.updated_at,
+        )
+        .join(Client, Position.client_id == Client.id)
+        .join(Instrument, Position.instrument_id == Instrument.id)
+        .order_by(desc(Position.usd_exposure))
+    )
+    return [
+        {
+            "client_id": client_id,
+            "client_name": client_name,
+            "instrument_id": instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "net_size": float(net_size),
+            "avg_price": float(avg_price),
+            "usd_exposure": float(usd_exposure),
+            "updated_at": updated_at.isoformat(),
+        }
+        for (
+            client_id,
+            client_name,
+            instrument_id,
+            instrument_symbol,
+            net_size,
+            avg_price,
+            usd_exposure,
+            updated_at,
+        ) in (await db.execute(stmt)).all()
+    ]
+
+
+async def _active_rfqs(db: AsyncSession) -> list[dict]:
+    stmt = (
+        select(
+            RFQRequest.id,
+            RFQRequest.client_id,
+            Client.name,
+            RFQRequest.instrument_id,
+            Instrument.symbol,
+            RFQRequest.side,
+            RFQRequest.size,
+            RFQRequest.quoted_price,
+            RFQRequest.quote_expiry,
+            RFQRequest.status,
+            RFQRequest.created_at,
+        )
+        .join(Client, RFQRequest.client_id == Client.id)
+        .join(Instrument, RFQRequest.instrument_id == Instrument.id)
+        .where(
+            RFQRequest.status.in_([RFQStatus.pending, RFQStatus.quoted]),
+            RFQRequest.quote_expiry > datetime.now(timezone.utc),
+        )
+        .order_by(RFQRequest.created_at)
+    )
+    return [
+        {
+            "id": str(rfq_id),
+            "client_id": client_id,
+            "client_name": client_name,
+            "instrument_id": instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "side": side.value,
+            "size": float(size),
+            "quoted_price": float(quoted_price),
+            "quote_expiry": quote_expiry.isoformat(),
+            "status": rfq_status.value,
+            "created_at": created_at.isoformat(),
+            "streaming": rfq_stream_service.is_streaming(rfq_id, instrument_id),
+        }
+        for (
+            rfq_id,
+            client_id,
+            client_name,
+            instrument_id,
+            instrument_symbol,
+            side,
+            size,
+            quoted_price,
+            quote_expiry,
+            rfq_status,
+            created_at,
+        ) in (await db.execute(stmt)).all()
+    ]
+
+
+async def _recent_trades(db: AsyncSession) -> list[dict]:
+    stmt = (
+        select(
+            Trade.id,
+            Trade.client_id,
+            Client.name,
+            Trade.instrument_id,
+            Instrument.symbol,
+            Trade.side,
+            Trade.size,
+            Trade.price,
+            Trade.notional_usd,
+            Trade.timestamp,
+        )
+        .join(Client, Trade.client_id == Client.id)
+        .join(Instrument, Trade.instrument_id == Instrument.id)
+        .order_by(desc(Trade.timestamp))
+        .limit(settings.ws_recent_trades)
+    )
+    rows = (await db.execute(stmt)).all()
+    # Oldest first, matching the order live trades are appended in.
+    return [
+        {
+            "id": trade_id,
+            "client_id": client_id,
+            "client_name": client_name,
+            "instrument_id": instrument_id,
+            "instrument_symbol": instrument_symbol,
+            "side": side.value,
+            "size": float(size),
+            "price": float(price),
+            "notional_usd": float(notional_usd),
+            "timestamp": timestamp.isoformat(),
+        }
+        for (
+            trade_id,
+            client_id,
+            client_name,
+            instrument_id,
+            instrument_symbol,
+            side,
+            size,
+            price,
+            notional_usd,
+            timestamp,
+        ) in reversed(rows)
+    ]
+
+
+SNAPSHOT_LOADERS: dict[str, Callable[[AsyncSession], Awaitable[list[dict]]]] = {
+    "prices": _latest_prices,
+    "positions": _positions,
+    "rfq_updates": _active_rfqs,
+    "trade_updates": _recent_trades,
+}
+
+
+async def _prime(channel: str) -> None:
+    async with AsyncSessionLocal() as db:
+        items = await SNAPSHOT_LOADERS[channel](db)
+    await manager.prime(channel, items)
+
+
+async def prime_channel_snapshots() -> None:
+    await asyncio.gather(*(_prime(channel) for channel in SNAPSHOT_LOADERS))
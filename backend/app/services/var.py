@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import BigInteger, cast, extract, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Instrument, MarketPrice
+from app.services.scenarios import scenario_engine
+
+WindowKey = tuple[int, int]
+
+
+@dataclass(slots=True)
+class ReturnSeries:
+    # Closing mids on a fixed bucket grid: `window` complete returns plus the bucket in progress.
+    bucket_seconds: int
+    window: int
+    columns: dict[int, int]
+    prices: np.ndarray
+    last_bucket: int
+    stale: bool = False
+    _returns: np.ndarray | None = field(default=None, repr=False)
+
+    def apply_tick(self, instrument_id: int, mid: float, bucket: int) -> None:
+        col = self.columns.get(instrument_id)
+        if col is None:
+            self.stale = True
+            return
+        if bucket < self.last_bucket:
+            return
+        if bucket > self.last_bucket:
+            shift = min(bucket - self.last_bucket, len(self.prices))
+            previous = self.prices[-1].copy()
+            self.prices[: len(self.prices) - shift] = self.prices[shift:]
+            self.prices[len(self.prices) - shift :] = previous
+            self.last_bucket = bucket
+        self.prices[-1, col] = mid
+        self._returns = None
+
+    def returns(self) -> np.ndarray:
+        if self._returns is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = self.prices[1:] / self.prices[:-1] - 1.0
+            self._returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+        return self._returns
+
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    rows = np.where(np.isnan(prices), 0, np.arange(len(prices))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return prices[rows, np.arange(prices.shape[1])]
+
+
+def _tail_risk(pnl: np.ndarray, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    # Historical simulation: VaR is the loss at the (1 - confidence) quantile of simulated P&L,
+    # ES the average loss at or beyond it. Both are reported as positive numbers.
+    threshold = np.quantile(pnl, 1.0 - confidence, axis=0)
+    tail = pnl <= threshold
+    shortfall = np.where(tail, pnl, 0.0).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+    return np.maximum(-threshold, 0.0), np.maximum(-shortfall, 0.0)
+
+
+class VaRService:
+    def __init__(self, max_windows: int) -> None:
+        self._max_windows = max_windows
+        self._series: OrderedDict[WindowKey, ReturnSeries] = OrderedDict()
+        self._locks: dict[WindowKey, asyncio.Lock] = {}
+
+    async def _load(self, db: AsyncSession, bucket_seconds: int, window: int) -> ReturnSeries:
+        instrument_ids = (
+            await db.execute(
+                select(Instrument.id).where(Instrument.is_active.is_(True)).order_by(Instrument.id)
+            )
+        ).scalars().all()
+        columns = {instrument_id: col for col, instrument_id in enumerate(instrument_ids)}
+
+        last_bucket = int(time.time() // bucket_seconds)
+        first_bucket = last_bucket - window
+        # The bucket width is inlined so DISTINCT ON and ORDER BY render the identical expression.
+        width = literal_column(str(int(bucket_seconds)))
+        bucket = cast(func.floor(extract("epoch", MarketPrice.ts) / width), BigInteger)
+        stmt = (
+            select(MarketPrice.instrument_id, bucket, MarketPrice.mid)
+            .where(
+                MarketPrice.ts >= datetime.fromtimestamp(first_bucket * bucket_seconds, timezone.utc)
+            )
+            .distinct(MarketPrice.instrument_id, bucket)
+            .order_by(MarketPrice.instrument_id, bucket, MarketPrice.ts.desc())
+        )
+        rows = (await db.execute(stmt)).all()
+
+        prices = np.full((window + 1, len(columns)), np.nan)
+        cells = [
+            (row_bucket - first_bucket, columns[instrument_id], float(mid))
+            for instrument_id, row_bucket, mid in rows
+            if instrument_id in columns and first_bucket <= row_bucket <= last_bucket
+        ]
+        if cells:
+            row_index, col_index, mids = zip(*cells)
+            prices[list(row_index), list(col_index)] = mids
+
+        return ReturnSeries(
+            bucket_seconds=bucket_seconds,
+            window=window,
+            columns=columns,
+            prices=_forward_fill(prices),
+            last_bucket=last_bucket,
+        )
+
+    async def series(self, db: AsyncSession, bucket_seconds: int, window: int) -> ReturnSeries:
+        key = (bucket_seconds, window)
+        cached = self._series.get(key)
+        if cached is not None and not cached.stale:
+            self._series.move_to_end(key)
+            return cached
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self._series.get(key)
+            if cached is not None and not cached.stale:
+                return cached
+            loaded = await self._load(db, bucket_seconds, window)
+            self._series[key] = loaded
+            self._series.move_to_end(key)
+            while len(self._series) > self._max_windows:
+                evicted, _ = self._series.popitem(last=False)
+                self._locks.pop(evicted, None)
+            return loaded
+
+    async def on_ticks(self, ticks: dict[int, dict]) -> None:
+        for series in self._series.values():
+            for instrument_id, tick in ticks.items():
+                bucket = int(tick["ts"].timestamp() // series.bucket_seconds)
+                series.apply_tick(instrument_id, float(tick["mid"]), bucket)
+
+    async def compute(
+        self, db: AsyncSession, *, bucket_seconds: int, window: int, confidence: float
+    ) -> dict:
+        series = await self.series(db, bucket_seconds, window)
+        returns = series.returns()
+        book = scenario_engine.book()
+
+        # client x instrument market value, aligned to the return matrix columns.
+        client_axis, client_index = np.unique(book.client_ids, return_inverse=True)
+        cols = np.array(
+            [series.columns.get(instrument_id, -1) for instrument_id in book.instrument_ids.tolist()],
+            dtype=np.int64,
+        )
+        covered = cols >= 0
+        exposure = np.zeros((len(client_axis), len(series.columns)))
+        np.add.at(exposure, (client_index[covered], cols[covered]), book.market_value[covered])
+
+        client_pnl = returns @ exposure.T
+        desk_pnl = client_pnl.sum(axis=1, keepdims=True)
+        client_var, client_es = _tail_risk(client_pnl, confidence)
+        desk_var, desk_es = _tail_risk(desk_pnl, confidence)
+
+        return {
+            "bucket_seconds": bucket_seconds,
+            "window": window,
+            "observations": len(returns),
+            "confidence": confidence,
+            "as_of": datetime.now(timezone.utc),
+            "desk_var_usd": round(float(desk_var[0]), 2),
+            "desk_es_usd": round(float(desk_es[0]), 2),
+            "client_ids": client_axis,
+            "client_var_usd": np.round(client_var, 2),
+            "client_es_usd": np.round(client_es, 2),
+            "uncovered_instrument_ids": sorted(set(book.instrument_ids[~covered].tolist())),
+        }
+
+
+var_service = VaRService(max_windows=settings.var_max_windows)
@@ -0,0 +1,147 @@
+import math
+import time
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+# Stale venues are swept at most this often; the sweep also rebuilds the running sums.
+EXPIRY_SWEEP_SECONDS = 1.0
+
+
+@dataclass(slots=True)
+class VenueQuote:
+    venue: str
+    bid: float
+    ask: float
+    size: float
+    ts: float
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2
+
+
+class InstrumentBook:
+    # Latest quote per venue. The best bid/ask are only rescanned when the venue holding them
+    # worsens, and the depth-weighted mid is kept as running sums, so an update is O(1) in the
+    # common case and O(venues) otherwise.
+    __slots__ = (
+        "quotes",
+        "best_bid",
+        "best_ask",
+        "best_bid_venue",
+        "best_ask_venue",
+        "_weighted_mid",
+        "_depth",
+        "_mid_sum",
+        "_next_sweep",
+        "received_at",
+    )
+
+    def __init__(self) -> None:
+        self.quotes: dict[str, VenueQuote] = {}
+        self.best_bid = -math.inf
+        self.best_ask = math.inf
+        self.best_bid_venue: str | None = None
+        self.best_ask_venue: str | None = None
+        self._weighted_mid = 0.0
+        self._depth = 0.0
+        self._mid_sum = 0.0
+        self._next_sweep = 0.0
+        # Monotonic time of the newest quote; replayed quotes carry historical timestamps, so
+        # freshness is judged by arrival rather than by quote ts.
+        self.received_at = 0.0
+
+    def _add(self, quote: VenueQuote, sign: float) -> None:
+        depth = max(quote.size, 0.0)
+        self._weighted_mid += sign * quote.mid * depth
+        self._depth += sign * depth
+        self._mid_sum += sign * quote.mid
+
+    def _rescan_bid(self) -> None:
+        self.best_bid, self.best_bid_venue = -math.inf, None
+        for quote in self.quotes.values():
+            if quote.bid > self.best_bid:
+                self.best_bid, self.best_bid_venue = quote.bid, quote.venue
+
+    def _rescan_ask(self) -> None:
+        self.best_ask, self.best_ask_venue = math.inf, None
+        for quote in self.quotes.values():
+            if quote.ask < self.best_ask:
+                self.best_ask, self.best_ask_venue = quote.ask, quote.venue
+
+    def update(self, venue: str, bid: float, ask: float, size: float, ts: float) -> None:
+        previous = self.quotes.get(venue)
+        if previous is not None:
+            self._add(previous, -1.0)
+        quote = self.quotes[venue] = VenueQuote(venue, bid, ask, size, ts)
+        self.received_at = time.monotonic()
+        self._add(quote, 1.0)
+
+        if bid >= self.best_bid:
+            self.best_bid, self.best_bid_venue = bid, venue
+        elif venue == self.best_bid_venue:
+            self._rescan_bid()
+        if ask <= self.best_ask:
+            self.best_ask, self.best_ask_venue = ask, venue
+        elif venue == self.best_ask_venue:
+            self._rescan_ask()
+
+        # A cross usually means a venue went quiet on the far side, so sweep it out right away.
+        if ts >= self._next_sweep or self.crossed:
+            self._sweep(ts)
+
+    def _sweep(self, now: float) -> None:
+        cutoff = now - settings.venue_stale_seconds
+        for venue in [venue for venue, quote in self.quotes.items() if quote.ts < cutoff]:
+            del self.quotes[venue]
+        self._weighted_mid = self._depth = self._mid_sum = 0.0
+        for quote in self.quotes.values():
+            self._add(quote, 1.0)
+        self._rescan_bid()
+        self._rescan_ask()
+        self._next_sweep = now + EXPIRY_SWEEP_SECONDS
+
+    @property
+    def crossed(self) -> bool:
+        return self.best_bid > self.best_ask
+
+    @property
+    def depth_weighted_mid(self) -> float:
+        if self._depth > 0:
+            return self._weighted_mid / self._depth
+        # Feeds without sizes fall back to the plain average of venue mids.
+        return self._mid_sum / len(self.quotes)
+
+
+class VenueBooks:
+    def __init__(self) -> None:
+        self._books: dict[int, InstrumentBook] = {}
+
+    def update(
+        self, instrument_id: int, venue: str, bid: float, ask: float, size: float, ts: float
+    ) -> InstrumentBook:
+        book = self._books.get(instrument_id)
+        if book is None:
+            book = self._books[instrument_id] = InstrumentBook()
+        book.update(venue, bid, ask, size, ts)
+        return book
+
+    def get(self, instrument_id: int) -> InstrumentBook | None:
+        return self._books.get(instrument_id)
+
+    def fresh(self, instrument_id: int) -> InstrumentBook | None:
+        # A book whose feed stopped keeps its last quotes; past the stale window callers fall
+        # back to the stored price.
+        book = self._books.get(instrument_id)
+        if book is None or not book.quotes:
+            return None
+        if time.monotonic() - book.received_at > settings.venue_stale_seconds:
+            return None
+        return book
+
+    def items(self) -> list[tuple[int, InstrumentBook]]:
+        return list(self._books.items())
+
+
+venue_books = VenueBooks()
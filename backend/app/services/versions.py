@@ -0,0 +1,105 @@
+import math
+import time
+import zlib
+from collections import deque
+from collections.abc import Hashable
+
+from fastapi import Request, Response
+
+from app.services.events import (
+    LIMIT_UPDATED,
+    PRICES_TICKED,
+    RFQ_CHANGED,
+    RFQ_REQUOTED,
+    TRADE_BOOKED,
+    DomainEvent,
+    domain_events,
+)
+
+RESOURCES = ("positions", "limits", "rfqs", "trades", "prices", "exposure")
+
+
+class ResourceVersions:
+    def __init__(self, history: int = 10_000) -> None:
+        # Versions start from the boot time in ms so `since` values from a previous process
+        # fall below the change log and get a full response instead of a wrong delta.
+        base = int(time.time() * 1000)
+        self._versions: dict[str, int] = {resource: base for resource in RESOURCES}
+        self._floors: dict[str, int] = {resource: base for resource in RESOURCES}
+        self._changes: dict[str, deque[tuple[int, Hashable]]] = {
+            resource: deque(maxlen=history) for resource in RESOURCES
+        }
+        # Monotonic time of the last change per resource and per client, used to keep reads on
+        # the primary while the replica may still be missing that change.
+        self._changed_at: dict[Hashable, float] = {}
+
+    def current(self, resource: str) -> int:
+        return self._versions[resource]
+
+    def bump(self, resource: str, *keys: Hashable) -> int:
+        version = self._versions[resource] + 1
+        self._versions[resource] = version
+        self._changed_at[resource] = time.monotonic()
+        changes = self._changes[resource]
+        for key in keys:
+            if len(changes) == changes.maxlen:
+                self._floors[resource] = changes[0][0]
+            changes.append((version, key))
+        return version
+
+    def changed_since(self, resource: str, since: int) -> set[Hashable] | None:
+        if since < self._floors[resource] or since > self._versions[resource]:
+            return None
+        keys: set[Hashable] = set()
+        for version, key in reversed(self._changes[resource]):
+            if version <= since:
+                break
+            keys.add(key)
+        return keys
+
+    def changed_within(self, key: Hashable, seconds: float) -> bool:
+        return self._changed_at.get(key, -math.inf) > time.monotonic() - seconds
+
+    def on_event(self, event: DomainEvent) -> None:
+        if event.name in (TRADE_BOOKED, RFQ_CHANGED):
+            now = time.monotonic()
+            for client_id in event.client_ids:
+                self._changed_at["client", client_id] = now
+        if event.name == TRADE_BOOKED:
+            self.bump("trades", *event.entity_ids)
+            self.bump("positions", *zip(event.client_ids, event.instrument_ids))
+        elif event.name in (RFQ_CHANGED, RFQ_REQUOTED):
+            self.bump("rfqs", *event.entity_ids)
+        elif event.name == LIMIT_UPDATED:
+            self.bump("limits", *event.entity_ids)
+        elif event.name == PRICES_TICKED:
+            self.bump("prices", *event.instrument_ids)
+
+    def etag(self, request: Request, *resources: str) -> str:
+        versions = "-".join(str(self._versions[resource]) for resource in resources)
+        variant = zlib.crc32(request.url.path.encode() + b"?" + request.url.query.encode())
+        return f'W/"{versions}-{variant:08x}"'
+
+
+resource_versions = ResourceVersions()
+domain_events.subscribe(resource_versions.on_event)
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {item.strip() for item in header.split(",")}
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+def version_headers(etag: str, version: int) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "X-Resource-Version": str(version)}
+
+
+def not_modified_response(etag: str, version: int) -> Response:
+    return Response(status_code=304, headers=version_headers(etag, version))
+
+
+def delta_payload(version: int, changed: set[Hashable] | None, items: list) -> dict:
+    return {"version": version, "full": changed is None, "items": items}
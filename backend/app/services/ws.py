@@ -1,44 +1,364 @@
 import asyncio
-from collections import defaultdict
+import json
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
 
+import msgpack
 from fastapi import WebSocket
 
+from app.core.config import settings
+
 
 ALLOWED_CHANNELS = {"prices", "positions", "rfq_updates", "trade_updates"}
+ENCODINGS = {"json", "msgpack"}
+
+# msgpack frames carry prices as integers scaled by PRICE_SCALE and timestamps as epoch milliseconds.
+PRICE_SCALE = 100_000_000
+PRICE_FIELDS = {
+    "bid",
+    "ask",
+    "mid",
+    "rolling_vwap",
+    "quoted_price",
+    "price",
+    "avg_price",
+    "mark_price",
+}
+TIMESTAMP_FIELDS = {"ts", "timestamp", "created_at", "updated_at", "quote_expiry", "expired_at"}
+
+SNAPSHOT_KEYS = {
+    "prices": ("instrument_id",),
+    "positions": ("client_id", "instrument_id"),
+    "rfq_updates": ("id",),
+    "trade_updates": ("id",),
+}
+ACTIVE_RFQ_STATUSES = {"pending", "quoted"}
+
+FILTER_DIMENSIONS = ("client_id", "instrument_id")
+MAX_FILTER_KEYS = 1000
+
+Filters = dict[str, frozenset[int]]
+
+
+def _compact_value(key: str, value):
+    if isinstance(value, dict):
+        return _compact(value)
+    if isinstance(value, list):
+        return [_compact_value(key, item) for item in value]
+    if key in PRICE_FIELDS and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(value * PRICE_SCALE)
+    if key in TIMESTAMP_FIELDS and value is not None:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if isinstance(value, datetime):
+            return int(value.timestamp() * 1000)
+    return value
+
+
+def _compact(payload: dict) -> dict:
+    return {key: _compact_value(key, value) for key, value in payload.items()}
+
+
+def encode_payload(payload: dict, encoding: str) -> str | bytes:
+    if encoding == "msgpack":
+        return msgpack.packb(_compact(payload))
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def with_prev(body: str | bytes, prev: int | None) -> str | bytes:
+    # Frames differ per socket only in "prev", so the shared body is encoded once per encoding
+    # and prev is spliced in as its first key.
+    if isinstance(body, str):
+        return f'{{"prev":{"null" if prev is None else prev},{body[1:]}'
+    if 0x80 <= body[0] < 0x8F:
+        return bytes((body[0] + 1,)) + msgpack.packb("prev") + msgpack.packb(prev) + body[1:]
+    return msgpack.packb({"prev": prev, **msgpack.unpackb(body)})
+
+
+def parse_filters(source: dict) -> Filters | None:
+    filters: Filters = {}
+    for dimension in FILTER_DIMENSIONS:
+        values = source.get(f"{dimension}s")
+        if values is None:
+            continue
+        if isinstance(values, str):
+            values = [value for value in values.split(",") if value]
+            if not all(value.isdigit() for value in values):
+                return None
+            values = [int(value) for value in values]
+        if not isinstance(values, list) or len(values) > MAX_FILTER_KEYS:
+            return None
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            return None
+        filters[dimension] = frozenset(values)
+    return filters
+
+
+class ChannelState:
+    def __init__(self, channel: str, replay_size: int) -> None:
+        self.channel = channel
+        # Sequence numbers start from the boot time in ms so a client resuming against a
+        # restarted process always falls outside the replay buffer and gets a snapshot.
+        self.seq = int(time.time() * 1000)
+        self.items: dict[tuple, dict] = {}
+        self.history: deque[dict] = deque(maxlen=replay_size)
+        self.sockets: dict[WebSocket, str] = {}
+        # Frames are queued per socket under the lock and sent by that socket's writer task, so
+        # a slow client never holds up the channel; one whose queue fills up is dropped.
+        self.queues: dict[WebSocket, asyncio.Queue[str | bytes | None]] = {}
+        # Seq of the last frame each socket was sent. Frames carry it as "prev", so a filtered
+        # socket can tell a gap from events that did not match its filters.
+        self.delivered: dict[WebSocket, int] = {}
+        self.lock = asyncio.Lock()
+        # Inverted index per filter dimension; sockets without a filter on a dimension are
+        # wildcards for it, so a broadcast only visits sockets that can match its keys.
+        self.filters: dict[WebSocket, Filters] = {}
+        self.index: dict[str, defaultdict[int, set[WebSocket]]] = {
+            dimension: defaultdict(set) for dimension in FILTER_DIMENSIONS
+        }
+        self.wildcards: dict[str, set[WebSocket]] = {
+            dimension: set() for dimension in FILTER_DIMENSIONS
+        }
+
+    def add_socket(
+        self, websocket: WebSocket, encoding: str, filters: Filters, queue: asyncio.Queue
+    ) -> None:
+        self.sockets[websocket] = encoding
+        self.queues[websocket] = queue
+        self.set_filters(websocket, filters)
+
+    def remove_socket(self, websocket: WebSocket) -> None:
+        self.sockets.pop(websocket, None)
+        self.queues.pop(websocket, None)
+        self.delivered.pop(websocket, None)
+        self._unindex(websocket)
+        self.filters.pop(websocket, None)
+
+    def set_filters(self, websocket: WebSocket, filters: Filters) -> None:
+        self._unindex(websocket)
+        self.filters[websocket] = filters
+        for dimension in FILTER_DIMENSIONS:
+            values = filters.get(dimension)
+            if not values:
+                self.wildcards[dimension].add(websocket)
+                continue
+            for value in values:
+                self.index[dimension][value].add(websocket)
+
+    def _unindex(self, websocket: WebSocket) -> None:
+        filters = self.filters.get(websocket)
+        if filters is None:
+            return
+        for dimension in FILTER_DIMENSIONS:
+            self.wildcards[dimension].discard(websocket)
+            index = self.index[dimension]
+            for value in filters.get(dimension, ()):
+                sockets = index.get(value)
+                if sockets is not None:
+                    sockets.discard(websocket)
+                    if not sockets:
+                        del index[value]
+
+    def targets(self, data: object) -> list[WebSocket]:
+        matched: set[WebSocket] | None = None
+        if isinstance(data, dict):
+            for dimension in FILTER_DIMENSIONS:
+                value = data.get(dimension)
+                if value is None:
+                    continue
+                candidates = self.wildcards[dimension] | self.index[dimension].get(value, set())
+                matched = candidates if matched is None else matched & candidates
+        if matched is None:
+            return list(self.sockets)
+        return [socket for socket in matched if socket in self.sockets]
+
+    def matches(self, websocket: WebSocket, data: object) -> bool:
+        filters = self.filters.get(websocket)
+        if not filters or not isinstance(data, dict):
+            return True
+        for dimension, values in filters.items():
+            value = data.get(dimension)
+            if values and value is not None and value not in values:
+                return False
+        return True
+
+    def _key(self, data: dict) -> tuple:
+        return tuple(data.get(field) for field in SNAPSHOT_KEYS[self.channel])
+
+    def apply(self, data: dict) -> None:
+        key = self._key(data)
+        previous = self.items.pop(key, None)
+        if self.channel == "rfq_updates" and data.get("status") not in ACTIVE_RFQ_STATUSES:
+            return
+        self.items[key] = {**previous, **data} if previous else dict(data)
+        if self.channel == "trade_updates" and len(self.items) > settings.ws_recent_trades:
+            del self.items[next(iter(self.items))]
+
+    def load(self, items: list[dict]) -> None:
+        self.items.clear()
+        for data in items:
+            self.apply(data)
+
+    def snapshot(self, websocket: WebSocket) -> dict:
+        items = [item for item in self.items.values() if self.matches(websocket, item)]
+        if self.channel == "rfq_updates":
+            now = datetime.now(timezone.utc)
+            items = [
+                item
+                for item in items
+                if not item.get("quote_expiry") or datetime.fromisoformat(item["quote_expiry"]) >= now
+            ]
+        elif self.channel == "trade_updates":
+            items.reverse()
+        return {"channel": self.channel, "type": "snapshot", "seq": self.seq, "data": items}
+
+    def replay(self, websocket: WebSocket, since: int) -> list[dict] | None:
+        if since > self.seq:
+            return None
+        if since == self.seq:
+            return []
+        if not self.history or self.history[0]["seq"] > since + 1:
+            return None
+        payloads: list[dict] = []
+        prev = since
+        for payload in self.history:
+            if payload["seq"] > since and self.matches(websocket, payload.get("data")):
+                payloads.append({**payload, "prev": prev})
+                prev = payload["seq"]
+        return payloads
 
 
 class ConnectionManager:
     def __init__(self) -> None:
-        self._channels: dict[str, set[WebSocket]] = defaultdict(set)
-        self._lock = asyncio.Lock()
+        self._states = {
+            channel: ChannelState(channel, settings.ws_replay_buffer_size)
+            for channel in ALLOWED_CHANNELS
+        }
+        self._writers: dict[WebSocket, asyncio.Task] = {}
 
-    async def connect(self, channel: str, websocket: WebSocket) -> None:
+    async def connect(
+        self,
+        channel: str,
+        websocket: WebSocket,
+        encoding: str = "json",
+        since: int | None = None,
+        filters: Filters | None = None,
+    ) -> None:
         await websocket.accept()
-        async with self._lock:
-            self._channels[channel].add(websocket)
+        state = self._states[channel]
+        queue: asyncio.Queue[str | bytes | None] = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        # Holding the channel lock orders the snapshot (or replay) before any later delta.
+        async with state.lock:
+            state.add_socket(websocket, encoding, filters or {}, queue)
+            self._catch_up(state, websocket, encoding, since)
+        self._writers[websocket] = asyncio.create_task(self._write(state, websocket, queue))
 
     async def disconnect(self, channel: str, websocket: WebSocket) -> None:
-        async with self._lock:
-            if websocket in self._channels[channel]:
-                self._channels[channel].remove(websocket)
+        state = self._states[channel]
+        async with state.lock:
+            state.remove_socket(websocket)
+        writer = self._writers.pop(websocket, None)
+        if writer is not None:
+            writer.cancel()
+
+    async def subscribe(
+        self, channel: str, websocket: WebSocket, encoding: str, filters: Filters
+    ) -> None:
+        state = self._states[channel]
+        async with state.lock:
+            if websocket in state.sockets:
+                state.set_filters(websocket, filters)
+                self._catch_up(state, websocket, encoding, None)
+
+    async def replay(self, channel: str, websocket: WebSocket, encoding: str, since: int) -> None:
+        state = self._states[channel]
+        async with state.lock:
+            if websocket in state.sockets:
+                self._catch_up(state, websocket, encoding, since)
+
+    def _catch_up(
+        self, state: ChannelState, websocket: WebSocket, encoding: str, since: int | None
+    ) -> None:
+        queue = state.queues[websocket]
+        payloads = state.replay(websocket, since) if since is not None else None
+        if payloads is None or len(payloads) >= queue.maxsize:
+            payloads = [state.snapshot(websocket)]
+        # Queued deltas are all covered by the snapshot or replay that replaces them.
+        while not queue.empty():
+            queue.get_nowait()
+        state.delivered[websocket] = payloads[-1]["seq"] if payloads else since
+        for payload in payloads:
+            queue.put_nowait(encode_payload(payload, encoding))
+
+    async def _write(
+        self, state: ChannelState, websocket: WebSocket, queue: asyncio.Queue[str | bytes | None]
+    ) -> None:
+        # A None frame means the socket was dropped for falling behind; closing it makes the
+        # client reconnect with since and catch up from the replay buffer.
+        try:
+            while (frame := await queue.get()) is not None:
+                await asyncio.wait_for(
+                    self._send_frame(websocket, frame), timeout=settings.ws_send_timeout_seconds
+                )
+        except Exception:
+            async with state.lock:
+                state.remove_socket(websocket)
+        self._writers.pop(websocket, None)
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), timeout=settings.ws_send_timeout_seconds)
+        except Exception:
+            pass
+
+    async def prime(self, channel: str, items: list[dict]) -> None:
+        state = self._states[channel]
+        async with state.lock:
+            state.load(items)
+
+    def send(self, channel: str, websocket: WebSocket, encoding: str, payload: dict) -> None:
+        # Goes through the socket's writer so it never interleaves with a frame being sent.
+        self._enqueue(self._states[channel], websocket, encode_payload(payload, encoding))
+
+    async def _send_frame(self, websocket: WebSocket, frame: str | bytes) -> None:
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
 
     async def broadcast(self, channel: str, payload: dict) -> None:
-        async with self._lock:
-            sockets = list(self._channels[channel])
-
-        stale: list[WebSocket] = []
-        for socket in sockets:
-            try:
-                await socket.send_json(payload)
-            except RuntimeError:
-                stale.append(socket)
-            except Exception:
-                stale.append(socket)
-
-        if stale:
-            async with self._lock:
-                for socket in stale:
-                    self._channels[channel].discard(socket)
+        state = self._states[channel]
+        async with state.lock:
+            state.seq += 1
+            payload = {**payload, "seq": state.seq}
+            if isinstance(payload.get("data"), dict):
+                state.apply(payload["data"])
+            state.history.append(payload)
+
+            bodies: dict[str, str | bytes] = {}
+            frames: dict[tuple[str, int | None], str | bytes] = {}
+            for socket in state.targets(payload.get("data")):
+                encoding = state.sockets[socket]
+                prev = state.delivered.get(socket)
+                state.delivered[socket] = state.seq
+                frame = frames.get((encoding, prev))
+                if frame is None:
+                    body = bodies.get(encoding)
+                    if body is None:
+                        body = bodies[encoding] = encode_payload(payload, encoding)
+                    frame = frames[encoding, prev] = with_prev(body, prev)
+                self._enqueue(state, socket, frame)
+
+    def _enqueue(self, state: ChannelState, websocket: WebSocket, frame: str | bytes) -> None:
+        queue = state.queues.get(websocket)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            state.remove_socket(websocket)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
 
 
 manager = ConnectionManager()
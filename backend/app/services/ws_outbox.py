@@ -0,0 +1,143 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.models import WSOutboxEvent
+from app.services.ws import manager
+
+# Retention pruning runs at most this often per process.
+PRUNE_INTERVAL_SECONDS = 60.0
+# Bounds the ids tracked as holes after a large sequence jump.
+MAX_TRACKED_HOLES = 10_000
+
+
+class WSOutbox:
+    # Channel messages are written in the same transaction as the change they announce and
+    # published by a dispatcher task as they become visible, i.e. in commit order. Every process
+    # tails the table from its own cursor, so each worker's sockets see every committed event,
+    # including ones committed by a worker that died before it could publish them. Ids skipped
+    # past the cursor (transactions still in flight, or rolled back) are re-polled as holes
+    # until they appear or expire.
+    def __init__(
+        self,
+        batch_size: int,
+        poll_seconds: float,
+        hole_seconds: float,
+        retention_seconds: float,
+    ) -> None:
+        self._batch_size = batch_size
+        self._poll = poll_seconds
+        self._hole_seconds = hole_seconds
+        self._retention = retention_seconds
+        self._cursor = 0
+        self._holes: dict[int, float] = {}
+        self._next_prune = 0.0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, db: AsyncSession, channel: str, data: dict) -> None:
+        db.add(WSOutboxEvent(channel=channel, payload={"channel": channel, "data": data}))
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def load(self, db: AsyncSession) -> None:
+        # Connected screens start from a snapshot, so only events after startup are published.
+        # Missing ids just below the cursor may belong to other workers' open transactions.
+        cursor = (await db.execute(select(func.max(WSOutboxEvent.id)))).scalar_one() or 0
+        present = set(
+            (
+                await db.execute(
+                    select(WSOutboxEvent.id).where(
+                        WSOutboxEvent.id > cursor - self._batch_size
+                    )
+                )
+            ).scalars()
+        )
+        now = time.monotonic()
+        self._cursor = cursor
+        self._holes = {
+            event_id: now
+            for event_id in range(max(cursor - self._batch_size + 1, 1), cursor + 1)
+            if event_id not in present
+        }
+
+    async def _fetch(self) -> list[tuple[int, str, dict]]:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(WSOutboxEvent.id, WSOutboxEvent.channel, WSOutboxEvent.payload)
+                    .where(
+                        or_(
+                            WSOutboxEvent.id > self._cursor,
+                            WSOutboxEvent.id.in_(list(self._holes)),
+                        )
+                    )
+                    .order_by(WSOutboxEvent.id)
+                    .limit(self._batch_size)
+                )
+            ).all()
+            if time.monotonic() >= self._next_prune:
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=self._retention)
+                await db.execute(delete(WSOutboxEvent).where(WSOutboxEvent.created_at < cutoff))
+                await db.commit()
+                self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        return [tuple(row) for row in rows]
+
+    async def dispatch(self) -> int:
+        now = time.monotonic()
+        sent = 0
+        for event_id, channel, payload in await self._fetch():
+            if event_id > self._cursor:
+                for missing in range(max(self._cursor + 1, event_id - MAX_TRACKED_HOLES), event_id):
+                    self._holes[missing] = now
+                self._cursor = event_id
+            else:
+                self._holes.pop(event_id, None)
+            await manager.broadcast(channel, payload)
+            sent += 1
+        for event_id in [
+            event_id for event_id, seen in self._holes.items() if now - seen > self._hole_seconds
+        ]:
+            del self._holes[event_id]
+        return sent
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.dispatch()
+            except Exception:
+                sent = 0
+            if sent == self._batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._poll)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="ws-outbox-dispatch")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+ws_outbox = WSOutbox(
+    batch_size=settings.ws_outbox_batch_size,
+    poll_seconds=settings.ws_outbox_poll_seconds,
+    hole_seconds=settings.ws_outbox_hole_seconds,
+    retention_seconds=settings.ws_outbox_retention_seconds,
+)
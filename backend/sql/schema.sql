@@ -65,6 +65,7 @@ CREATE TABLE IF NOT EXISTS rfq_requests (
   quoted_price NUMERIC(24, 8) NOT NULL,
   quote_expiry TIMESTAMPTZ NOT NULL,
   status rfq_status NOT NULL DEFAULT 'quoted',
+  streaming BOOLEAN NOT NULL DEFAULT FALSE,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
@@ -117,6 +118,53 @@ CREATE TABLE IF NOT EXISTS audit_logs (
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+CREATE TABLE IF NOT EXISTS audit_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  event_type VARCHAR(64) NOT NULL,
+  entity_type VARCHAR(64) NOT NULL,
+  entity_id VARCHAR(128) NOT NULL,
+  user_id INTEGER,
+  metadata JSONB NOT NULL DEFAULT '{}'::jsonb,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS audit_archive_checkpoints (
+  id SERIAL PRIMARY KEY,
+  first_id BIGINT NOT NULL,
+  last_id BIGINT NOT NULL UNIQUE,
+  row_count INTEGER NOT NULL,
+  previous_hash VARCHAR(128) NOT NULL,
+  last_hash VARCHAR(128) NOT NULL,
+  file_path VARCHAR(512) NOT NULL,
+  file_sha256 VARCHAR(64) NOT NULL,
+  archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS ws_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  channel VARCHAR(32) NOT NULL,
+  payload JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  id BIGSERIAL PRIMARY KEY,
+  user_id INTEGER NOT NULL,
+  endpoint VARCHAR(64) NOT NULL,
+  key VARCHAR(255) NOT NULL,
+  request_hash VARCHAR(64) NOT NULL,
+  status_code INTEGER NOT NULL,
+  response JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  CONSTRAINT uq_idempotency_user_endpoint_key UNIQUE (user_id, endpoint, key)
+);
+
+CREATE TABLE IF NOT EXISTS schema_version (
+  id INTEGER PRIMARY KEY,
+  version INTEGER NOT NULL,
+  applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 CREATE INDEX IF NOT EXISTS ix_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS ix_market_prices_instrument_ts ON market_prices(instrument_id, ts DESC);
 CREATE INDEX IF NOT EXISTS ix_rfq_requests_client_created ON rfq_requests(client_id, created_at DESC);
@@ -125,5 +173,22 @@ CREATE INDEX IF NOT EXISTS ix_trades_client_instrument_ts ON trades(client_id, i
 CREATE INDEX IF NOT EXISTS ix_trades_timestamp ON trades(timestamp DESC);
 CREATE INDEX IF NOT EXISTS ix_positions_client_asset ON positions(client_id, instrument_id);
 CREATE INDEX IF NOT EXISTS ix_risk_limits_client_asset ON risk_limits(client_id, instrument_id);
-CREATE INDEX IF NOT EXISTS ix_audit_logs_event_created ON audit_logs(event_type, created_at DESC);
-CREATE INDEX IF NOT EXISTS ix_audit_logs_entity_created ON audit_logs(entity_type, entity_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_ws_outbox_created_at ON ws_outbox(created_at);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys(created_at);
+ALTER TABLE rfq_requests ADD COLUMN IF NOT EXISTS streaming BOOLEAN NOT NULL DEFAULT FALSE;
+
+DROP INDEX IF EXISTS ix_audit_logs_event_created;
+DROP INDEX IF EXISTS ix_audit_logs_entity_created;
+DROP INDEX IF EXISTS ix_audit_entity_created;
+DROP INDEX IF EXISTS ix_audit_logs_event_type;
+DROP INDEX IF EXISTS ix_audit_logs_entity_type;
+DROP INDEX IF EXISTS ix_audit_logs_created_at;
+CREATE INDEX IF NOT EXISTS ix_audit_logs_entity_created_id ON audit_logs(entity_type, entity_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_audit_logs_type_created_id ON audit_logs(entity_type, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_audit_logs_event_created_id ON audit_logs(event_type, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_audit_logs_user_created_id ON audit_logs(user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_audit_logs_created_id ON audit_logs(created_at, id);
+
+-- Keep in sync with SCHEMA_VERSION in app/db.py; run after applying the changes above.
+INSERT INTO schema_version (id, version) VALUES (1, 7)
+ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version, applied_at = NOW();
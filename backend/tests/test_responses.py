@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.responses import FastJSONResponse
+from app.models import RFQStatus, TradeSide
+from app.schemas import MarketPriceOut, PositionOut, RFQOut, RiskLimitOut, TradeOut
+
+NOW = datetime(2026, 3, 14, 9, 26, 53, 589793, tzinfo=timezone.utc)
+
+
+def previous_body(model: type[BaseModel], rows: list[dict]) -> bytes:
+    # What a response_model endpoint returned before the orjson fast path.
+    return JSONResponse([model.model_validate(row).model_dump(mode="json") for row in rows]).body
+
+
+def fast_body(rows: list[dict]) -> bytes:
+    return FastJSONResponse(rows).body
+
+
+CASES = [
+    (
+        TradeOut,
+        {
+            "id": 1,
+            "client_id": 2,
+            "client_name": "Zürich Capital",
+            "instrument_id": 3,
+            "instrument_symbol": "BTC-USD",
+            "side": TradeSide.buy,
+            "size": 0.125,
+            "price": 64_250.5,
+            "notional_usd": 8031.3125,
+            "timestamp": NOW,
+        },
+    ),
+    (
+        RFQOut,
+        {
+            "id": uuid4(),
+            "client_id": 2,
+            "client_name": "Alpha",
+            "instrument_id": 3,
+            "instrument_symbol": "ETH-USD",
+            "side": TradeSide.sell,
+            "size": 10.0,
+            "quoted_price": 3120.0,
+            "quote_expiry": NOW + timedelta(seconds=20),
+            "status": RFQStatus.quoted,
+            "created_at": NOW,
+            "streaming": True,
+        },
+    ),
+    (
+        PositionOut,
+        {
+            "client_id": 2,
+            "client_name": "Alpha",
+            "instrument_id": 3,
+            "instrument_symbol": "SOL-USD",
+            "net_size": np.float64(-42.5),
+            "avg_price": np.float64(151.37),
+            "usd_exposure": np.float64(6433.225),
+            "updated_at": NOW.replace(microsecond=0),
+        },
+    ),
+    (
+        MarketPriceOut,
+        {
+            "instrument_id": 4,
+            "instrument_symbol": "ADA-USD",
+            "bid": np.float32(0.5),
+            "ask": 0.4512,
+            "mid": 0.45105,
+            "spread_bps": 6.651,
+            "rolling_vwap": 0.451,
+            "volatility_5m": 0.00012,
+            "ts": NOW.astimezone(timezone(timedelta(hours=2))),
+        },
+    ),
+    (
+        RiskLimitOut,
+        {
+            "id": 5,
+            "client_id": None,
+            "client_name": None,
+            "instrument_id": 3,
+            "instrument_symbol": "BTC-USD",
+            "soft_limit_usd": 1_000_000.0,
+            "hard_limit_usd": 2_500_000.0,
+            "leverage_limit": 3.0,
+            "requires_supervisor": False,
+            "active": True,
+        },
+    ),
+]
+
+
+@pytest.mark.parametrize("model, row", CASES, ids=[model.__name__ for model, _ in CASES])
+def test_fast_path_matches_response_model_output(model: type[BaseModel], row: dict) -> None:
+    assert json.loads(fast_body([row])) == json.loads(previous_body(model, [row]))
+
+
+def test_utc_datetimes_render_with_z() -> None:
+    assert fast_body([{"ts": NOW}]) == b'[{"ts":"2026-03-14T09:26:53.589793Z"}]'
+    assert json.loads(previous_body(TradeOut, [CASES[0][1]]))[0]["timestamp"].endswith("Z")
+
+
+def test_numpy_values_serialize_as_plain_numbers() -> None:
+    rows = [{"value": np.float64(1.5), "count": np.int64(7), "series": np.array([1.0, 2.5])}]
+    assert json.loads(fast_body(rows)) == [{"value": 1.5, "count": 7, "series": [1.0, 2.5]}]
+
+
+def test_floats_round_trip() -> None:
+    values = [0.1, 1e-7, 123456789.123, 1e17, -0.0]
+    assert json.loads(fast_body(values)) == json.loads(JSONResponse(values).body)
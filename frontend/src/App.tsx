@@ -1,4 +1,4 @@
-import { useCallback, useEffect, useMemo, useState } from "react";
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
 
 import {
   apiBaseUrl,
@@ -6,6 +6,7 @@ import {
   downloadTradesCsv,
   executeTradeFromRfq,
   getCurrentPrices,
+  getExposureMatrix,
   getLimits,
   getPositions,
   getRfqs,
@@ -23,6 +24,7 @@ import RiskAlertsPanel from "./components/RiskAlertsPanel";
 import TradeBlotter from "./components/TradeBlotter";
 import { useWebSocket } from "./hooks/useWebSocket";
 import type {
+  ExposureMatrix,
   MarketPrice,
   OptionItem,
   Position,
@@ -57,6 +59,21 @@ function upsertByInstrument(rows: MarketPrice[], item: MarketPrice): MarketPrice
   return clone;
 }
 
+type PositionMark = Partial<Position> & Pick<Position, "client_id" | "instrument_id">;
+
+function markPosition(rows: Position[], item: PositionMark): Position[] {
+  const index = rows.findIndex(
+    (row) => row.client_id === item.client_id && row.instrument_id === item.instrument_id
+  );
+  if (index === -1) {
+    return rows;
+  }
+
+  const clone = [...rows];
+  clone[index] = { ...clone[index], ...item };
+  return clone;
+}
+
 function uniqueOptions(limits: RiskLimit[], key: "client" | "instrument"): OptionItem[] {
   const map = new Map<number, string>();
 
@@ -85,6 +102,8 @@ export default function App() {
   const [rfqs, setRfqs] = useState<RFQ[]>([]);
   const [trades, setTrades] = useState<Trade[]>([]);
   const [positions, setPositions] = useState<Position[]>([]);
+  const [exposureMatrix, setExposureMatrix] = useState<ExposureMatrix | null>(null);
+  const exposureRefresh = useRef<number | undefined>(undefined);
   const [limits, setLimits] = useState<RiskLimit[]>([]);
   const [alerts, setAlerts] = useState<RiskAlert[]>([]);
 
@@ -104,20 +123,29 @@ export default function App() {
     setError(null);
 
     try {
-      const [currentPrices, currentRfqs, currentTrades, currentPositions, currentLimits, currentAlerts] =
-        await Promise.all([
-          getCurrentPrices(token),
-          getRfqs(token),
-          getTrades(token),
-          getPositions(token),
-          getLimits(token),
-          getRiskAlerts(token),
-        ]);
+      const [
+        currentPrices,
+        currentRfqs,
+        currentTrades,
+        currentPositions,
+        currentExposure,
+        currentLimits,
+        currentAlerts,
+      ] = await Promise.all([
+        getCurrentPrices(token),
+        getRfqs(token),
+        getTrades(token),
+        getPositions(token),
+        getExposureMatrix(token),
+        getLimits(token),
+        getRiskAlerts(token),
+      ]);
 
       setPrices(currentPrices);
       setRfqs(currentRfqs);
       setTrades(currentTrades.items);
       setPositions(currentPositions);
+      setExposureMatrix(currentExposure);
       setLimits(currentLimits);
       setAlerts(currentAlerts.alerts);
     } catch (err) {
@@ -127,6 +155,23 @@ export default function App() {
     }
   }, [token]);
 
+  // The matrix is maintained server-side; refetch it at most once a second while positions move.
+  const scheduleExposureRefresh = useCallback(() => {
+    if (!token || exposureRefresh.current !== undefined) {
+      return;
+    }
+    exposureRefresh.current = window.setTimeout(() => {
+      getExposureMatrix(token)
+        .then(setExposureMatrix)
+        .catch(() => undefined)
+        .finally(() => {
+          exposureRefresh.current = undefined;
+        });
+    }, 1_000);
+  }, [token]);
+
+  useEffect(() => () => window.clearTimeout(exposureRefresh.current), []);
+
   useWebSocket(
     wsBase,
     "prices",
@@ -170,9 +215,23 @@ export default function App() {
     wsBase,
     "positions",
     token,
-    useCallback(() => {
-      void hydrate();
-    }, [hydrate])
+    useCallback(
+      (message) => {
+        // The connect-time snapshot duplicates the REST hydrate; only live deltas refresh.
+        if (message.type === "snapshot") {
+          return;
+        }
+        // Mark-to-market pushes revalue known rows in place; fills can add rows, so they re-hydrate.
+        if (message.type === "mtm") {
+          const data = message.data as Position;
+          setPositions((prev) => markPosition(prev, data));
+          scheduleExposureRefresh();
+          return;
+        }
+        void hydrate();
+      },
+      [hydrate, scheduleExposureRefresh]
+    )
   );
 
   const handleLogin = useCallback(
@@ -200,6 +259,7 @@ export default function App() {
     setRfqs([]);
     setTrades([]);
     setPositions([]);
+    setExposureMatrix(null);
     setLimits([]);
     setAlerts([]);
   }, []);
@@ -211,6 +271,7 @@ export default function App() {
       side: "buy" | "sell";
       size: number;
       expiry_seconds: number;
+      stream: boolean;
     }) => {
       if (!token) {
         return;
@@ -316,7 +377,7 @@ export default function App() {
 
         <TradeBlotter trades={trades} onExportCsv={() => void handleExportCsv()} />
 
-        <ExposureHeatmap positions={positions} clients={clients} instruments={instruments} />
+        <ExposureHeatmap matrix={exposureMatrix} />
 
         <RiskAlertsPanel alerts={alerts} />
 
@@ -1,6 +1,7 @@
 import type {
   AuthResponse,
   ClientAnalytics,
+  ExposureMatrix,
   MarketPrice,
   Position,
   RFQ,
@@ -19,7 +20,11 @@ async function request<T>(path: string, options: RequestInit = {}, token?: strin
     headers.set("Authorization", `Bearer ${token}`);
   }
 
+  // GETs revalidate against the API's ETags, so unchanged resources come back as cheap 304s.
   const response = await fetch(`${API_BASE}${path}`, {
+    cache: options.method && options.method !== "GET" ? undefined : "no-cache",
+    // Sends the read-your-writes cookie, so reads after a write hit the primary on any worker.
+    credentials: "include",
     ...options,
     headers,
   });
@@ -61,6 +66,7 @@ export async function createRfq(
     side: Side;
     size: number;
     expiry_seconds: number;
+    stream?: boolean;
   }
 ): Promise<RFQ> {
   return request<RFQ>(
@@ -102,6 +108,10 @@ export async function getPositions(token: string): Promise<Position[]> {
   return request<Position[]>("/api/positions", {}, token);
 }
 
+export async function getExposureMatrix(token: string): Promise<ExposureMatrix> {
+  return request<ExposureMatrix>("/api/positions/exposure-matrix", {}, token);
+}
+
 export async function getLimits(token: string): Promise<RiskLimit[]> {
   return request<RiskLimit[]>("/api/limits", {}, token);
 }
@@ -1,26 +1,12 @@
-import type { OptionItem, Position } from "../types";
+import type { ExposureMatrix } from "../types";
 
 interface Props {
-  positions: Position[];
-  clients: OptionItem[];
-  instruments: OptionItem[];
+  matrix: ExposureMatrix | null;
 }
 
-function instrumentName(id: number, instruments: OptionItem[]) {
-  const found = instruments.find((instrument) => instrument.id === id);
-  return found?.name ?? `Instrument ${id}`;
-}
-
-export default function ExposureHeatmap({ positions, clients, instruments }: Props) {
-  const matrix = new Map<string, number>();
-  let maxExposure = 0;
-
-  for (const position of positions) {
-    const key = `${position.client_id}:${position.instrument_id}`;
-    const exposure = Math.abs(position.usd_exposure);
-    matrix.set(key, exposure);
-    maxExposure = Math.max(maxExposure, exposure);
-  }
+export default function ExposureHeatmap({ matrix }: Props) {
+  const columns = matrix?.instrument_ids.length ?? 0;
+  const maxExposure = matrix?.max_exposure_usd ?? 0;
 
   return (
     <section className="panel panel-heatmap">
@@ -33,26 +19,27 @@ export default function ExposureHeatmap({ positions, clients, instruments }: Pro
           <thead>
             <tr>
               <th>Client \ Asset</th>
-              {instruments.map((instrument) => (
-                <th key={instrument.id}>{instrument.name}</th>
+              {matrix?.instrument_ids.map((instrumentId, col) => (
+                <th key={instrumentId}>{matrix.instrument_symbols[col]}</th>
               ))}
             </tr>
           </thead>
           <tbody>
-            {clients.map((client) => (
-              <tr key={client.id}>
-                <td>{client.name}</td>
-                {instruments.map((instrument) => {
-                  const value = matrix.get(`${client.id}:${instrument.id}`) ?? 0;
+            {matrix?.client_ids.map((clientId, row) => (
+              <tr key={clientId}>
+                <td>{matrix.client_names[row]}</td>
+                {matrix.instrument_ids.map((instrumentId, col) => {
+                  const value = matrix.exposure_usd[row * columns + col];
+                  const utilization = matrix.utilization[row * columns + col];
                   const ratio = maxExposure > 0 ? value / maxExposure : 0;
                   const alpha = 0.08 + ratio * 0.65;
                   return (
                     <td
-                      key={`${client.id}-${instrument.id}`}
+                      key={`${clientId}-${instrumentId}`}
                       style={{ background: `rgba(212, 94, 35, ${alpha.toFixed(3)})` }}
-                      title={`${client.name} ${instrumentName(instrument.id, instruments)} ${value.toLocaleString()}`}
+                      title={`${matrix.client_names[row]} ${matrix.instrument_symbols[col]} ${value.toLocaleString()} (${(utilization * 100).toFixed(1)}% of limit)`}
                     >
-                      ${Math.round(value).toLocaleString()}
+                      ${value.toLocaleString()}
                     </td>
                   );
                 })}
@@ -13,6 +13,7 @@ interface Props {
     side: Side;
     size: number;
     expiry_seconds: number;
+    stream: boolean;
   }) => Promise<void>;
 }
 
@@ -25,6 +26,7 @@ export default function RFQModal({ open, clients, instruments, onClose, onSubmit
   const [side, setSide] = useState<Side>("buy");
   const [size, setSize] = useState(100);
   const [expirySeconds, setExpirySeconds] = useState(20);
+  const [stream, setStream] = useState(false);
   const [submitting, setSubmitting] = useState(false);
 
   useEffect(() => {
@@ -113,6 +115,11 @@ export default function RFQModal({ open, clients, instruments, onClose, onSubmit
               onChange={(e) => setExpirySeconds(Number(e.target.value))}
             />
           </label>
+
+          <label>
+            Stream Requotes
+            <input type="checkbox" checked={stream} onChange={(e) => setStream(e.target.checked)} />
+          </label>
         </div>
 
         <footer className="modal-footer">
@@ -131,6 +138,7 @@ export default function RFQModal({ open, clients, instruments, onClose, onSubmit
                   side,
                   size,
                   expiry_seconds: expirySeconds,
+                  stream,
                 });
                 onClose();
               } finally {
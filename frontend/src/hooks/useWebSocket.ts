@@ -3,8 +3,13 @@ import { useEffect } from "react";
 interface WebSocketMessage {
   channel: string;
   data: unknown;
+  type?: string;
+  seq?: number;
+  prev?: number | null;
 }
 
+const RECONNECT_DELAY_MS = 1_000;
+
 export function useWebSocket(
   wsUrl: string,
   channel: string,
@@ -16,25 +21,80 @@ export function useWebSocket(
       return;
     }
 
-    const socket = new WebSocket(`${wsUrl}/ws/${channel}?token=${token}`);
-    const heartbeat = window.setInterval(() => {
-      if (socket.readyState === WebSocket.OPEN) {
-        socket.send("ping");
-      }
-    }, 10_000);
+    let socket: WebSocket | null = null;
+    let heartbeat: number | undefined;
+    let reconnect: number | undefined;
+    let lastSeq: number | null = null;
+    let replayRequested = false;
+    let closed = false;
+
+    const connect = () => {
+      const since = lastSeq === null ? "" : `&since=${lastSeq}`;
+      const current = new WebSocket(`${wsUrl}/ws/${channel}?token=${token}${since}`);
+      socket = current;
+
+      heartbeat = window.setInterval(() => {
+        if (current.readyState === WebSocket.OPEN) {
+          current.send("ping");
+        }
+      }, 10_000);
+
+      current.onmessage = (event) => {
+        let parsed: WebSocketMessage;
+        try {
+          parsed = JSON.parse(event.data) as WebSocketMessage;
+        } catch {
+          // Ignore malformed frames.
+          return;
+        }
 
-    socket.onmessage = (event) => {
-      try {
-        const parsed = JSON.parse(event.data) as WebSocketMessage;
+        if (parsed.type === "snapshot" && Array.isArray(parsed.data)) {
+          lastSeq = parsed.seq ?? null;
+          replayRequested = false;
+          for (const item of parsed.data) {
+            onMessage({ channel: parsed.channel, type: "snapshot", data: item });
+          }
+          return;
+        }
+
+        if (typeof parsed.seq === "number" && lastSeq !== null) {
+          if (parsed.seq <= lastSeq) {
+            return;
+          }
+          // prev is the seq of the last frame this socket was sent, so filtered sockets can
+          // tell a real gap from events that did not match their filters.
+          const gap =
+            typeof parsed.prev === "number" ? parsed.prev !== lastSeq : parsed.seq > lastSeq + 1;
+          if (gap) {
+            if (!replayRequested) {
+              replayRequested = true;
+              current.send(JSON.stringify({ type: "replay", since: lastSeq }));
+            }
+            return;
+          }
+        }
+        if (typeof parsed.seq === "number") {
+          lastSeq = parsed.seq;
+          replayRequested = false;
+        }
         onMessage(parsed);
-      } catch {
-        // Ignore malformed frames.
-      }
+      };
+
+      current.onclose = () => {
+        window.clearInterval(heartbeat);
+        if (!closed) {
+          reconnect = window.setTimeout(connect, RECONNECT_DELAY_MS);
+        }
+      };
     };
 
+    connect();
+
     return () => {
+      closed = true;
       window.clearInterval(heartbeat);
-      socket.close();
+      window.clearTimeout(reconnect);
+      socket?.close();
     };
   }, [wsUrl, channel, token, onMessage]);
 }
@@ -37,6 +37,7 @@ export interface RFQ {
   quote_expiry: string;
   status: "pending" | "quoted" | "accepted" | "rejected" | "expired";
   created_at: string;
+  streaming?: boolean;
 }
 
 export interface Trade {
@@ -67,9 +68,24 @@ export interface Position {
   net_size: number;
   avg_price: number;
   usd_exposure: number;
+  mark_price?: number;
+  unrealized_pnl?: number;
   updated_at: string;
 }
 
+export interface ExposureMatrix {
+  version: number;
+  client_ids: number[];
+  client_names: string[];
+  instrument_ids: number[];
+  instrument_symbols: string[];
+  exposure_usd: number[];
+  utilization: number[];
+  max_exposure_usd: number;
+  folded_clients: number;
+  folded_instruments: number;
+}
+
 export interface RiskLimit {
   id: number;
   client_id: number | null;